@@ -1,4 +1,8 @@
+import time
 import streamlit as st
+from instrumentation import observe, page_done
+
+_page_start = time.perf_counter()
 
 st.set_page_config(
     page_title="🏠 Real Estate App",
@@ -56,3 +60,6 @@ st.markdown("""
 - 📊 **Visualization**: Explore property trends, price distribution, maps, and radar charts.
 - 🔍 **Insights**: Understand patterns across sectors and property types.
 """)
+
+observe('home', 'render', time.perf_counter() - _page_start)
+page_done()
@@ -0,0 +1,169 @@
+import functools
+import logging
+import os
+import pickle
+import threading
+
+import pandas as pd
+
+import column_store
+import plot_reduction
+from artifacts import DATA_DIR, file_sha256
+
+NUMERIC_COLS = ['price', 'price_per_sqft', 'built_up_area', 'latitude', 'longitude']
+SUMMARY_COLS = ['price', 'price_per_sqft', 'built_up_area', 'luxury_score']
+VIZ_DATA_PATH = os.path.join(DATA_DIR, 'data_viz1.csv')
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.path.join(DATA_DIR, '.aggregates')
+# Part of the persisted file name; bump when build_aggregates changes so old stores are rebuilt
+AGGREGATES_FORMAT = 6
+
+_stores = {}
+_lock = threading.Lock()
+
+
+def read_viz_data(path):
+    # Typed Parquet copy when converted (python column_store.py), else the CSV with the same dtypes
+    return column_store.load(path)
+
+
+def sector_means(df):
+    """
+    Per-sector means for the geomap, placed at the offline coordinate index's
+    sector location where it has one (the listings' mean position otherwise).
+    """
+    import coordinate_index
+
+    means = df.groupby('sector', observed=True)[NUMERIC_COLS].mean().reset_index()
+    lat, lon = coordinate_index.get_index().lookup_many(means['sector'], coordinate_index.SECTOR)
+    means['latitude'] = means['latitude'].where(pd.isna(lat), lat)
+    means['longitude'] = means['longitude'].where(pd.isna(lon), lon)
+    return means
+
+
+def build_aggregates(df):
+    """
+    Every summary the Analytics page shows, computed in one pass over `df`.
+    Summaries whose columns `df` lacks are left out (and logged), so the
+    page's other sections still work on a partial file.
+    """
+    # observed=True: with categorical keys, only combinations that occur in the data
+    builders = {
+        'sector_means': lambda: sector_means(df),
+        'treemap': lambda: df.groupby(['sector', 'society'], as_index=False, observed=True).agg({
+            'built_up_area': 'mean',
+            'price': 'mean'
+        }),
+        'corr': lambda: df.select_dtypes(include=['number']).corr(),
+        'furnishing_counts': lambda: df['furnishing_type'].value_counts(),
+        'overall_bhk_counts': lambda: df['bedRoom'].value_counts(),
+        'sector_bhk_counts': lambda: df.groupby('sector', observed=True)['bedRoom'].value_counts(),
+        'sector_summaries': lambda: df.groupby(['sector', 'property_type'], observed=True)[SUMMARY_COLS].describe(),
+        'sectors': lambda: list(df['sector'].unique()),
+        'property_types': lambda: list(df['property_type'].unique()),
+        # Bounded-size plot data (plot_reduction); the page draws these instead of raw rows
+        'area_price': lambda: {
+            kind: plot_reduction.reduce_scatter(df[df['property_type'] == kind], 'built_up_area', 'price',
+                                                mean_columns=['bedRoom'], hover=['sector', 'society'])
+            for kind in df['property_type'].unique()
+        },
+        'luxury_scatter': lambda: plot_reduction.reduce_scatter(
+            df, 'luxury_score', 'price_per_sqft', group='property_type', mean_columns=['built_up_area'],
+            hover=['society', 'sector']),
+        'bhk_price_box': lambda: plot_reduction.box_stats(df[df['bedRoom'] <= 4], 'bedRoom', 'price'),
+        'age_price_box': lambda: plot_reduction.box_stats(df, 'agePossession', 'price', color='property_type'),
+        'furnishing_price_box': lambda: plot_reduction.box_stats(df, 'furnishing_type', 'price'),
+    }
+    aggregates = {}
+    for name, build in builders.items():
+        try:
+            aggregates[name] = build()
+        except KeyError as e:
+            logger.warning("aggregate %s skipped, missing column: %s", name, e)
+    return aggregates
+
+
+def coordinates_version():
+    """Short hash of the coordinate index table sector_means reads, or 'none' before it is built."""
+    import coordinate_index
+
+    path = coordinate_index.INDEX_PATH
+    return file_sha256(path)[:16] if os.path.exists(path) else 'none'
+
+
+class AggregateStore:
+    """
+    Precomputed Analytics aggregates for one version of data_viz1.csv and of
+    the coordinate index. Persisted under
+    datasets/.aggregates/<csv sha256>-<index hash>.v<format>.pkl so a new
+    process (or a new replica) reads a small pickle, bounded whatever the
+    number of rows, instead of re-aggregating the CSV.
+    """
+
+    def __init__(self, version, aggregates):
+        self.version = version
+        self._aggregates = aggregates
+        # Per-filter memo; cleared implicitly when a new store replaces this one
+        self.sector_summary = functools.lru_cache(maxsize=1024)(self._sector_summary)
+        self.bhk_counts = functools.lru_cache(maxsize=1024)(self._bhk_counts)
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__['_aggregates'][name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    @classmethod
+    def open(cls, csv_path, cache_dir=CACHE_DIR):
+        version = f'{file_sha256(csv_path)}-{coordinates_version()}'
+        cache_path = os.path.join(cache_dir, f'{version}.v{AGGREGATES_FORMAT}.pkl')
+        if os.path.exists(cache_path):
+            with open(cache_path, 'rb') as f:
+                return cls(version, pickle.load(f))
+
+        aggregates = build_aggregates(read_viz_data(csv_path))
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = f'{cache_path}.tmp.{os.getpid()}'
+        with open(tmp, 'wb') as f:
+            pickle.dump(aggregates, f)
+        os.replace(tmp, cache_path)
+        return cls(version, aggregates)
+
+    def _sector_summary(self, sector, property_type):
+        """describe() of the price/area columns for one sector and type, or None."""
+        if (sector, property_type) not in self.sector_summaries.index:
+            return None
+        summary = self.sector_summaries.loc[(sector, property_type)].unstack(0)
+        return summary.loc[:, SUMMARY_COLS]
+
+    def _bhk_counts(self, sector='overall'):
+        if sector == 'overall':
+            return self.overall_bhk_counts
+        return self.sector_bhk_counts.loc[sector]
+
+
+def _versioned(csv_path, kind, loader, dependencies=()):
+    # Reloaded only when the mtime or size of the file (or of a dependency) changes, so reruns cost stat() calls
+    version = tuple((stat.st_mtime_ns, stat.st_size) for stat in map(os.stat, (csv_path, *dependencies)))
+    entry = _stores.get((kind, csv_path))
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    with _lock:
+        entry = _stores.get((kind, csv_path))
+        if entry is None or entry[0] != version:
+            _stores[(kind, csv_path)] = (version, loader(csv_path))
+        return _stores[(kind, csv_path)][1]
+
+
+def get_store(csv_path=VIZ_DATA_PATH):
+    """Process-wide AggregateStore for the current version of `csv_path`."""
+    import coordinate_index
+
+    dependencies = [coordinate_index.INDEX_PATH] if os.path.exists(coordinate_index.INDEX_PATH) else []
+    return _versioned(csv_path, 'aggregates', AggregateStore.open, dependencies)
+
+
+def get_viz_data(csv_path=VIZ_DATA_PATH):
+    """Process-wide row-level frame, for the charts that plot individual listings."""
+    return _versioned(csv_path, 'rows', read_viz_data)
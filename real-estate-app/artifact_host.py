@@ -0,0 +1,405 @@
+"""
+Machine-wide shared-memory artifact host.
+
+`python artifact_host.py --watch 5` loads the app's artifacts once per
+machine and publishes each as a segment file on tmpfs (/dev/shm). A
+segment is a pickle (protocol 5) whose NumPy buffers are stored out of
+band, 64-byte aligned, after the pickle stream. Replicas attach with one
+read-only mmap: the arrays come back as views of the shared pages, so
+attaching costs milliseconds and no private memory beyond the small
+Python objects (strings, dicts) in the stream.
+
+The price model is hosted as its compiled NumPy scorer (compiled_scorer.py)
+because unpickling sklearn trees always copies their node arrays; models
+the compiler does not support are hosted as the pickled pipeline.
+
+manifest/<name>.json points at the current segment of each artifact. On a
+version change the host publishes a new segment and flips the manifest;
+the old one is unlinked once no live process holds a reference
+(refs/<segment>/<pid>, registered on attach and dropped once the process
+frees its last view of the segment or exits; pids of dead processes are
+ignored). Processes that still have it mapped keep valid pages either way.
+"""
+import argparse
+import atexit
+import json
+import logging
+import mmap
+import os
+import pickle
+import shutil
+import struct
+import tempfile
+import threading
+import time
+import weakref
+
+import artifacts
+
+logger = logging.getLogger(__name__)
+
+_default_root = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+SHM_DIR = os.environ.get('REAL_ESTATE_SHM_DIR', os.path.join(_default_root, 'real-estate-app'))
+
+MAGIC = b'REASEG01'
+ALIGNMENT = 64
+MODEL_NAME = f'model/{artifacts.MODEL_FILENAME}'
+GRAPHS_NAME = 'similarity/graphs'
+
+# {(segment, root): live mappings} in this process; its pid file goes with the last one
+_attached = {}
+# Source stats that failed to load, not retried by --watch until the file changes
+_failed = {}
+_lock = threading.Lock()
+
+
+# --- Segment files ---
+
+def _aligned(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_segment(path, obj, meta=None):
+    """Write `obj` as a segment at `path` (atomically); returns its size in bytes."""
+    buffers = []
+    stream = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+    raws = [buffer.raw() for buffer in buffers]
+
+    # Offsets are relative to the end of the header, so they do not depend on its length
+    layout, offset = [], len(stream)
+    for raw in raws:
+        offset = _aligned(offset)
+        layout.append([offset, raw.nbytes])
+        offset += raw.nbytes
+    header = json.dumps({'meta': meta or {}, 'stream': len(stream), 'buffers': layout}).encode()
+    base = _aligned(len(MAGIC) + 8 + len(header))
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.tmp.{os.getpid()}'
+    with open(tmp, 'wb') as f:
+        f.write(MAGIC + struct.pack('<Q', len(header)) + header)
+        f.seek(base)
+        f.write(stream)
+        for (start, _), raw in zip(layout, raws):
+            f.seek(base + start)
+            f.write(raw)
+    os.replace(tmp, path)
+    return base + offset
+
+
+def read_segment(path, on_release=None):
+    """
+    (obj, meta) with every out-of-band buffer a read-only view of the mapped
+    file. `on_release` is called once nothing references the mapping anymore.
+    """
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if on_release is not None:
+        weakref.finalize(mapped, on_release)
+    view = memoryview(mapped)
+    if bytes(view[:len(MAGIC)]) != MAGIC:
+        raise ValueError(f"{path} is not an artifact segment")
+    (header_length,) = struct.unpack('<Q', view[len(MAGIC):len(MAGIC) + 8])
+    header = json.loads(bytes(view[len(MAGIC) + 8:len(MAGIC) + 8 + header_length]))
+    base = _aligned(len(MAGIC) + 8 + header_length)
+
+    buffers = [view[base + start:base + start + length] for start, length in header['buffers']]
+    obj = pickle.loads(view[base:base + header['stream']], buffers=buffers)
+    return obj, header['meta']
+
+
+# --- Manifest and refs ---
+
+def _manifest_path(name, root):
+    return os.path.join(root, 'manifest', f"{name.replace('/', '__')}.json")
+
+
+def _refs_dir(segment, root):
+    return os.path.join(root, 'refs', os.path.basename(segment))
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def live_refs(segment, root=SHM_DIR):
+    """Pids of live processes attached to `segment`."""
+    refs = _refs_dir(segment, root)
+    try:
+        pids = [int(entry) for entry in os.listdir(refs) if entry.isdigit()]
+    except FileNotFoundError:
+        return []
+    return [pid for pid in pids if _pid_alive(pid)]
+
+
+def _add_ref(segment, root):
+    key = (segment, root)
+    with _lock:
+        if not _attached:
+            atexit.register(_drop_refs)
+        if not _attached.get(key):
+            refs = _refs_dir(segment, root)
+            os.makedirs(refs, exist_ok=True)
+            open(os.path.join(refs, str(os.getpid())), 'w').close()
+        _attached[key] = _attached.get(key, 0) + 1
+
+
+def _release(segment, root):
+    key = (segment, root)
+    with _lock:
+        _attached[key] = _attached.get(key, 1) - 1
+        if _attached[key] > 0:
+            return
+        del _attached[key]
+    try:
+        os.remove(os.path.join(_refs_dir(segment, root), str(os.getpid())))
+    except FileNotFoundError:
+        pass
+
+
+def _drop_refs():
+    for segment, root in list(_attached):
+        try:
+            os.remove(os.path.join(_refs_dir(segment, root), str(os.getpid())))
+        except FileNotFoundError:
+            pass
+    _attached.clear()
+
+
+def read_manifest(name, root=SHM_DIR):
+    try:
+        with open(_manifest_path(name, root)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _source_stat(path):
+    stat = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+# --- Host side ---
+
+def publish(name, obj, version, source_path=None, root=SHM_DIR):
+    """
+    Publish `obj` as the current segment of `name`, unless this version is
+    already current. Returns the manifest entry.
+    """
+    current = read_manifest(name, root)
+    if current is not None and current['version'] == version and os.path.exists(current['segment']):
+        return current
+
+    segment = os.path.join(root, 'segments', f"{name.replace('/', '__')}-{version[:16]}-{time.time_ns()}.seg")
+    start = time.perf_counter()
+    size = write_segment(segment, obj, {'name': name, 'version': version})
+    entry = {
+        'name': name,
+        'version': version,
+        'segment': segment,
+        'bytes': size,
+        'source': _source_stat(source_path) if source_path else None,
+        'published_at': time.time(),
+    }
+    artifacts._write_atomic(_manifest_path(name, root), json.dumps(entry))
+    logger.info("published %s %s (%d bytes) in %.3fs", name, version[:12], size, time.perf_counter() - start)
+    return entry
+
+
+def collect(root=SHM_DIR):
+    """Unlink segments no manifest points at and no live process references; returns their paths."""
+    manifest_dir = os.path.join(root, 'manifest')
+    current = set()
+    if os.path.isdir(manifest_dir):
+        for entry in os.listdir(manifest_dir):
+            with open(os.path.join(manifest_dir, entry)) as f:
+                current.add(json.load(f)['segment'])
+
+    removed = []
+    segment_dir = os.path.join(root, 'segments')
+    for entry in sorted(os.listdir(segment_dir)) if os.path.isdir(segment_dir) else []:
+        segment = os.path.join(segment_dir, entry)
+        if segment in current or '.tmp.' in entry or live_refs(segment, root):
+            continue
+        os.remove(segment)
+        shutil.rmtree(_refs_dir(segment, root), ignore_errors=True)
+        removed.append(segment)
+
+    # Ref dirs left by attaches that raced a collect
+    refs_root = os.path.join(root, 'refs')
+    for entry in os.listdir(refs_root) if os.path.isdir(refs_root) else []:
+        if not os.path.exists(os.path.join(segment_dir, entry)):
+            shutil.rmtree(os.path.join(refs_root, entry), ignore_errors=True)
+    return removed
+
+
+def _publish_model(root):
+    from compiled_scorer import CompiledScorer, compile_pipeline
+
+    path, source = artifacts.resolve_model_path()
+    # Same version naming as artifacts.current_model: cached blobs are named by their sha256
+    version = os.path.basename(path) if source != 'env' else artifacts.file_sha256(path)
+    current = read_manifest(MODEL_NAME, root)
+    if current is not None and current['version'] == version:
+        return current
+    pipeline = artifacts._load_pickle(path)
+    try:
+        hosted = CompiledScorer(*compile_pipeline(pipeline))
+    except NotImplementedError as exc:
+        logger.warning("hosting %s uncompiled (%s); replicas will copy its trees", MODEL_NAME, exc)
+        hosted = pipeline
+    return publish(MODEL_NAME, hosted, version, root=root)
+
+
+def publish_all(data_dir=artifacts.DATA_DIR, graph_dir=None, root=SHM_DIR):
+    """
+    Publish every artifact the pages load whose source is present and changed
+    since its last publish, then the current model version. An artifact that
+    fails to load (e.g. a Git LFS pointer) is logged and skipped; replicas load
+    it themselves. Returns {name: manifest entry} of what was published.
+    """
+    from matrix_store import DISTANCE_MATRICES, SIMILARITY_MATRICES, MappedMatrix
+
+    import similarity_graph
+
+    def matrix(name):
+        obj = artifacts._load_pickle(os.path.join(data_dir, f'{name}.pkl'))
+        # The cosine matrices are bare ndarrays aligned with location_df's index
+        rows = None if name == 'location_df' else \
+            artifacts._load_pickle(os.path.join(data_dir, 'location_df.pkl')).index
+        return MappedMatrix.from_object(obj, rows=rows)
+
+    # (name, source file, loader)
+    candidates = [(filename, os.path.join(data_dir, filename),
+                   lambda path=os.path.join(data_dir, filename): artifacts._load_pickle(path))
+                  for filename in ('df.pkl', 'feature_text.pkl')]
+    # Matrices exported to .npy are already shared through the page cache
+    candidates += [(f'matrix/{name}', os.path.join(data_dir, f'{name}.pkl'), lambda name=name: matrix(name))
+                   for name in DISTANCE_MATRICES + SIMILARITY_MATRICES
+                   if not os.path.exists(os.path.join(data_dir, f'{name}.npy'))]
+    graph_dir = graph_dir or similarity_graph.GRAPH_DIR
+    candidates.append((GRAPHS_NAME, os.path.join(graph_dir, 'names.json'),
+                       lambda: similarity_graph.load_graphs(graph_dir, hosted=False)))
+
+    published = {}
+    for name, path, build in candidates:
+        if not os.path.exists(path):
+            continue
+        source = _source_stat(path)
+        current = read_manifest(name, root)
+        if current is not None and current['source'] == source and os.path.exists(current['segment']):
+            continue
+        if _failed.get(name) == source:
+            continue
+        try:
+            published[name] = publish(name, build(), artifacts.file_sha256(path), path, root)
+        except Exception as exc:
+            _failed[name] = source
+            logger.warning("%s not hosted: %s", name, exc)
+
+    try:
+        current = read_manifest(MODEL_NAME, root)
+        entry = _publish_model(root)
+        if current is None or entry['segment'] != current['segment']:
+            published[MODEL_NAME] = entry
+    except Exception as exc:
+        logger.warning("%s not hosted: %s", MODEL_NAME, exc)
+    return published
+
+
+# --- Replica side ---
+
+def attach(name, version=None, source_path=None, root=SHM_DIR):
+    """
+    The hosted object for `name`, or None when the host has not published it,
+    it is a different `version`, or `source_path` changed since publishing
+    (the host has not caught up yet, so the caller loads from disk).
+    """
+    for _ in range(3):
+        entry = read_manifest(name, root)
+        if entry is None or (version is not None and entry['version'] != version):
+            return None
+        if source_path is not None and entry['source'] != _source_stat(source_path):
+            return None
+        # The ref is registered before opening, so collect() cannot unlink the segment after we open it
+        segment = entry['segment']
+        _add_ref(segment, root)
+        try:
+            obj, _ = read_segment(segment, on_release=lambda: _release(segment, root))
+            return obj
+        except FileNotFoundError:
+            _release(segment, root)
+            continue  # collected between reading the manifest and opening it; re-read
+    return None
+
+
+def status(root=SHM_DIR):
+    """One row per segment: name, version, bytes, current or not, attached pids."""
+    manifest_dir = os.path.join(root, 'manifest')
+    current = {}
+    for entry in os.listdir(manifest_dir) if os.path.isdir(manifest_dir) else []:
+        with open(os.path.join(manifest_dir, entry)) as f:
+            info = json.load(f)
+        current[info['segment']] = info
+
+    rows = []
+    segment_dir = os.path.join(root, 'segments')
+    for entry in sorted(os.listdir(segment_dir)) if os.path.isdir(segment_dir) else []:
+        segment = os.path.join(segment_dir, entry)
+        info = current.get(segment)
+        rows.append({'segment': entry, 'current': info is not None,
+                     'bytes': os.path.getsize(segment), 'refs': live_refs(segment, root)})
+    return rows
+
+
+def memory_usage(pid='self'):
+    """Rss/Pss and private vs shared kB of a process (Linux /proc/<pid>/smaps_rollup), or None."""
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            fields = dict(line.split(':', 1) for line in f if ':' in line and not line.startswith(' '))
+    except OSError:
+        return None
+
+    def kb(*names):
+        return sum(int(fields[name].split()[0]) for name in names if name in fields)
+
+    return {'rss_kb': kb('Rss'), 'pss_kb': kb('Pss'),
+            'private_kb': kb('Private_Clean', 'Private_Dirty'), 'shared_kb': kb('Shared_Clean', 'Shared_Dirty')}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Host the app's artifacts in shared memory for every replica.")
+    parser.add_argument('--watch', type=float, metavar='SECONDS',
+                        help="Keep running, republishing changed artifacts every SECONDS")
+    parser.add_argument('--status', action='store_true', help="Show hosted segments and their references")
+    parser.add_argument('--data-dir', default=artifacts.DATA_DIR)
+    parser.add_argument('--graph-dir', help="Similarity graphs (default: similarity_graph.GRAPH_DIR)")
+    parser.add_argument('--root', default=SHM_DIR, help="Segment directory, ideally on tmpfs")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+
+    if args.status:
+        for row in status(args.root):
+            print(f"{'*' if row['current'] else ' '} {row['segment']}  {row['bytes'] / 1e6:8.1f} MB  "
+                  f"refs={row['refs']}")
+        return
+
+    while True:
+        published = publish_all(args.data_dir, args.graph_dir, args.root)
+        for name, entry in published.items():
+            print(f"{name}: {entry['version'][:12]} {entry['bytes'] / 1e6:.1f} MB -> {entry['segment']}")
+        for segment in collect(args.root):
+            print(f"collected {segment}")
+        if not args.watch:
+            return
+        time.sleep(args.watch)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,323 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# --- Locations ---
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(APP_DIR, 'datasets')
+
+MODEL_FILENAME = 'pipeline.pkl'
+# Hub repo used only when the model is not in the local cache; set to "" to stay offline
+MODEL_REPO_ID = os.environ.get('REAL_ESTATE_MODEL_REPO', 'sagar4860/house-prediction')
+MODEL_CACHE_DIR = os.environ.get(
+    'REAL_ESTATE_MODEL_CACHE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'real-estate-app'))
+# How often a loaded model re-reads its ref to pick up a newly published version (<= 0 disables)
+MODEL_REFRESH_SECONDS = float(os.environ.get('REAL_ESTATE_MODEL_REFRESH', '5'))
+
+# Process-wide artifact store shared by every Streamlit session and rerun
+_cache = {}
+_metrics = {}
+# Both keyed like _cache, ('model', filename, shared): each variant is checked and swapped on its own
+_model_versions = {}
+_model_checked = {}
+_lock = threading.Lock()
+_swap_lock = threading.Lock()
+
+
+def _record(name, seconds, path, source):
+    size = os.path.getsize(path) if path and os.path.exists(path) else None
+    _metrics[name] = {'seconds': round(seconds, 4), 'bytes': size, 'source': source}
+    logger.info("loaded %s from %s in %.3fs (%s bytes)", name, source, seconds, size)
+
+
+def load_metrics():
+    """Load time, size and source of every artifact loaded in this process."""
+    return {name: dict(info) for name, info in _metrics.items()}
+
+
+def _load_pickle(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def _attach_hosted(name, version=None, source_path=None):
+    # The machine's shared copy from artifact_host.py when it hosts this exact
+    # version/source; None (load privately) when it does not or attaching fails
+    try:
+        import artifact_host
+        return artifact_host.attach(name, version, source_path)
+    except Exception:
+        logger.exception("could not attach hosted %s, loading it privately", name)
+        return None
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load(name, data_dir=DATA_DIR):
+    """
+    Unpickle `data_dir/name` once per process and return the shared object.
+    Attaches the artifact host's read-only copy instead when it hosts this file.
+    """
+    key = os.path.join(data_dir, name)
+    if key in _cache:
+        return _cache[key]
+    with _lock:
+        if key not in _cache:
+            start = time.perf_counter()
+            obj = _attach_hosted(name, source_path=key)
+            source = 'shared' if obj is not None else 'disk'
+            _cache[key] = obj if obj is not None else _load_pickle(key)
+            _record(name, time.perf_counter() - start, key, source)
+    return _cache[key]
+
+
+def load_matrix(name, data_dir=DATA_DIR):
+    """
+    Similarity/distance matrix `name` as a MappedMatrix. Uses the memory-mapped
+    <name>.npy export when present (shared page cache, zero-copy slicing) and
+    falls back to unpickling <name>.pkl into private memory.
+    """
+    from matrix_store import MappedMatrix, open_matrix
+
+    key = ('matrix', os.path.join(data_dir, name))
+    if key in _cache:
+        return _cache[key]
+    with _lock:
+        if key not in _cache:
+            start = time.perf_counter()
+            matrix = open_matrix(data_dir, name)
+            if matrix is not None:
+                source, path = 'mmap', os.path.join(data_dir, f'{name}.npy')
+            else:
+                path = os.path.join(data_dir, f'{name}.pkl')
+                matrix = _attach_hosted(f'matrix/{name}', source_path=path)
+                source = 'shared'
+                if matrix is None:
+                    source, matrix = 'disk', MappedMatrix.from_object(_load_pickle(path))
+            _cache[key] = matrix
+            _record(name, time.perf_counter() - start, path, source)
+    return _cache[key]
+
+
+# --- Content-addressed model cache ---
+# blobs/<sha256> holds the bytes, refs/<filename> holds the sha of the current version
+
+def _ref_path(filename):
+    return os.path.join(MODEL_CACHE_DIR, 'refs', filename)
+
+
+def _blob_path(sha):
+    return os.path.join(MODEL_CACHE_DIR, 'blobs', sha)
+
+
+def _store_blob(path):
+    sha = file_sha256(path)
+    blob = _blob_path(sha)
+    if not os.path.exists(blob):
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        tmp = f"{blob}.tmp.{os.getpid()}"
+        shutil.copyfile(path, tmp)
+        os.replace(tmp, blob)
+    return sha, blob
+
+
+def _write_atomic(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, 'w') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def cache_model_file(path, filename=MODEL_FILENAME):
+    """Copy a model file into the content-addressed cache and point the ref at it."""
+    sha, blob = _store_blob(path)
+    _write_atomic(_ref_path(filename), sha)
+    return blob
+
+
+def publish_model(path, metrics=None, filename=MODEL_FILENAME):
+    """
+    Store `path` as a new model version with its metrics, then flip the ref.
+    The ref is replaced last and atomically, so running apps either see the
+    old version or the complete new one; they swap on their next refresh.
+    Returns the new version (sha256).
+    """
+    sha, _ = _store_blob(path)
+    info = {
+        'version': sha,
+        'filename': filename,
+        'parent': _current_ref(filename),
+        'published_at': time.time(),
+        'metrics': metrics or {},
+    }
+    _write_atomic(f"{_blob_path(sha)}.json", json.dumps(info, indent=2))
+    history = f"{_ref_path(filename)}.history.jsonl"
+    os.makedirs(os.path.dirname(history), exist_ok=True)
+    with open(history, 'a') as f:
+        f.write(json.dumps(info) + '\n')
+    _write_atomic(_ref_path(filename), sha)
+    return sha
+
+
+def activate_model_version(sha, filename=MODEL_FILENAME):
+    """Point the ref back at an already cached version (rollback)."""
+    if not os.path.exists(_blob_path(sha)):
+        raise FileNotFoundError(f"model version {sha} is not in {MODEL_CACHE_DIR}")
+    _write_atomic(_ref_path(filename), sha)
+
+
+def model_info(sha):
+    """Metadata written by publish_model for version `sha`, or None."""
+    try:
+        with open(f"{_blob_path(sha)}.json") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _current_ref(filename):
+    try:
+        with open(_ref_path(filename)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _cached_model_path(filename):
+    sha = _current_ref(filename)
+    if sha is None:
+        return None
+    blob = _blob_path(sha)
+    return blob if os.path.exists(blob) else None
+
+
+def _hub_offline():
+    return not MODEL_REPO_ID or os.environ.get('HF_HUB_OFFLINE', '0') not in ('', '0')
+
+
+def resolve_model_path(filename=MODEL_FILENAME, allow_hub=True):
+    """
+    Local path to the model file. Order: REAL_ESTATE_MODEL_PATH, the local
+    cache, a copy bundled next to the app, then the hub (when configured).
+    Returns (path, source).
+    """
+    override = os.environ.get('REAL_ESTATE_MODEL_PATH')
+    if override:
+        return override, 'env'
+
+    cached = _cached_model_path(filename)
+    if cached:
+        return cached, 'cache'
+
+    for candidate in (os.path.join(DATA_DIR, filename), os.path.join(APP_DIR, filename)):
+        if os.path.exists(candidate):
+            return cache_model_file(candidate, filename), 'bundled'
+
+    if not allow_hub or _hub_offline():
+        raise FileNotFoundError(
+            f"{filename} is not in the local cache ({MODEL_CACHE_DIR}) and hub download is disabled")
+
+    from huggingface_hub import hf_hub_download
+
+    downloaded = hf_hub_download(repo_id=MODEL_REPO_ID, filename=filename)
+    return cache_model_file(downloaded, filename), 'hub'
+
+
+def _refresh_due(key):
+    if MODEL_REFRESH_SECONDS <= 0 or os.environ.get('REAL_ESTATE_MODEL_PATH'):
+        return False
+    return time.monotonic() - _model_checked.get(key, 0.0) >= MODEL_REFRESH_SECONDS
+
+
+def _load_model_file(path, version, filename, shared):
+    # With `shared`, the host's compiled scorer for this version when it has one
+    if shared:
+        model = _attach_hosted(f'model/{filename}', version)
+        if model is not None:
+            return model, 'shared'
+    return _load_pickle(path), None
+
+
+def _swap_if_published(filename, key, entry, shared=False):
+    # One thread checks the ref and loads the new version; everyone else keeps
+    # serving the current model meanwhile, so a swap never blocks a request
+    if not _swap_lock.acquire(blocking=False):
+        return entry
+    try:
+        _model_checked[key] = time.monotonic()
+        path = _cached_model_path(filename)
+        if path is None or os.path.basename(path) == entry[1]:
+            return entry
+        start = time.perf_counter()
+        pipeline, source = _load_model_file(path, os.path.basename(path), filename, shared)
+        with _lock:
+            _cache[key] = (pipeline, os.path.basename(path))
+            _model_versions[key] = os.path.basename(path)
+            _record(filename, time.perf_counter() - start, path, source or 'swap')
+        logger.info("swapped %s from %s to %s", filename, entry[1], os.path.basename(path))
+        return _cache[key]
+    finally:
+        _swap_lock.release()
+
+
+def current_model(filename=MODEL_FILENAME, allow_hub=True, shared=False):
+    """
+    (pipeline, version) from one consistent snapshot. Resolved and unpickled
+    once per process; afterwards the ref is re-read at most every
+    MODEL_REFRESH_SECONDS and a newly published version is swapped in.
+
+    With `shared`, serving code gets the artifact host's compiled scorer for
+    the same version when there is one: it predicts like the pipeline from
+    arrays in shared memory, but is not an sklearn object, so tools that refit
+    or clone the model (retrain, calibration) leave `shared` off.
+    """
+    key = ('model', filename, shared)
+    entry = _cache.get(key)
+    if entry is None:
+        with _lock:
+            if key not in _cache:
+                start = time.perf_counter()
+                path, source = resolve_model_path(filename, allow_hub)
+                # Cached blobs are named by their sha256 already
+                version = os.path.basename(path) if source != 'env' else file_sha256(path)
+                pipeline, hosted = _load_model_file(path, version, filename, shared)
+                _cache[key] = (pipeline, version)
+                _model_versions[key] = version
+                _model_checked[key] = time.monotonic()
+                _record(filename, time.perf_counter() - start, path, hosted or source)
+            return _cache[key]
+    if _refresh_due(key):
+        return _swap_if_published(filename, key, entry, shared)
+    return entry
+
+
+def load_model(filename=MODEL_FILENAME, allow_hub=True):
+    """The trained pipeline (see current_model for version swaps)."""
+    return current_model(filename, allow_hub)[0]
+
+
+def model_version(filename=MODEL_FILENAME, shared=False):
+    """sha256 of the loaded model file, or None if it has not been loaded yet."""
+    return _model_versions.get(('model', filename, shared))
+
+
+if __name__ == '__main__':
+    # Seed the model cache on an air-gapped node: python artifacts.py /path/to/pipeline.pkl
+    import sys
+
+    print(cache_model_file(sys.argv[1]))
@@ -0,0 +1,197 @@
+import argparse
+import os
+import pickle
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# --- Model Input Schema ---
+# Same 12 columns (and order) the Price Predictor page feeds into the pipeline
+FEATURE_COLUMNS = ['property_type', 'sector', 'bedRoom', 'bathroom', 'balcony',
+                   'agePossession', 'built_up_area', 'servant room', 'store room',
+                   'furnishing_type', 'luxury_category', 'floor_category']
+
+FEATURE_DTYPES = {
+    'property_type': str,
+    'sector': str,
+    'bedRoom': float,
+    'bathroom': float,
+    'balcony': str,
+    'agePossession': str,
+    'built_up_area': float,
+    'servant room': float,
+    'store room': float,
+    'furnishing_type': str,
+    'luxury_category': str,
+    'floor_category': str,
+}
+
+# model-selection.ipynb maps the training CSV's furnishing codes to these labels
+# before fitting, so the pipeline (and df.pkl, the page's form options) use the labels
+FURNISHING_TYPES = {0.0: 'unfurnished', 1.0: 'semifurnished', 2.0: 'furnished'}
+
+PRICE_COLUMN = 'predicted_price'
+LOW_COLUMN = 'predicted_price_low'
+HIGH_COLUMN = 'predicted_price_high'
+DEFAULT_CHUNKSIZE = 50_000
+
+
+def load_pipeline(path):
+    # A compiled .npz scorer (see compiled_scorer.py) stands in for the sklearn pipeline
+    if path.endswith('.npz'):
+        from compiled_scorer import CompiledScorer
+        return CompiledScorer.load(path)
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def _is_parquet(path):
+    return os.path.splitext(path)[1].lower() in ('.parquet', '.pq')
+
+
+def read_chunks(path, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield DataFrames of at most `chunksize` rows from a CSV or Parquet file."""
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize, dtype=FEATURE_DTYPES)
+
+
+def furnishing_labels(values):
+    """furnishing_type as the pipeline's labels; numeric codes (training CSV layout) are mapped."""
+    codes = pd.to_numeric(values, errors='coerce')
+    return values.where(codes.isna(), codes.map(FURNISHING_TYPES))
+
+
+def prepare_features(chunk):
+    missing = [col for col in FEATURE_COLUMNS if col not in chunk.columns]
+    if missing:
+        raise KeyError(f"Input is missing required columns: {missing}")
+    features = chunk[FEATURE_COLUMNS]
+    features = features.assign(furnishing_type=furnishing_labels(features['furnishing_type']))
+    return features.astype(FEATURE_DTYPES)
+
+
+def predict_chunk(pipeline, chunk):
+    """Vectorized price prediction (in Cr) for every row of `chunk`."""
+    return np.expm1(pipeline.predict(prepare_features(chunk)))
+
+
+def iter_predictions(pipeline, chunks, cache=None, model_version=None, intervals=False):
+    """
+    Score an iterable of DataFrames lazily, yielding each chunk with a price
+    column added. With a PredictionCache, repeated feature tuples skip the model.
+    With `intervals`, low/high columns come from the pipeline's calibrated
+    intervals, looked up from the predicted prices without another model pass.
+    """
+    import price_intervals
+
+    for chunk in chunks:
+        chunk = chunk.copy()
+        if cache is None:
+            chunk[PRICE_COLUMN] = predict_chunk(pipeline, chunk)
+        else:
+            chunk[PRICE_COLUMN] = cache.predict(pipeline, chunk, model_version)
+        if intervals:
+            chunk[LOW_COLUMN], chunk[HIGH_COLUMN] = price_intervals.bounds(
+                pipeline, chunk[PRICE_COLUMN].to_numpy(), chunk['property_type'].to_numpy())
+        yield chunk
+
+
+class _ChunkWriter:
+    # Appends scored chunks to CSV or Parquet without holding earlier chunks in memory
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = _is_parquet(path)
+        self._writer = None
+        self._header_written = False
+
+    def write(self, chunk):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            chunk.to_csv(self.path, mode='a' if self._header_written else 'w',
+                         header=not self._header_written, index=False)
+            self._header_written = True
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def score_file(pipeline, input_path, output_path, chunksize=DEFAULT_CHUNKSIZE, progress=None, cache=None,
+               intervals=False):
+    """
+    Stream `input_path` through the pipeline chunk by chunk and write the
+    scored rows to `output_path`. Returns a summary with rows/sec.
+    """
+    writer = _ChunkWriter(output_path)
+    total_rows = 0
+    start = time.perf_counter()
+    try:
+        for chunk in iter_predictions(pipeline, read_chunks(input_path, chunksize), cache, intervals=intervals):
+            writer.write(chunk)
+            total_rows += len(chunk)
+            if progress is not None:
+                elapsed = time.perf_counter() - start
+                progress(total_rows, elapsed)
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        'rows': total_rows,
+        'seconds': round(elapsed, 3),
+        'rows_per_sec': round(total_rows / elapsed, 1) if elapsed > 0 else float('inf'),
+    }
+
+
+def _print_progress(rows, elapsed):
+    rate = rows / elapsed if elapsed > 0 else float('inf')
+    print(f"scored {rows:,} rows in {elapsed:.1f}s ({rate:,.0f} rows/sec)", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch price scoring for CSV/Parquet listings.")
+    parser.add_argument('input', help="CSV or Parquet file with the 12 model input columns")
+    parser.add_argument('output', help="CSV or Parquet file to write scored rows to")
+    parser.add_argument('--pipeline', default='pipeline.pkl', help="Path to the trained pipeline pickle or a compiled .npz scorer")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument('--quiet', action='store_true', help="Only print the final summary")
+    parser.add_argument('--cache-size', type=int, default=0,
+                        help="Cache predictions for up to N distinct feature tuples (0 disables)")
+    parser.add_argument('--area-bucket', type=float, help="Round built_up_area to this many sqft before caching")
+    parser.add_argument('--intervals', action='store_true',
+                        help=f"Add {LOW_COLUMN}/{HIGH_COLUMN} from the model's calibrated intervals")
+    args = parser.parse_args(argv)
+
+    cache = None
+    if args.cache_size:
+        from prediction_cache import PredictionCache
+        cache = PredictionCache(maxsize=args.cache_size, ttl=None, area_bucket=args.area_bucket)
+
+    pipeline = load_pipeline(args.pipeline)
+    summary = score_file(pipeline, args.input, args.output, chunksize=args.chunksize,
+                         progress=None if args.quiet else _print_progress, cache=cache, intervals=args.intervals)
+    print(f"Done: {summary['rows']:,} rows in {summary['seconds']}s "
+          f"({summary['rows_per_sec']:,} rows/sec) -> {args.output}")
+    if cache is not None:
+        print(f"Cache: {cache.stats()}")
+    return summary
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,337 @@
+import argparse
+import json
+import logging
+import os
+import pickle
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import artifacts
+from batch_predict import FEATURE_COLUMNS, predict_chunk
+from geo_index import GeoIndex
+from recommender import Recommender
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+# Dense N x N similarity/distance benchmarks are capped at this many societies
+MAX_MATRIX_SIZE = 4_000
+DEFAULT_TOLERANCE = 0.20
+
+logger = logging.getLogger(__name__)
+
+
+# --- Timing ---
+
+def measure(fn, repeat=5, number=1):
+    """Run `fn` `number` times per sample, `repeat` samples; seconds per call."""
+    fn()  # warm-up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    samples = np.array(samples)
+    return {
+        'min': float(samples.min()),
+        'median': float(np.median(samples)),
+        'p95': float(np.percentile(samples, 95)),
+        'repeat': repeat,
+        'number': number,
+    }
+
+
+# --- Synthetic data ---
+
+def categorize_luxury(score):
+    return pd.cut(score, bins=[0, 50, 150, 175], labels=['Low', 'Medium', 'High'], right=False).astype(str)
+
+
+def categorize_floor(floor):
+    return pd.cut(floor, bins=[-1, 2, 10, 51], labels=['Low Floor', 'Mid Floor', 'High Floor']).astype(str)
+
+
+def load_seed_data(data_dir=artifacts.DATA_DIR):
+    """data_viz1.csv with the two derived model columns added."""
+    df = pd.read_csv(os.path.join(data_dir, 'data_viz1.csv'))
+    df['luxury_category'] = categorize_luxury(df['luxury_score'])
+    df['floor_category'] = categorize_floor(df['floorNum'])
+    df['balcony'] = df['balcony'].astype(str)
+    return df.dropna(subset=['price', 'built_up_area'])
+
+
+def synthetic_listings(seed_df, n, seed=0):
+    """`n` listings resampled from the bundled data with jittered area and price."""
+    rng = np.random.default_rng(seed)
+    df = seed_df.iloc[rng.integers(0, len(seed_df), n)].reset_index(drop=True)
+    jitter = rng.normal(1.0, 0.05, n)
+    df['built_up_area'] = (df['built_up_area'] * jitter).round()
+    df['price'] = df['price'] * jitter
+    df['price_per_sqft'] = (df['price'] * 1e7 / df['built_up_area']).round()
+    df['society'] = df['society'] + ' ' + (np.arange(n) % max(1, n // 10)).astype(str)
+    return df
+
+
+def synthetic_similarity(n, seed=0):
+    rng = np.random.default_rng(seed)
+    views = []
+    for _ in range(3):
+        features = rng.random((n, 16), dtype=np.float32)
+        features /= np.linalg.norm(features, axis=1, keepdims=True)
+        views.append(features @ features.T)
+    return views
+
+
+def benchmark_pipeline(seed_df):
+    """
+    The serving pipeline if it resolves offline, otherwise a small forest
+    fitted on the seed data; the source names which (and why) for the report.
+    """
+    try:
+        return artifacts.load_model(allow_hub=False), 'artifact'
+    except Exception as e:
+        reason = f"{type(e).__name__}: {e}"
+        logger.warning("serving pipeline unavailable (%s); fitting a forest on the seed data", reason)
+
+    from sklearn.compose import ColumnTransformer
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder, StandardScaler
+
+    columns_to_encode = ['property_type', 'sector', 'balcony', 'agePossession', 'furnishing_type',
+                         'luxury_category', 'floor_category']
+    preprocessor = ColumnTransformer(
+        transformers=[
+            ('num', StandardScaler(), ['bedRoom', 'bathroom', 'built_up_area', 'servant room', 'store room']),
+            ('cat', OrdinalEncoder(handle_unknown='use_encoded_value', unknown_value=-1), columns_to_encode),
+            ('cat1', OneHotEncoder(drop='first', sparse_output=False, handle_unknown='ignore'),
+             ['sector', 'agePossession'])
+        ],
+        remainder='passthrough'
+    )
+    pipeline = Pipeline([
+        ('preprocessor', preprocessor),
+        ('regressor', RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1))
+    ])
+    pipeline.fit(seed_df[FEATURE_COLUMNS], np.log1p(seed_df['price']))
+    return pipeline, f'fitted-on-seed-data ({reason})'
+
+
+# --- Legacy implementations (what the pages did before) for side-by-side numbers ---
+
+def legacy_recommend(names, sim1, sim2, sim3, property_name, top_n=5):
+    cosine_sim_matrix = 0.5 * sim1 + 0.8 * sim2 + 1.0 * sim3
+    sim_scores = list(enumerate(cosine_sim_matrix[names.get_loc(property_name)]))
+    sorted_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)
+    return [names[i[0]] for i in sorted_scores[1:top_n + 1]]
+
+
+def legacy_radius(location_df, column, radius_km):
+    return location_df[location_df[column] < radius_km * 1000][column].sort_values()
+
+
+# --- Benchmarks ---
+
+def bench_predict(pipeline, listings, results, size):
+    one_row = listings[FEATURE_COLUMNS].iloc[:1]
+    results[f'predict_single@{size}'] = measure(lambda: predict_chunk(pipeline, one_row), repeat=20)
+
+    timing = measure(lambda: predict_chunk(pipeline, listings), repeat=3)
+    timing['rows_per_sec'] = size / timing['median']
+    results[f'predict_batch@{size}'] = timing
+
+
+def bench_recommender(n, results):
+    names = pd.Index([f'society {i}' for i in range(n)])
+    sim1, sim2, sim3 = synthetic_similarity(n)
+    target = names[n // 2]
+
+    results[f'recommend_legacy@{n}'] = measure(lambda: legacy_recommend(names, sim1, sim2, sim3, target), repeat=3)
+    results[f'recommender_build@{n}'] = measure(lambda: Recommender(names, [sim1, sim2, sim3]), repeat=1)
+    recommender = Recommender(names, [sim1, sim2, sim3])
+    results[f'recommend_lookup@{n}'] = measure(lambda: recommender.recommend(target), repeat=5, number=100)
+    results[f'recommend_custom_weights@{n}'] = measure(
+        lambda: recommender.recommend(target, weights=(1.0, 1.0, 1.0)), repeat=5, number=10)
+
+
+def bench_radius(listings, results, size):
+    geo = GeoIndex.from_data_viz(listings)
+    places = geo.places.iloc[:MAX_MATRIX_SIZE]
+    landmarks = places.sample(min(50, len(places)), random_state=0)
+
+    # Dense society x landmark distance matrix in metres, as location_df stores it
+    lat1, lon1 = np.radians(places['latitude'].to_numpy())[:, None], np.radians(places['longitude'].to_numpy())[:, None]
+    lat2, lon2 = np.radians(landmarks['latitude'].to_numpy())[None], np.radians(landmarks['longitude'].to_numpy())[None]
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    location_df = pd.DataFrame(2 * 6371000 * np.arcsin(np.sqrt(a)),
+                               index=places['society'], columns=landmarks['society'].tolist())
+    column = location_df.columns[0]
+    origin = (landmarks['latitude'].iloc[0], landmarks['longitude'].iloc[0])
+
+    results[f'radius_legacy@{size}'] = measure(lambda: legacy_radius(location_df, column, 5), repeat=5, number=20)
+    results[f'radius_geo_index@{size}'] = measure(lambda: geo.radius(*origin, 5), repeat=5, number=100)
+    results[f'nearest_geo_index@{size}'] = measure(lambda: geo.nearest(*origin, 10), repeat=5, number=100)
+    origins = list(zip(landmarks['latitude'], landmarks['longitude']))
+    results[f'radius_many_geo_index@{size}'] = measure(lambda: geo.radius_many(origins, 5), repeat=5)
+
+
+def bench_artifact_load(listings, results, size):
+    n = min(size, MAX_MATRIX_SIZE)
+    matrix = synthetic_similarity(n)[0]
+    with tempfile.TemporaryDirectory() as tmp:
+        frame_path = os.path.join(tmp, 'df.pkl')
+        matrix_path = os.path.join(tmp, 'cosine_sim1.pkl')
+        with open(frame_path, 'wb') as f:
+            pickle.dump(listings[FEATURE_COLUMNS], f)
+        with open(matrix_path, 'wb') as f:
+            pickle.dump(matrix, f)
+
+        def unpickle(path):
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+
+        results[f'unpickle_df@{size}'] = measure(lambda: unpickle(frame_path), repeat=3)
+        # Keyed by listing count like the rest; the matrix itself is capped at MAX_MATRIX_SIZE
+        results[f'unpickle_matrix@{size}'] = {**measure(lambda: unpickle(matrix_path), repeat=3), 'matrix_size': n}
+
+        from matrix_store import MappedMatrix, export_matrix, open_matrix
+        export_matrix(MappedMatrix(matrix, range(n)), tmp, 'cosine_sim1')
+        results[f'mmap_matrix@{size}'] = {**measure(lambda: open_matrix(tmp, 'cosine_sim1'), repeat=3),
+                                          'matrix_size': n}
+
+
+def bench_analytics(listings, feature_text, results, size, skipped):
+    numeric_cols = ['price', 'price_per_sqft', 'built_up_area', 'latitude', 'longitude']
+    results[f'groupby_sector@{size}'] = measure(
+        lambda: listings.groupby('sector')[numeric_cols].mean(), repeat=3)
+    results[f'groupby_treemap@{size}'] = measure(
+        lambda: listings.groupby(['sector', 'society'], as_index=False).agg(
+            {'built_up_area': 'mean', 'price': 'mean'}), repeat=3)
+    results[f'corr@{size}'] = measure(lambda: listings.select_dtypes(include=['number']).corr(), repeat=3)
+
+    if feature_text is not None and 'wordcloud' not in results:
+        try:
+            from wordcloud import WordCloud
+        except ImportError:
+            skipped['wordcloud'] = "wordcloud is not installed"
+            return
+        results['wordcloud'] = measure(
+            lambda: WordCloud(width=800, height=400, background_color='black',
+                              colormap='Set2').generate(feature_text), repeat=1)
+
+
+def run(sizes, data_dir=artifacts.DATA_DIR, log=print):
+    """
+    Every benchmark at every size. A benchmark that raises is logged and
+    recorded under 'failures' (the others still run); one that cannot run
+    here (e.g. wordcloud not installed) is listed under meta 'skipped'.
+    """
+    seed_df = load_seed_data(data_dir)
+    pipeline, pipeline_source = benchmark_pipeline(seed_df)
+    skipped = {}
+    try:
+        feature_text = artifacts.load('feature_text.pkl', data_dir)
+    except Exception as e:
+        feature_text = None
+        skipped['wordcloud'] = f"feature_text.pkl could not be loaded ({type(e).__name__}: {e})"
+
+    results = {}
+    failures = {}
+
+    def guarded(name, bench, *args):
+        try:
+            bench(*args)
+        except Exception as e:
+            logger.exception("benchmark %s failed", name)
+            failures[name] = f"{type(e).__name__}: {e}"
+
+    for size in sizes:
+        log(f"benchmarking {size:,} listings")
+        listings = synthetic_listings(seed_df, size)
+        guarded(f'predict@{size}', bench_predict, pipeline, listings, results, size)
+        guarded(f'radius@{size}', bench_radius, listings, results, size)
+        guarded(f'artifact_load@{size}', bench_artifact_load, listings, results, size)
+        guarded(f'analytics@{size}', bench_analytics, listings, feature_text, results, size, skipped)
+        if size <= MAX_MATRIX_SIZE:
+            guarded(f'recommender@{size}', bench_recommender, size, results)
+    if max(sizes) > MAX_MATRIX_SIZE and MAX_MATRIX_SIZE not in sizes:
+        guarded(f'recommender@{MAX_MATRIX_SIZE}', bench_recommender, MAX_MATRIX_SIZE, results)
+
+    import sklearn
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'sklearn': sklearn.__version__,
+            'sizes': sizes,
+            'pipeline': pipeline_source,
+            'skipped': skipped,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+        'failures': failures,
+    }
+
+
+def compare(current, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Per benchmark median ratio current/baseline; ratios above 1 + tolerance are regressions."""
+    rows = []
+    for name, timing in sorted(current['results'].items()):
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        ratio = timing['median'] / base['median'] if base['median'] > 0 else float('inf')
+        rows.append({'name': name, 'baseline': base['median'], 'current': timing['median'],
+                     'ratio': ratio, 'regression': ratio > 1 + tolerance})
+    return rows
+
+
+def print_comparison(rows):
+    print(f"{'benchmark':<36} {'baseline':>12} {'current':>12} {'ratio':>7}")
+    for row in rows:
+        flag = '  REGRESSION' if row['regression'] else ''
+        print(f"{row['name']:<36} {row['baseline'] * 1000:>10.3f}ms {row['current'] * 1000:>10.3f}ms "
+              f"{row['ratio']:>7.2f}{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the app's serving hot paths on synthetic listings.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', help="Earlier results JSON to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="Also write the results to --baseline")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+    if args.baseline and not args.save_baseline and not os.path.exists(args.baseline):
+        parser.error(f"baseline {args.baseline} does not exist (use --save-baseline to create it)")
+
+    current = run(args.sizes, log=lambda msg: print(msg, file=sys.stderr))
+    with open(args.output, 'w') as f:
+        json.dump(current, f, indent=2)
+    print(f"wrote {args.output}")
+    for name, error in current['failures'].items():
+        print(f"FAILED {name}: {error}", file=sys.stderr)
+
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(current, f, indent=2)
+        print(f"saved baseline {args.baseline}")
+    elif args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows = compare(current, baseline, args.tolerance)
+        print_comparison(rows)
+        if any(row['regression'] for row in rows):
+            return 1
+    return 1 if current['failures'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
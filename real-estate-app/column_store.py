@@ -0,0 +1,194 @@
+"""
+Typed Parquet copies of the app's CSV datasets.
+
+`python column_store.py` converts data_viz1.csv (or any CSV given) to a
+Parquet file next to it: repeated strings become dictionary-encoded
+categoricals and integer ids are downcast; float columns stay float64, as
+their values show in hover labels and describe() tables. `load`
+reads only the requested columns and, through Parquet row-group
+statistics, only the row groups a filter can match; rows come back in the
+CSV's order. It falls back to the CSV when the Parquet copy is missing,
+stale or pyarrow is not installed, so the converter is an optimisation and
+never a deploy step the app depends on. The Parquet file is generated, not
+versioned: run the converter after deploying a new CSV.
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from artifacts import DATA_DIR, file_sha256
+
+VIZ_DATA_PATH = os.path.join(DATA_DIR, 'data_viz1.csv')
+
+# String columns with at most this share of distinct values are stored as categoricals
+CATEGORY_RATIO = 0.5
+# Rows are sorted by these before writing so per-row-group min/max statistics let filters skip groups
+SORT_COLUMNS = ['sector', 'property_type']
+ROW_GROUP_SIZE = 512
+# Parquet schema metadata keys describing the CSV the file was converted from
+SOURCE_KEY = b'source_sha256'
+SOURCE_STAT_KEY = b'source_stat'
+# Each row's position in the CSV, so load can undo the SORT_COLUMNS order
+ROW_COLUMN = '__row__'
+
+_OPERATORS = {
+    '==': lambda s, v: s == v,
+    '!=': lambda s, v: s != v,
+    '<': lambda s, v: s < v,
+    '<=': lambda s, v: s <= v,
+    '>': lambda s, v: s > v,
+    '>=': lambda s, v: s >= v,
+    'in': lambda s, v: s.isin(v),
+    'not in': lambda s, v: ~s.isin(v),
+}
+
+
+def optimize_dtypes(df):
+    """
+    Copy of `df` with low-cardinality strings as categoricals and integers in
+    their smallest type. Floats are kept as float64: float32 turns a price of
+    0.82 into 0.8199999928474426 and moves coordinates by up to a metre,
+    which shows in hover labels and summary tables. Text stays text (e.g.
+    balcony '3+').
+    """
+    out = {}
+    for col, values in df.items():
+        if pd.api.types.is_integer_dtype(values):
+            out[col] = pd.to_numeric(values, downcast='integer')
+        elif pd.api.types.is_numeric_dtype(values):
+            out[col] = values
+        elif values.nunique(dropna=True) <= CATEGORY_RATIO * len(values):
+            out[col] = values.astype('category')
+        else:
+            out[col] = values
+    return pd.DataFrame(out, index=df.index)
+
+
+def _source_stat(csv_path):
+    stat = os.stat(csv_path)
+    return f'{stat.st_size}:{stat.st_mtime_ns}'.encode()
+
+
+def parquet_path(csv_path):
+    return os.path.splitext(csv_path)[0] + '.parquet'
+
+
+def memory_usage(df):
+    """{column: bytes} including the Python string objects behind object columns."""
+    return df.memory_usage(deep=True, index=False).to_dict()
+
+
+# --- Conversion ---
+
+def convert(csv_path, output=None, sort_by=SORT_COLUMNS, row_group_size=ROW_GROUP_SIZE):
+    """
+    Write the typed Parquet copy of `csv_path` (default: same name, .parquet)
+    and return (output path, memory report). The file records the CSV's
+    sha256 so `load` can tell when it is stale.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    output = output or parquet_path(csv_path)
+    raw = pd.read_csv(csv_path)
+    df = optimize_dtypes(raw)
+    sort_by = [col for col in sort_by if col in df.columns]
+    if sort_by:
+        df[ROW_COLUMN] = pd.to_numeric(np.arange(len(df)), downcast='unsigned')
+        df = df.sort_values(sort_by, kind='stable').reset_index(drop=True)
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                           SOURCE_KEY: file_sha256(csv_path).encode(),
+                                           SOURCE_STAT_KEY: _source_stat(csv_path)})
+    tmp = f'{output}.tmp.{os.getpid()}'
+    pq.write_table(table, tmp, row_group_size=row_group_size, compression='zstd', write_statistics=True)
+    os.replace(tmp, output)
+    return output, memory_report(raw, df.drop(columns=ROW_COLUMN, errors='ignore'))
+
+
+def memory_report(before, after):
+    """Per-column bytes and dtypes before and after optimize_dtypes, plus a total row."""
+    report = pd.DataFrame({
+        'dtype_before': before.dtypes.astype(str),
+        'bytes_before': pd.Series(memory_usage(before)),
+        'dtype_after': after.dtypes.reindex(before.columns).astype(str),
+        'bytes_after': pd.Series(memory_usage(after)).reindex(before.columns),
+    })
+    report.loc['total'] = ['', report['bytes_before'].sum(), '', report['bytes_after'].sum()]
+    report['saved'] = 1 - report['bytes_after'] / report['bytes_before']
+    return report
+
+
+# --- Loading ---
+
+def is_fresh(csv_path, path=None):
+    """
+    True when the Parquet copy exists, pyarrow can read it and it was
+    converted from this exact CSV. The CSV is only hashed when its size or
+    mtime differ from the converted one's (e.g. after a fresh checkout).
+    """
+    path = path or parquet_path(csv_path)
+    if not os.path.exists(path):
+        return False
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        return False
+    if not os.path.exists(csv_path):
+        return True
+    metadata = pq.read_schema(path).metadata or {}
+    if metadata.get(SOURCE_STAT_KEY) == _source_stat(csv_path):
+        return True
+    return metadata.get(SOURCE_KEY) == file_sha256(csv_path).encode()
+
+
+def load(csv_path=VIZ_DATA_PATH, columns=None, filters=None):
+    """
+    Typed frame of `csv_path`, restricted to `columns` and to the rows
+    matching `filters`: (column, op, value) tuples ANDed together, with op
+    one of == != < <= > >= in, not in. E.g.
+    load(columns=['sector', 'price'], filters=[('sector', '==', 'sector 45')]).
+    """
+    filters = list(filters or [])
+    if is_fresh(csv_path):
+        import pyarrow.parquet as pq
+
+        path = parquet_path(csv_path)
+        ordered = ROW_COLUMN in pq.read_schema(path).names
+        read = None if columns is None else list(columns) + ([ROW_COLUMN] if ordered else [])
+        # Filtered columns are read for the predicate even when not projected
+        df = pd.read_parquet(path, engine='pyarrow', columns=read, filters=filters or None)
+        if ordered:
+            df = df.sort_values(ROW_COLUMN).drop(columns=ROW_COLUMN).reset_index(drop=True)
+        return df
+
+    needed = None if columns is None else list(dict.fromkeys(list(columns) + [f[0] for f in filters]))
+    df = optimize_dtypes(pd.read_csv(csv_path, usecols=needed))
+    if filters:
+        mask = np.ones(len(df), dtype=bool)
+        for col, op, value in filters:
+            mask &= _OPERATORS[op](df[col], value).to_numpy(dtype=bool)
+        df = df[mask].reset_index(drop=True)
+    return df if columns is None else df[list(columns)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert dataset CSVs to typed Parquet and report memory use.")
+    parser.add_argument('csv', nargs='*', default=[VIZ_DATA_PATH])
+    parser.add_argument('--row-group-size', type=int, default=ROW_GROUP_SIZE)
+    args = parser.parse_args(argv)
+
+    for csv_path in args.csv:
+        output, report = convert(csv_path, row_group_size=args.row_group_size)
+        total = report.loc['total']
+        print(f"{csv_path} -> {output} ({os.path.getsize(csv_path) / 1e6:.2f} MB -> "
+              f"{os.path.getsize(output) / 1e6:.2f} MB on disk)")
+        print(report.to_string(formatters={'saved': '{:.0%}'.format}))
+        print(f"in memory: {total['bytes_before'] / 1e6:.2f} MB -> {total['bytes_after'] / 1e6:.2f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,336 @@
+"""
+Compile a fitted sklearn price pipeline into plain NumPy arrays.
+
+`export_pipeline` (needs sklearn) flattens the ColumnTransformer steps and
+the regressor into a single .npz file. `CompiledScorer` (needs only NumPy)
+loads that file and reproduces `pipeline.predict` on column arrays, without
+pandas or sklearn on the serving path. It is a drop-in replacement for the
+pipeline wherever `pipeline.predict(frame)` is called (batch_predict,
+prediction_cache, prediction_server).
+
+Supported steps: StandardScaler, OrdinalEncoder, OneHotEncoder, passthrough,
+drop, PCA, and LinearRegression / Ridge / Lasso / DecisionTreeRegressor /
+RandomForestRegressor / ExtraTreesRegressor / GradientBoostingRegressor.
+"""
+import argparse
+import json
+
+import numpy as np
+
+FORMAT_VERSION = 1
+ROW_BLOCK = 2048
+
+
+# --- Export (sklearn side) ---
+
+class _ArrayStore:
+    # Collects named arrays for np.savez and hands back their keys for the spec
+
+    def __init__(self):
+        self.arrays = {}
+
+    def add(self, prefix, array):
+        key = f'{prefix}_{len(self.arrays)}'
+        self.arrays[key] = np.asarray(array)
+        return key
+
+
+def _categories_array(categories):
+    # Strings are stored as fixed-width unicode so the .npz never needs pickle
+    if categories.dtype == object:
+        return np.asarray(categories, dtype=str)
+    return np.asarray(categories)
+
+
+def _compile_transformer(name, transformer, columns, store):
+    kind = type(transformer).__name__ if not isinstance(transformer, str) else transformer
+    columns = list(columns)
+
+    if kind == 'drop':
+        return None
+    if kind == 'passthrough':
+        return {'kind': 'passthrough', 'columns': columns}
+    if kind == 'StandardScaler':
+        n = len(columns)
+        mean = transformer.mean_ if transformer.with_mean else np.zeros(n)
+        scale = transformer.scale_ if transformer.with_std else np.ones(n)
+        return {'kind': 'scaler', 'columns': columns,
+                'mean': store.add('mean', mean), 'scale': store.add('scale', scale)}
+    if kind == 'OrdinalEncoder':
+        unknown_value = None
+        if transformer.handle_unknown == 'use_encoded_value':
+            unknown_value = float(transformer.unknown_value)
+        return {'kind': 'ordinal', 'columns': columns, 'unknown_value': unknown_value,
+                'categories': [store.add('cat', _categories_array(c)) for c in transformer.categories_]}
+    if kind == 'OneHotEncoder':
+        if getattr(transformer, '_infrequent_enabled', False):
+            raise NotImplementedError(f"{name}: infrequent categories are not supported")
+        drop_idx = transformer.drop_idx_
+        drops = [None if drop_idx is None or drop_idx[i] is None else int(drop_idx[i])
+                 for i in range(len(columns))]
+        return {'kind': 'onehot', 'columns': columns, 'drop': drops,
+                'ignore_unknown': transformer.handle_unknown != 'error',
+                'categories': [store.add('cat', _categories_array(c)) for c in transformer.categories_]}
+
+    raise NotImplementedError(f"Cannot compile transformer {name!r} of type {kind}")
+
+
+def _compile_tree(tree):
+    return {
+        'left': tree.children_left.astype(np.int32),
+        'right': tree.children_right.astype(np.int32),
+        'feature': tree.feature.astype(np.int32),
+        'threshold': tree.threshold.astype(np.float64),
+        'value': tree.value[:, 0, 0].astype(np.float64),
+    }
+
+
+def _flatten_trees(trees, store):
+    # All trees share one set of node arrays; child links are offset into the flat arrays
+    parts = {key: [] for key in ('left', 'right', 'feature', 'threshold', 'value')}
+    roots = []
+    offset = 0
+    for tree in trees:
+        compiled = _compile_tree(tree.tree_)
+        for key in ('left', 'right'):
+            links = compiled[key]
+            compiled[key] = np.where(links >= 0, links + offset, -1).astype(np.int32)
+        for key, array in compiled.items():
+            parts[key].append(array)
+        roots.append(offset)
+        offset += len(compiled['value'])
+
+    spec = {key: store.add(key, np.concatenate(arrays)) for key, arrays in parts.items()}
+    spec['roots'] = store.add('roots', np.asarray(roots, dtype=np.int32))
+    return spec
+
+
+def _compile_regressor(model, store):
+    kind = type(model).__name__
+    if kind in ('LinearRegression', 'Ridge', 'Lasso', 'ElasticNet'):
+        return {'kind': 'linear', 'coef': store.add('coef', np.ravel(model.coef_)),
+                'intercept': float(np.ravel(model.intercept_)[0]) if np.ndim(model.intercept_) else float(model.intercept_)}
+    if kind == 'DecisionTreeRegressor':
+        return {'kind': 'forest', 'trees': _flatten_trees([model], store)}
+    if kind in ('RandomForestRegressor', 'ExtraTreesRegressor'):
+        return {'kind': 'forest', 'trees': _flatten_trees(model.estimators_, store)}
+    if kind == 'GradientBoostingRegressor':
+        if model.init_ == 'zero':
+            baseline = 0.0
+        else:
+            baseline = float(np.ravel(model.init_.constant_)[0])
+        return {'kind': 'boosting', 'baseline': baseline, 'learning_rate': float(model.learning_rate),
+                'trees': _flatten_trees(model.estimators_[:, 0], store)}
+
+    raise NotImplementedError(f"Cannot compile regressor of type {kind}")
+
+
+def compile_pipeline(pipeline):
+    """Flatten a fitted Pipeline into (spec dict, named arrays)."""
+    store = _ArrayStore()
+    steps = []
+    for step_name, step in pipeline.steps[:-1]:
+        kind = type(step).__name__
+        if kind == 'ColumnTransformer':
+            blocks = []
+            for name, transformer, columns in step.transformers_:
+                if name == 'remainder' and isinstance(transformer, str) and transformer == 'drop':
+                    continue
+                if len(columns) == 0:
+                    continue
+                if not isinstance(columns[0], str):
+                    # remainder columns come back as integer positions
+                    columns = list(step.feature_names_in_[columns])
+                block = _compile_transformer(name, transformer, columns, store)
+                if block is not None:
+                    blocks.append(block)
+            steps.append({'kind': 'columns', 'blocks': blocks})
+        elif kind == 'PCA':
+            steps.append({'kind': 'pca', 'mean': store.add('mean', step.mean_),
+                          'components': store.add('components', step.components_),
+                          'whiten': store.add('whiten', np.sqrt(step.explained_variance_)) if step.whiten else None})
+        else:
+            raise NotImplementedError(f"Cannot compile pipeline step {step_name!r} of type {kind}")
+
+    spec = {
+        'format': FORMAT_VERSION,
+        'input_columns': [str(c) for c in getattr(pipeline, 'feature_names_in_', [])],
+        'steps': steps,
+        'regressor': _compile_regressor(pipeline.steps[-1][1], store),
+    }
+    # Calibrated price intervals (price_intervals.py) travel with the scorer
+    intervals = getattr(pipeline, 'price_intervals_', None)
+    if intervals is not None:
+        spec['intervals'] = {name: store.add(f'intervals_{name}', intervals[name])
+                             for name in ('types', 'edges', 'lower', 'upper', 'coverage')}
+    return spec, store.arrays
+
+
+def export_pipeline(pipeline, path):
+    """Write the compiled scorer for `pipeline` to `path` (.npz)."""
+    spec, arrays = compile_pipeline(pipeline)
+    with open(path, 'wb') as f:
+        np.savez(f, __spec__=np.frombuffer(json.dumps(spec).encode(), dtype=np.uint8), **arrays)
+    return path
+
+
+# --- Runtime (NumPy only) ---
+
+class CompiledScorer:
+    """Reproduces pipeline.predict (log price) from a compiled .npz; imports only NumPy."""
+
+    def __init__(self, spec, arrays):
+        if spec.get('format') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported compiled scorer format {spec.get('format')}")
+        self.spec = spec
+        self.arrays = arrays
+        self.input_columns = spec['input_columns']
+        if 'intervals' in spec:
+            self.price_intervals_ = {name: arrays[key] for name, key in spec['intervals'].items()}
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {key: data[key] for key in data.files}
+        spec = json.loads(arrays.pop('__spec__').tobytes().decode())
+        return cls(spec, arrays)
+
+    @staticmethod
+    def _lookup(values, categories):
+        # Position of each value in the sorted category array, -1 when unknown
+        values = np.asarray(values)
+        values = values.astype(str) if categories.dtype.kind == 'U' else values.astype(categories.dtype)
+        positions = np.searchsorted(categories, values)
+        positions = np.minimum(positions, len(categories) - 1)
+        found = categories[positions] == values
+        return np.where(found, positions, -1)
+
+    @staticmethod
+    def _unknown(column, values, codes):
+        bad = sorted(set(np.asarray(values)[codes < 0].tolist()), key=str)
+        return ValueError(f"Found unknown categories {bad} in column {column!r}")
+
+    def _block(self, block, columns):
+        a = self.arrays
+        kind = block['kind']
+        if kind == 'passthrough':
+            return np.column_stack([np.asarray(columns[c], dtype=np.float64) for c in block['columns']])
+        if kind == 'scaler':
+            X = np.column_stack([np.asarray(columns[c], dtype=np.float64) for c in block['columns']])
+            return (X - a[block['mean']]) / a[block['scale']]
+        if kind == 'ordinal':
+            out = []
+            for column, key in zip(block['columns'], block['categories']):
+                codes = self._lookup(columns[column], a[key])
+                if (codes < 0).any():
+                    if block['unknown_value'] is None:
+                        raise self._unknown(column, columns[column], codes)
+                    codes = np.where(codes < 0, block['unknown_value'], codes)
+                out.append(codes.astype(np.float64))
+            return np.column_stack(out)
+        if kind == 'onehot':
+            out = []
+            for column, key, drop in zip(block['columns'], block['categories'], block['drop']):
+                categories = a[key]
+                codes = self._lookup(columns[column], categories)
+                if (codes < 0).any() and not block['ignore_unknown']:
+                    raise self._unknown(column, columns[column], codes)
+                onehot = (codes[:, None] == np.arange(len(categories))[None, :]).astype(np.float64)
+                if drop is not None:
+                    onehot = np.delete(onehot, drop, axis=1)
+                out.append(onehot)
+            return np.hstack(out)
+        raise ValueError(f"Unknown block kind {kind}")
+
+    def transform(self, columns):
+        X = None
+        for step in self.spec['steps']:
+            if step['kind'] == 'columns':
+                X = np.hstack([self._block(block, columns) for block in step['blocks']])
+            elif step['kind'] == 'pca':
+                X = (X - self.arrays[step['mean']]) @ self.arrays[step['components']].T
+                if step['whiten'] is not None:
+                    X = X / self.arrays[step['whiten']]
+        return X
+
+    def _leaf_values(self, trees, X):
+        # Walk every tree for every row at once; thresholds compare in float32 like sklearn.
+        # Only (row, tree) pairs still at an internal node are advanced, so the work follows
+        # the mean path length rather than the deepest tree
+        a = self.arrays
+        left, right = a[trees['left']], a[trees['right']]
+        feature, threshold, value = a[trees['feature']], a[trees['threshold']], a[trees['value']]
+        roots = a[trees['roots']]
+        X32 = np.ascontiguousarray(X, dtype=np.float32)
+        n_features = X32.shape[1]
+
+        leaves = np.empty((len(X), len(roots)), dtype=np.float64)
+        for start in range(0, len(X), ROW_BLOCK):
+            block = X32[start:start + ROW_BLOCK]
+            n, rows = len(block), block.ravel()
+            node = np.tile(roots, n)
+            # Offset of each pair's row in the flattened block
+            row_offset = np.repeat(np.arange(n, dtype=np.int64) * n_features, len(roots))
+            pairs = np.arange(node.size)
+            while pairs.size:
+                current = node[pairs]
+                child_left = left[current]
+                internal = child_left >= 0
+                pairs, current, child_left = pairs[internal], current[internal], child_left[internal]
+                go_left = rows[row_offset[pairs] + feature[current]] <= threshold[current]
+                node[pairs] = np.where(go_left, child_left, right[current])
+            leaves[start:start + n] = value[node].reshape(n, len(roots))
+        return leaves
+
+    def predict(self, columns):
+        """
+        Log-price predictions, identical to pipeline.predict (within float
+        rounding after a PCA step). `columns` maps each input column name to
+        a 1-D array-like (a DataFrame works too).
+        """
+        X = self.transform(columns)
+        regressor = self.spec['regressor']
+        kind = regressor['kind']
+        if kind == 'linear':
+            return X @ self.arrays[regressor['coef']] + regressor['intercept']
+
+        leaves = self._leaf_values(regressor['trees'], X)
+        # Accumulate tree by tree in estimator order, as sklearn does
+        total = np.zeros(len(X), dtype=np.float64)
+        if kind == 'forest':
+            for t in range(leaves.shape[1]):
+                total += leaves[:, t]
+            return total / leaves.shape[1]
+        if kind == 'boosting':
+            total += regressor['baseline']
+            for t in range(leaves.shape[1]):
+                total += regressor['learning_rate'] * leaves[:, t]
+            return total
+        raise ValueError(f"Unknown regressor kind {kind}")
+
+    def predict_price(self, columns):
+        """Price in Cr (np.expm1 of the log prediction)."""
+        return np.expm1(self.predict(columns))
+
+    def predict_rows(self, rows):
+        """Price in Cr for a list of feature dicts."""
+        columns = {c: [row[c] for row in rows] for c in self.input_columns}
+        return self.predict_price(columns)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile pipeline.pkl into a NumPy-only scorer.")
+    parser.add_argument('pipeline', help="Path to the trained pipeline pickle")
+    parser.add_argument('output', help="Where to write the compiled .npz scorer")
+    args = parser.parse_args(argv)
+
+    import pickle
+
+    with open(args.pipeline, 'rb') as f:
+        pipeline = pickle.load(f)
+    export_pipeline(pipeline, args.output)
+    print(f"wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
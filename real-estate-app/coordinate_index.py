@@ -0,0 +1,216 @@
+import argparse
+import difflib
+import os
+import re
+import threading
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from artifacts import APP_DIR, DATA_DIR
+
+LATLONG_PATH = os.path.join(APP_DIR, '..', 'Datasets', 'latlong.csv')
+VIZ_DATA_PATH = os.path.join(DATA_DIR, 'data_viz1.csv')
+INDEX_PATH = os.path.join(DATA_DIR, 'coordinates.npz')
+
+SECTOR, SOCIETY = 0, 1
+# Society typos are matched against known names; sectors never are ("sector 36" ~ "sector 37")
+SOCIETY_MATCH_CUTOFF = 0.9
+
+_PUNCT_RE = r'[^\w\s]'
+_CITY_RE = r'\b(gurgaon|gurugram)\b'
+_SECTOR_RE = r'\b(?:sector|sect|sec)\s*(\d+[a-z]?)\b'
+_PUNCT, _CITY, _SECTOR_NAME = re.compile(_PUNCT_RE), re.compile(_CITY_RE), re.compile(_SECTOR_RE)
+_COORD_RE = r'(?P<lat>[\d.]+)\s*°?\s*(?P<ns>[NS])\s*,\s*(?P<lon>[\d.]+)\s*°?\s*(?P<ew>[EW])'
+
+
+# --- Normalization ---
+
+def normalize_names(names):
+    """
+    Canonical form of sector/society names, vectorized over a Series:
+    lower case, punctuation and a trailing 'gurgaon'/'gurugram' dropped,
+    whitespace collapsed, and 'Sec-36', 'sector36', 'Sector 36 ' -> 'sector 36'.
+    """
+    names = pd.Series(names, dtype='object').fillna('').astype(str).str.lower()
+    names = names.str.replace(_PUNCT_RE, ' ', regex=True)
+    names = names.str.replace(_CITY_RE, ' ', regex=True)
+    names = names.str.replace(_SECTOR_RE, r'sector \1', regex=True)
+    return names.str.split().str.join(' ')
+
+
+def normalize_name(name):
+    """Scalar normalize_names, for single lookups."""
+    name = _CITY.sub(' ', _PUNCT.sub(' ', str(name).lower()))
+    return ' '.join(_SECTOR_NAME.sub(r'sector \1', name).split())
+
+
+def parse_coordinates(strings):
+    """'28.4160° N, 76.9914° E' strings -> (lat, lon) float arrays in one pass; unparsable -> NaN."""
+    parts = pd.Series(strings, dtype='object').astype(str).str.extract(_COORD_RE)
+    lat = pd.to_numeric(parts['lat'], errors='coerce').to_numpy()
+    lon = pd.to_numeric(parts['lon'], errors='coerce').to_numpy()
+    lat = np.where(parts['ns'].to_numpy() == 'S', -lat, lat)
+    lon = np.where(parts['ew'].to_numpy() == 'W', -lon, lon)
+    return lat, lon
+
+
+# --- Index ---
+
+class CoordinateIndex:
+    """
+    Sector and society coordinates keyed by normalized name. Lookups are hash
+    lookups into a pandas Index; the table itself is a few KB of parallel
+    arrays saved as .npz, so serving never parses strings or geocodes.
+    """
+
+    def __init__(self, names, kinds, lat, lon):
+        self.names = np.asarray(names, dtype=str)
+        self.kinds = np.asarray(kinds, dtype=np.int8)
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self._index = {
+            kind: pd.Index(self.names[self.kinds == kind]) for kind in (SECTOR, SOCIETY)
+        }
+        self._offset = {kind: np.flatnonzero(self.kinds == kind) for kind in (SECTOR, SOCIETY)}
+        self._rows = {(int(kind), name): row for row, (kind, name) in enumerate(zip(self.kinds, self.names))}
+        self._society_match = lru_cache(maxsize=4096)(self._closest_society)
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def build(cls, latlong_path=LATLONG_PATH, viz_path=VIZ_DATA_PATH):
+        """Sectors from latlong.csv (data_viz1.csv fills gaps), societies from data_viz1.csv."""
+        frames = []
+        if latlong_path and os.path.exists(latlong_path):
+            latlong = pd.read_csv(latlong_path)
+            lat, lon = parse_coordinates(latlong['coordinates'])
+            frames.append(pd.DataFrame({'name': normalize_names(latlong['sector']), 'kind': SECTOR,
+                                        'lat': lat, 'lon': lon}))
+
+        viz = pd.read_csv(viz_path, usecols=['society', 'sector', 'coordinates', 'latitude', 'longitude'])
+        lat, lon = viz['latitude'].to_numpy(dtype=np.float64), viz['longitude'].to_numpy(dtype=np.float64)
+        missing = np.isnan(lat) | np.isnan(lon)
+        if missing.any():
+            lat[missing], lon[missing] = parse_coordinates(viz['coordinates'][missing])
+        viz = pd.DataFrame({'society': normalize_names(viz['society']), 'sector': normalize_names(viz['sector']),
+                            'lat': lat, 'lon': lon}).dropna()
+
+        sectors = viz.groupby('sector', as_index=False)[['lat', 'lon']].mean().rename(columns={'sector': 'name'})
+        frames.append(sectors.assign(kind=SECTOR))
+        # A society listed under several sectors keeps its most frequent location
+        societies = (viz.groupby(['society', 'lat', 'lon']).size().rename('n').reset_index()
+                     .sort_values('n', ascending=False).drop_duplicates('society')
+                     .rename(columns={'society': 'name'}))
+        frames.append(societies.assign(kind=SOCIETY))
+
+        table = (pd.concat(frames, ignore_index=True).dropna(subset=['lat', 'lon'])
+                 .query("name != ''").drop_duplicates(['kind', 'name'])
+                 .sort_values(['kind', 'name']))
+        return cls(table['name'], table['kind'], table['lat'], table['lon'])
+
+    def save(self, path=INDEX_PATH):
+        tmp = f"{path}.tmp.{os.getpid()}.npz"
+        np.savez_compressed(tmp, names=self.names, kinds=self.kinds, lat=self.lat, lon=self.lon)
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        with np.load(path) as table:
+            return cls(table['names'], table['kinds'], table['lat'], table['lon'])
+
+    def _closest_society(self, name):
+        match = difflib.get_close_matches(name, self._index[SOCIETY], n=1, cutoff=SOCIETY_MATCH_CUTOFF)
+        return match[0] if match else None
+
+    def _positions(self, names, kind, fuzzy):
+        normalized = normalize_names(names)
+        positions = self._index[kind].get_indexer(normalized)
+        if fuzzy and kind == SOCIETY and (positions < 0).any():
+            for i in np.flatnonzero(positions < 0):
+                match = self._society_match(normalized.iloc[i])
+                if match is not None:
+                    positions[i] = self._index[kind].get_loc(match)
+        return positions
+
+    def lookup_many(self, names, kind=SECTOR, fuzzy=True):
+        """(lat, lon) float64 arrays for `names`; unknown names give NaN."""
+        positions = self._positions(names, kind, fuzzy)
+        rows = self._offset[kind][np.maximum(positions, 0)]
+        found = positions >= 0
+        lat = np.where(found, self.lat[rows], np.nan)
+        lon = np.where(found, self.lon[rows], np.nan)
+        return lat, lon
+
+    def _lookup(self, name, kind, fuzzy):
+        name = normalize_name(name)
+        row = self._rows.get((kind, name))
+        if row is None and fuzzy and kind == SOCIETY:
+            match = self._society_match(name)
+            row = self._rows.get((kind, match))
+        return None if row is None else (float(self.lat[row]), float(self.lon[row]))
+
+    def sector(self, name):
+        """(lat, lon) of a sector, or None."""
+        return self._lookup(name, SECTOR, False)
+
+    def society(self, name, fuzzy=True):
+        """(lat, lon) of a society, or None; close misspellings resolve to the known name."""
+        return self._lookup(name, SOCIETY, fuzzy)
+
+    def attach(self, df, society_col='society', sector_col='sector'):
+        """
+        Copy of `df` with float latitude/longitude columns: the society's
+        location where known, else the sector's. The ETL merge stage locates
+        new listings with it, GeoIndex the listings that lack coordinates.
+        """
+        out = df.copy()
+        lat, lon = np.full(len(out), np.nan), np.full(len(out), np.nan)
+        if society_col in out.columns:
+            lat, lon = self.lookup_many(out[society_col], SOCIETY)
+        if sector_col in out.columns:
+            sector_lat, sector_lon = self.lookup_many(out[sector_col], SECTOR)
+            missing = np.isnan(lat)
+            lat[missing], lon[missing] = sector_lat[missing], sector_lon[missing]
+        out['latitude'], out['longitude'] = lat, lon
+        return out
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_index(path=INDEX_PATH):
+    """Process-wide index: loads the .npz table, building and saving it on first use."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            if os.path.exists(path):
+                _shared = CoordinateIndex.load(path)
+            else:
+                _shared = CoordinateIndex.build()
+                try:
+                    _shared.save(path)
+                except OSError:
+                    pass  # read-only deploy: keep the in-memory table
+    return _shared
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the offline sector/society coordinate table.")
+    parser.add_argument('--latlong', default=LATLONG_PATH)
+    parser.add_argument('--viz', default=VIZ_DATA_PATH)
+    parser.add_argument('--output', default=INDEX_PATH)
+    args = parser.parse_args(argv)
+
+    index = CoordinateIndex.build(args.latlong, args.viz)
+    path = index.save(args.output)
+    counts = np.bincount(index.kinds, minlength=2)
+    print(f"{counts[SECTOR]} sectors, {counts[SOCIETY]} societies -> {path} ({os.path.getsize(path)} bytes)")
+
+
+if __name__ == '__main__':
+    main()
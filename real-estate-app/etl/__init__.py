@@ -0,0 +1,6 @@
+"""
+Re-runnable ETL replacing the Preprocessing/ and Feature-Engineering/
+notebooks: clean -> merge -> features -> outliers -> impute -> categories.
+Run with `python -m etl` from the app directory.
+"""
+from .pipeline import STAGES, run
@@ -0,0 +1,34 @@
+"""
+luxury_category and floor_category (feature-selection notebook) and the
+final column selection of gurgaon_properties_post_feature_selection_v2.csv.
+"""
+import numpy as np
+
+from .io import CsvSink, read_chunks
+
+OUTPUT_COLUMNS = ['property_type', 'sector', 'price', 'bedRoom', 'bathroom', 'balcony', 'agePossession',
+                  'built_up_area', 'servant room', 'store room', 'furnishing_type', 'luxury_category',
+                  'floor_category']
+
+
+def categorize_luxury(score):
+    return np.select([(score >= 0) & (score < 50), (score >= 50) & (score < 150), (score >= 150) & (score <= 175)],
+                     ['Low', 'Medium', 'High'], None)
+
+
+def categorize_floor(floor):
+    return np.select([(floor >= 0) & (floor <= 2), (floor >= 3) & (floor <= 10), (floor >= 11) & (floor <= 51)],
+                     ['Low Floor', 'Mid Floor', 'High Floor'], None)
+
+
+def categorize(df):
+    df['luxury_category'] = categorize_luxury(df['luxury_score'])
+    df['floor_category'] = categorize_floor(df['floorNum'])
+    return df
+
+
+def categorize_file(path, output, chunksize):
+    with CsvSink(output, OUTPUT_COLUMNS) as sink:
+        for chunk in read_chunks(path, chunksize):
+            sink.write(categorize(chunk))
+    return {'rows': sink.rows}
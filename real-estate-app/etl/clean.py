@@ -0,0 +1,143 @@
+"""
+Cleaning and merge: the data-preprocessing-flats, data-preprocessing-houses,
+merge-flats-and-house and data-preprocessing-level-2 notebooks, vectorized.
+"""
+import numpy as np
+import pandas as pd
+
+from .io import CsvSink, RowDeduplicator, read_chunks
+
+# address, description, rating and nearbyLocations are never used downstream; dropping them here
+# instead of in later notebooks keeps the bulkiest text out of every intermediate file
+CLEANED_COLUMNS = ['property_name', 'property_type', 'society', 'price', 'price_per_sqft', 'area', 'areaWithType',
+                   'bedRoom', 'bathroom', 'balcony', 'additionalRoom', 'floorNum', 'facing', 'agePossession',
+                   'furnishDetails', 'features']
+
+# Applied in order as substring replacements, exactly like the notebook; they
+# run once per distinct sector name, not per row
+SECTOR_REPLACEMENTS = [
+    ('dharam colony', 'sector 12'), ('krishna colony', 'sector 7'), ('suncity', 'sector 54'),
+    ('prem nagar', 'sector 13'), ('mg road', 'sector 28'), ('gandhi nagar', 'sector 28'),
+    ('laxmi garden', 'sector 11'), ('shakti nagar', 'sector 11'), ('baldev nagar', 'sector 7'),
+    ('shivpuri', 'sector 7'), ('garhi harsaru', 'sector 17'), ('imt manesar', 'manesar'),
+    ('adarsh nagar', 'sector 12'), ('shivaji nagar', 'sector 11'), ('bhim nagar', 'sector 6'),
+    ('madanpuri', 'sector 7'), ('saraswati vihar', 'sector 28'), ('arjun nagar', 'sector 8'),
+    ('ravi nagar', 'sector 9'), ('vishnu garden', 'sector 105'), ('bhondsi', 'sector 11'),
+    ('surya vihar', 'sector 21'), ('devilal colony', 'sector 9'), ('valley view estate', 'gwal pahari'),
+    ('mehrauli  road', 'sector 14'), ('jyoti park', 'sector 7'), ('ansal plaza', 'sector 23'),
+    ('dayanand colony', 'sector 6'), ('sushant lok phase 2', 'sector 55'), ('chakkarpur', 'sector 28'),
+    ('greenwood city', 'sector 45'), ('subhash nagar', 'sector 12'), ('sohna road road', 'sohna road'),
+    ('malibu town', 'sector 47'), ('surat nagar 1', 'sector 104'), ('new colony', 'sector 7'),
+    ('mianwali colony', 'sector 12'), ('jacobpura', 'sector 12'), ('rajiv nagar', 'sector 13'),
+    ('ashok vihar', 'sector 3'), ('dlf phase 1', 'sector 26'), ('nirvana country', 'sector 50'),
+    ('palam vihar', 'sector 2'), ('dlf phase 2', 'sector 25'), ('sushant lok phase 1', 'sector 43'),
+    ('laxman vihar', 'sector 4'), ('dlf phase 4', 'sector 28'), ('dlf phase 3', 'sector 24'),
+    ('sushant lok phase 3', 'sector 57'), ('dlf phase 5', 'sector 43'), ('rajendra park', 'sector 105'),
+    ('uppals southend', 'sector 49'), ('sohna', 'sohna road'), ('ashok vihar phase 3 extension', 'sector 5'),
+    ('south city 1', 'sector 41'), ('ashok vihar phase 2', 'sector 5'),
+]
+# After dropping rare sectors
+SECTOR_REPLACEMENTS_2 = [
+    ('sector 95a', 'sector 95'), ('sector 23a', 'sector 23'), ('sector 12a', 'sector 12'),
+    ('sector 3a', 'sector 3'), ('sector 110 a', 'sector 110'), ('patel nagar', 'sector 15'),
+    ('a block sector 43', 'sector 43'), ('maruti kunj', 'sector 12'), ('b block sector 43', 'sector 43'),
+    ('sector-33 sohna road', 'sector 33'), ('sector 1 manesar', 'manesar'), ('sector 4 phase 2', 'sector 4'),
+    ('sector 1a manesar', 'manesar'), ('c block sector 43', 'sector 43'), ('sector 89 a', 'sector 89'),
+    ('sector 2 extension', 'sector 2'), ('sector 36 sohna road', 'sector 36'),
+    # The notebook patched these rows by index; all 'new sector 2' rows were sector 110
+    ('new sector 2', 'sector 110'),
+]
+MIN_SECTOR_LISTINGS = 3
+_UNUSED_RAW = {'link', 'property_id', 'address', 'description', 'rating', 'nearbyLocations'}
+
+
+def _first_token(series):
+    return series.str.split(' ').str.get(0)
+
+
+def clean_listings(df, property_type):
+    """One raw 99acres chunk (flats.csv or houses.csv layout) -> the *_cleaned.csv layout."""
+    df = df.drop(columns=['link', 'property_id'], errors='ignore')
+    if property_type == 'flat':
+        df = df.rename(columns={'area': 'price_per_sqft'})
+    else:
+        df = df.rename(columns={'rate': 'price_per_sqft', 'noOfFloor': 'floorNum'})
+
+    society = df['society'].astype('string').str.replace(r'\d+(\.\d+)?\s?★', '', regex=True).str.strip().str.lower()
+    df['society'] = society.fillna('independent' if property_type == 'house' else 'nan')
+
+    df = df[df['price'] != 'Price on Request']
+    df = df[df['bedRoom'].notna()]
+    price = df['price'].str.split(' ')
+    value = pd.to_numeric(price.str.get(0), errors='coerce')
+    df['price'] = np.where(price.str.get(1) == 'Lac', value / 100, value).round(2)
+
+    df['price_per_sqft'] = pd.to_numeric(
+        df['price_per_sqft'].str.split('/').str.get(0).str.replace('₹', '').str.replace(',', '').str.strip(),
+        errors='coerce')
+    df['bedRoom'] = pd.to_numeric(_first_token(df['bedRoom']), errors='coerce')
+    df['bathroom'] = pd.to_numeric(_first_token(df['bathroom']), errors='coerce')
+    df['balcony'] = _first_token(df['balcony']).str.replace('No', '0')
+    df['additionalRoom'] = df['additionalRoom'].fillna('not available').str.lower()
+
+    floor = _first_token(df['floorNum'].astype('string'))
+    if property_type == 'flat':
+        floor = floor.replace('Ground', '0').str.replace('Basement', '-1').str.replace('Lower', '0')
+        floor = floor.str.extract(r'(\d+)', expand=False)
+    df['floorNum'] = pd.to_numeric(floor, errors='coerce')
+
+    df['facing'] = df['facing'].fillna('NA')
+    df['area'] = (df['price'] * 10000000 / df['price_per_sqft']).round()
+    df['property_type'] = property_type
+    return df.reindex(columns=CLEANED_COLUMNS)
+
+
+def clean_file(path, property_type, output, chunksize):
+    dedupe = RowDeduplicator()
+    with CsvSink(output, CLEANED_COLUMNS) as sink:
+        for chunk in read_chunks(path, chunksize, dtype=str, usecols=lambda col: col not in _UNUSED_RAW):
+            sink.write(dedupe(clean_listings(chunk, property_type)))
+    return {'rows': sink.rows}
+
+
+def _replace_in_order(names, replacements):
+    unique = pd.Series(pd.unique(names.dropna()))
+    mapped = unique.copy()
+    for old, new in replacements:
+        mapped = mapped.str.replace(old, new, regex=False)
+    return names.map(dict(zip(unique, mapped)))
+
+
+def extract_sector(df):
+    sector = df['property_name'].str.split('in').str.get(1).str.replace('Gurgaon', '').str.strip().str.lower()
+    return _replace_in_order(sector, SECTOR_REPLACEMENTS)
+
+
+def merge_files(paths, output, chunksize, coordinates=None):
+    """
+    Concatenate the cleaned flats and houses, derive `sector` from the
+    listing title and keep sectors with at least MIN_SECTOR_LISTINGS
+    listings. Two passes: sector counts first, then filter and write.
+    Each listing is located (latitude/longitude) from the offline
+    coordinate index, `coordinates` (default the shared one): its society
+    where known, else its sector.
+    """
+    if coordinates is None:
+        import coordinate_index
+        coordinates = coordinate_index.get_index()
+
+    counts = pd.Series(dtype='int64')
+    for path in paths:
+        for chunk in read_chunks(path, chunksize, usecols=['property_name']):
+            counts = counts.add(extract_sector(chunk).value_counts(), fill_value=0)
+    keep = set(counts.index[counts >= MIN_SECTOR_LISTINGS])
+
+    columns = CLEANED_COLUMNS[1:3] + ['sector'] + CLEANED_COLUMNS[3:] + ['latitude', 'longitude']
+    with CsvSink(output, columns) as sink:
+        for path in paths:
+            for chunk in read_chunks(path, chunksize):
+                sector = extract_sector(chunk)
+                chunk['sector'] = _replace_in_order(sector, SECTOR_REPLACEMENTS_2)
+                chunk = chunk[sector.isin(keep).to_numpy() & (chunk['sector'] != 'new').to_numpy()]
+                sink.write(coordinates.attach(chunk))
+    return {'rows': sink.rows, 'sectors': len(keep)}
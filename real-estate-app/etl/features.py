@@ -0,0 +1,275 @@
+"""
+Feature engineering (feature-engineering notebook): areas from areaWithType,
+additional-room flags, agePossession buckets, furnishing_type clusters and
+the amenity-weighted luxury_score.
+"""
+import numpy as np
+import pandas as pd
+
+from .io import CsvSink, read_chunks
+
+SQ_M_TO_SQFT = 10.7639
+ROOM_COLUMNS = ['study room', 'servant room', 'store room', 'pooja room', 'others']
+FURNISHINGS = ['AC', 'Bed', 'Chimney', 'Curtains', 'Dining Table', 'Exhaust Fan', 'Fan', 'Fridge', 'Geyser',
+               'Light', 'Microwave', 'Modular Kitchen', 'Sofa', 'Stove', 'TV', 'Wardrobe', 'Washing Machine',
+               'Water Purifier']
+FURNISHING_CLUSTERS = 3
+# Rows used to fit the furnishing clusters; the rest are only assigned
+FURNISHING_SAMPLE = 200_000
+
+OUTPUT_COLUMNS = ['property_type', 'society', 'sector', 'price', 'price_per_sqft', 'area', 'areaWithType',
+                  'bedRoom', 'bathroom', 'balcony', 'floorNum', 'facing', 'agePossession',
+                  'super_built_up_area', 'built_up_area', 'carpet_area'] + ROOM_COLUMNS + [
+                  'furnishing_type', 'luxury_score']
+
+# Assigning weights based on perceived luxury contribution
+LUXURY_WEIGHTS = {
+    '24/7 Power Backup': 8,
+    '24/7 Water Supply': 4,
+    '24x7 Security': 7,
+    'ATM': 4,
+    'Aerobics Centre': 6,
+    'Airy Rooms': 8,
+    'Amphitheatre': 7,
+    'Badminton Court': 7,
+    'Banquet Hall': 8,
+    'Bar/Chill-Out Lounge': 9,
+    'Barbecue': 7,
+    'Basketball Court': 7,
+    'Billiards': 7,
+    'Bowling Alley': 8,
+    'Business Lounge': 9,
+    'CCTV Camera Security': 8,
+    'Cafeteria': 6,
+    'Car Parking': 6,
+    'Card Room': 6,
+    'Centrally Air Conditioned': 9,
+    'Changing Area': 6,
+    "Children's Play Area": 7,
+    'Cigar Lounge': 9,
+    'Clinic': 5,
+    'Club House': 9,
+    'Concierge Service': 9,
+    'Conference room': 8,
+    'Creche/Day care': 7,
+    'Cricket Pitch': 7,
+    'Doctor on Call': 6,
+    'Earthquake Resistant': 5,
+    'Entrance Lobby': 7,
+    'False Ceiling Lighting': 6,
+    'Feng Shui / Vaastu Compliant': 5,
+    'Fire Fighting Systems': 8,
+    'Fitness Centre / GYM': 8,
+    'Flower Garden': 7,
+    'Food Court': 6,
+    'Foosball': 5,
+    'Football': 7,
+    'Fountain': 7,
+    'Gated Community': 7,
+    'Golf Course': 10,
+    'Grocery Shop': 6,
+    'Gymnasium': 8,
+    'High Ceiling Height': 8,
+    'High Speed Elevators': 8,
+    'Infinity Pool': 9,
+    'Intercom Facility': 7,
+    'Internal Street Lights': 6,
+    'Internet/wi-fi connectivity': 7,
+    'Jacuzzi': 9,
+    'Jogging Track': 7,
+    'Landscape Garden': 8,
+    'Laundry': 6,
+    'Lawn Tennis Court': 8,
+    'Library': 8,
+    'Lounge': 8,
+    'Low Density Society': 7,
+    'Maintenance Staff': 6,
+    'Manicured Garden': 7,
+    'Medical Centre': 5,
+    'Milk Booth': 4,
+    'Mini Theatre': 9,
+    'Multipurpose Court': 7,
+    'Multipurpose Hall': 7,
+    'Natural Light': 8,
+    'Natural Pond': 7,
+    'Park': 8,
+    'Party Lawn': 8,
+    'Piped Gas': 7,
+    'Pool Table': 7,
+    'Power Back up Lift': 8,
+    'Private Garden / Terrace': 9,
+    'Property Staff': 7,
+    'RO System': 7,
+    'Rain Water Harvesting': 7,
+    'Reading Lounge': 8,
+    'Restaurant': 8,
+    'Salon': 8,
+    'Sauna': 9,
+    'Security / Fire Alarm': 9,
+    'Security Personnel': 9,
+    'Separate entry for servant room': 8,
+    'Sewage Treatment Plant': 6,
+    'Shopping Centre': 7,
+    'Skating Rink': 7,
+    'Solar Lighting': 6,
+    'Solar Water Heating': 7,
+    'Spa': 9,
+    'Spacious Interiors': 9,
+    'Squash Court': 8,
+    'Steam Room': 9,
+    'Sun Deck': 8,
+    'Swimming Pool': 8,
+    'Temple': 5,
+    'Theatre': 9,
+    'Toddler Pool': 7,
+    'Valet Parking': 9,
+    'Video Door Security': 9,
+    'Visitor Parking': 7,
+    'Water Softener Plant': 7,
+    'Water Storage': 7,
+    'Water purifier': 7,
+    'Yoga/Meditation Area': 7,
+}
+
+
+# --- Areas ---
+
+def _area(text, label):
+    # "<label> 1081(100.43 sq.m.)": a value directly followed by its sq.m. figure is converted from that
+    parts = text.str.extract(label + r'(\d+\.?\d*)(?: \((\d+\.?\d*) sq\.m\.\))?')
+    value = pd.to_numeric(parts[0], errors='coerce')
+    sq_m = pd.to_numeric(parts[1], errors='coerce')
+    return value.where(sq_m.isna(), sq_m * SQ_M_TO_SQFT)
+
+
+def extract_areas(df):
+    text = df['areaWithType'].fillna('')
+    df['super_built_up_area'] = _area(text, r'Super Built up area ')
+    df['built_up_area'] = _area(text, r'Built Up area\s*:\s*')
+    df['carpet_area'] = _area(text, r'Carpet area\s*:\s*')
+
+    # Plots list none of the three; use the plot area, rescaled when it was given in sq.yd/sq.m
+    all_nan = df[['super_built_up_area', 'built_up_area', 'carpet_area']].isna().all(axis=1)
+    plot = pd.to_numeric(text[all_nan].str.extract(r'Plot area (\d+\.?\d*)', expand=False), errors='coerce')
+    ratio = (df.loc[all_nan, 'area'] / plot).round()
+    plot = np.select([ratio == 9.0, ratio == 11.0], [plot * 9, plot * 10.7], plot)
+    df.loc[all_nan, 'built_up_area'] = plot
+    return df
+
+
+# --- Rooms, age ---
+
+def add_room_flags(df):
+    rooms = df['additionalRoom'].fillna('not available')
+    for col in ROOM_COLUMNS:
+        df[col] = rooms.str.contains(col, regex=False).astype(int)
+    return df
+
+
+def categorize_age_possession(values):
+    values = values.astype('string')
+    last_token_is_year = values.str.split(' ').str.get(-1).str.fullmatch(r'\d+').fillna(False)
+    conditions = [
+        values.isna(),
+        values.str.contains('0 to 1 Year Old|Within 6 months|Within 3 months', regex=True).fillna(False),
+        values.str.contains('1 to 5 Year Old', regex=False).fillna(False),
+        values.str.contains('5 to 10 Year Old', regex=False).fillna(False),
+        values.str.contains('10+ Year Old', regex=False).fillna(False),
+        values.str.contains('Under Construction|By', regex=True).fillna(False) | last_token_is_year,
+    ]
+    choices = ['Undefined', 'New Property', 'Relatively New', 'Moderately Old', 'Old Property', 'Under Construction']
+    return np.select(conditions, choices, 'Undefined')
+
+
+# --- Furnishing ---
+
+def furnishing_counts(details):
+    """
+    Count of every FURNISHINGS item per row ('3 Fan' -> 3, 'Fan' -> 1, 'No Fan'
+    or absent -> 0). Listings share a few thousand distinct lists at most, so
+    each distinct list is parsed once and the rows gather from that table.
+    """
+    codes, uniques = pd.factorize(details)
+    items = pd.Series(uniques, dtype=object).str.extractall(r"'(No )?(?:(\d+) )?([^']+)'")
+    count = pd.to_numeric(items[1], errors='coerce').fillna(1).where(items[0].isna(), 0)
+    table = pd.DataFrame({'row': items.index.get_level_values(0), 'item': items[2].to_numpy(), 'count': count.to_numpy()})
+    table = table[table['item'].isin(FURNISHINGS)].drop_duplicates(['row', 'item'])
+    # One extra all-zero row for missing details (factorize code -1)
+    counts = np.zeros((len(uniques) + 1, len(FURNISHINGS)), dtype=np.float32)
+    counts[table['row'].to_numpy(), pd.Index(FURNISHINGS).get_indexer(table['item'])] = table['count'].to_numpy()
+    return counts[codes]
+
+
+class FurnishingClusters:
+    """
+    KMeans over standardized furnishing counts, fitted once on a sample.
+    Clusters are renumbered by mean item count, so 0/1/2 reliably mean
+    unfurnished/semi-furnished/furnished whatever order KMeans found them in.
+    """
+
+    def __init__(self, sample):
+        from sklearn.cluster import KMeans
+        from sklearn.preprocessing import StandardScaler
+
+        self.scaler = StandardScaler().fit(sample)
+        self.kmeans = KMeans(n_clusters=FURNISHING_CLUSTERS, random_state=42, n_init=10)
+        self.kmeans.fit(self.scaler.transform(sample))
+        centers = self.scaler.inverse_transform(self.kmeans.cluster_centers_).sum(axis=1)
+        self._relabel = np.argsort(np.argsort(centers))
+
+    def predict(self, counts):
+        return self._relabel[self.kmeans.predict(self.scaler.transform(counts))]
+
+
+# --- Luxury ---
+
+def fill_features(df, apartments):
+    """Listings without amenities take their society's TopFacilities from appartments.csv."""
+    if apartments is None:
+        return df
+    missing = df['features'].isna()
+    if missing.any():
+        df.loc[missing, 'features'] = df.loc[missing, 'society'].map(apartments).to_numpy()
+    return df
+
+
+def luxury_score(features):
+    """Sum of LUXURY_WEIGHTS over each row's "['a', 'b']" amenity list, without literal_eval per row."""
+    lists = features.where(features.fillna('').str.startswith('['), '[]')
+    items = lists.str.slice(2, -2).str.split(r"['\"], ['\"]", regex=True).explode()
+    weights = items.map(LUXURY_WEIGHTS).fillna(0)
+    return weights.groupby(level=0).sum().reindex(features.index, fill_value=0)
+
+
+def read_apartments(path):
+    if not path:
+        return None
+    apartments = pd.read_csv(path, usecols=['PropertyName', 'TopFacilities'])
+    apartments['PropertyName'] = apartments['PropertyName'].str.lower()
+    return apartments.drop_duplicates('PropertyName').set_index('PropertyName')['TopFacilities']
+
+
+def engineer_file(path, output, chunksize, apartments_path=None):
+    """Two passes: furnishing counts to fit the clusters, then every feature per chunk."""
+    sample = []
+    sampled = 0
+    for chunk in read_chunks(path, chunksize, usecols=['furnishDetails']):
+        if sampled >= FURNISHING_SAMPLE:
+            break
+        counts = furnishing_counts(chunk['furnishDetails'])[:FURNISHING_SAMPLE - sampled]
+        sample.append(counts)
+        sampled += len(counts)
+    clusters = FurnishingClusters(np.concatenate(sample)) if sampled >= FURNISHING_CLUSTERS else None
+
+    apartments = read_apartments(apartments_path)
+    with CsvSink(output, OUTPUT_COLUMNS) as sink:
+        for chunk in read_chunks(path, chunksize):
+            chunk = extract_areas(chunk)
+            chunk = add_room_flags(chunk)
+            chunk['agePossession'] = categorize_age_possession(chunk['agePossession'])
+            if clusters is not None:
+                chunk['furnishing_type'] = clusters.predict(furnishing_counts(chunk['furnishDetails']))
+            chunk = fill_features(chunk, apartments)
+            chunk['luxury_score'] = luxury_score(chunk['features'])
+            sink.write(chunk)
+    return {'rows': sink.rows, 'furnishing_sample': sampled}
@@ -0,0 +1,87 @@
+"""
+Missing-value imputation (missing-value-imputation notebook): built_up_area
+from super built-up/carpet areas, floorNum from the houses' median and
+agePossession from the sector/property-type modes.
+"""
+import numpy as np
+import pandas as pd
+
+from .io import CsvSink, read_chunks
+
+# Median super/built-up and carpet/built-up ratios measured in the notebook
+SUPER_TO_BUILT_UP = 1.105
+CARPET_TO_BUILT_UP = 0.9
+# Cheap listings with a tiny built-up area: the listed (plot) area is the right one
+ANOMALY_MAX_BUILT_UP = 2000
+ANOMALY_MIN_PRICE = 2.5
+
+OUTPUT_COLUMNS = ['property_type', 'society', 'sector', 'price', 'price_per_sqft', 'bedRoom', 'bathroom',
+                  'balcony', 'floorNum', 'agePossession', 'built_up_area', 'study room', 'servant room',
+                  'store room', 'pooja room', 'others', 'furnishing_type', 'luxury_score']
+
+
+class ImputationStats:
+    """Pass 1: agePossession counts per (sector, property_type) and house floor numbers."""
+
+    def __init__(self):
+        self._age_counts = None
+        self._house_floors = []
+
+    def update(self, chunk):
+        defined = chunk[chunk['agePossession'] != 'Undefined']
+        counts = defined.groupby(['sector', 'property_type', 'agePossession']).size()
+        self._age_counts = counts if self._age_counts is None else self._age_counts.add(counts, fill_value=0)
+        floors = chunk.loc[chunk['property_type'] == 'house', 'floorNum'].dropna()
+        self._house_floors.append(floors.to_numpy(dtype=np.float32))
+
+    def house_floor_median(self):
+        floors = np.concatenate(self._house_floors) if self._house_floors else np.empty(0)
+        return float(np.median(floors)) if len(floors) else 2.0
+
+    def age_modes(self):
+        """Mode tables by (sector, type), sector and type; ties go to the first value alphabetically, like Series.mode."""
+        counts = self._age_counts if self._age_counts is not None else pd.Series(dtype=float)
+        modes = []
+        for keys in (['sector', 'property_type'], ['sector'], ['property_type']):
+            grouped = counts.groupby(level=keys + ['agePossession']).sum().rename('n').reset_index()
+            grouped = grouped.sort_values(['n', 'agePossession'], ascending=[False, True])
+            modes.append((keys, grouped.drop_duplicates(keys).set_index(keys)['agePossession']))
+        return modes
+
+
+def impute(df, floor_median, age_modes):
+    sb, bu, c = df['super_built_up_area'], df['built_up_area'], df['carpet_area']
+    missing = bu.isna()
+    df['built_up_area'] = np.select(
+        [missing & sb.notna() & c.notna(), missing & sb.notna(), missing & c.notna()],
+        [((sb / SUPER_TO_BUILT_UP + c / CARPET_TO_BUILT_UP) / 2).round(),
+         (sb / SUPER_TO_BUILT_UP).round(),
+         (c / CARPET_TO_BUILT_UP).round()],
+        bu)
+    anomaly = (df['built_up_area'] < ANOMALY_MAX_BUILT_UP) & (df['price'] > ANOMALY_MIN_PRICE)
+    df.loc[anomaly, 'built_up_area'] = df.loc[anomaly, 'area']
+
+    df['floorNum'] = df['floorNum'].fillna(floor_median)
+
+    # The notebook's cascade: sector+type mode, then sector mode, then type mode
+    for keys, modes in age_modes:
+        undefined = df['agePossession'] == 'Undefined'
+        if not undefined.any():
+            break
+        index = pd.MultiIndex.from_frame(df.loc[undefined, keys]) if len(keys) > 1 else df.loc[undefined, keys[0]]
+        filled = modes.reindex(index).to_numpy()
+        df.loc[undefined, 'agePossession'] = np.where(pd.isna(filled), 'Undefined', filled)
+
+    return df.dropna(subset=['built_up_area'])
+
+
+def impute_file(path, output, chunksize):
+    stats = ImputationStats()
+    for chunk in read_chunks(path, chunksize, usecols=['sector', 'property_type', 'agePossession', 'floorNum']):
+        stats.update(chunk)
+    floor_median, age_modes = stats.house_floor_median(), stats.age_modes()
+
+    with CsvSink(output, OUTPUT_COLUMNS) as sink:
+        for chunk in read_chunks(path, chunksize):
+            sink.write(impute(chunk, floor_median, age_modes))
+    return {'rows': sink.rows, 'house_floor_median': floor_median}
@@ -0,0 +1,124 @@
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from artifacts import file_sha256
+
+DEFAULT_CHUNKSIZE = 100_000
+
+
+def read_chunks(path, chunksize=DEFAULT_CHUNKSIZE, **kwargs):
+    """Yield DataFrames of at most `chunksize` rows; the index keeps counting across chunks."""
+    yield from pd.read_csv(path, chunksize=chunksize, **kwargs)
+
+
+class CsvSink:
+    """Appends chunks to `path` via a temp file that replaces it on close, so readers never see half a stage."""
+
+    def __init__(self, path, columns=None):
+        self.path = path
+        self.columns = columns
+        self.rows = 0
+        self._tmp = f"{path}.tmp.{os.getpid()}"
+        self._header = True
+
+    def write(self, chunk):
+        if self.columns is not None:
+            chunk = chunk.reindex(columns=self.columns)
+        chunk.to_csv(self._tmp, mode='w' if self._header else 'a', header=self._header, index=False)
+        self._header = False
+        self.rows += len(chunk)
+
+    def close(self):
+        if self._header:
+            # No rows at all: still write the header so downstream stages can read it
+            pd.DataFrame(columns=self.columns or []).to_csv(self._tmp, index=False)
+        os.replace(self._tmp, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        elif os.path.exists(self._tmp):
+            os.remove(self._tmp)
+        return False
+
+
+class RowDeduplicator:
+    """Drops rows already seen in this or an earlier chunk, tracking 8-byte row hashes only."""
+
+    def __init__(self):
+        self._seen = np.empty(0, dtype=np.uint64)
+
+    def __call__(self, chunk):
+        hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+        keep = ~pd.Series(hashes).duplicated().to_numpy() & ~np.isin(hashes, self._seen)
+        self._seen = np.union1d(self._seen, hashes[keep])
+        return chunk[keep]
+
+
+# --- Content-hash stage cache ---
+
+def stage_key(name, module, params, inputs):
+    """
+    sha256 over the stage name, the source of the module implementing it,
+    its parameters and the keys of its inputs, so editing a stage or
+    changing anything upstream invalidates it and everything downstream.
+    """
+    payload = json.dumps({
+        'stage': name,
+        'code': hashlib.sha256(inspect.getsource(module).encode()).hexdigest(),
+        'params': params,
+        'inputs': inputs,
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def input_key(path):
+    """Key of a raw input file: its content hash (None when the input is absent)."""
+    return file_sha256(path) if path and os.path.exists(path) else None
+
+
+class StageCache:
+
+    def __init__(self, cache_dir, force=False, log=None):
+        self.cache_dir = cache_dir
+        self.force = force
+        self.log = log or (lambda message: None)
+
+    def run(self, name, module, build, inputs, filename, params=None):
+        """
+        Path of the stage output, calling `build(output_path)` only when no
+        output exists for this exact content key. Returns (key, path).
+        """
+        key = stage_key(name, module, params or {}, inputs)
+        stage_dir = os.path.join(self.cache_dir, f"{name}-{key[:16]}")
+        path = os.path.join(stage_dir, filename)
+        if os.path.exists(path) and not self.force:
+            self.log(f"{name}: cached ({path})")
+            return key, path
+
+        os.makedirs(stage_dir, exist_ok=True)
+        start = time.perf_counter()
+        stats = build(path) or {}
+        stats['seconds'] = round(time.perf_counter() - start, 2)
+        self.log(f"{name}: " + ', '.join(f"{k}={v}" for k, v in stats.items()))
+        return key, path
+
+    def prune(self, keep_paths):
+        """Remove stage directories not used by the latest run."""
+        keep = {os.path.dirname(path) for path in keep_paths}
+        if not os.path.isdir(self.cache_dir):
+            return
+        for entry in os.listdir(self.cache_dir):
+            stage_dir = os.path.join(self.cache_dir, entry)
+            if os.path.isdir(stage_dir) and stage_dir not in keep:
+                shutil.rmtree(stage_dir)
@@ -0,0 +1,55 @@
+"""
+Outlier treatment. The repo ships only its output
+(gurgaon_properties_outlier_treated.csv); these rules reproduce it from
+gurgaon_properties_cleaned_v2.csv up to a handful of rows the original
+removed or patched by hand.
+"""
+import numpy as np
+
+from .io import CsvSink, read_chunks
+
+IQR_FACTOR = 1.5
+# Areas under this, on listings with an out-of-range price/sqft, were entered in sq.yd
+SQ_YARD_AREA_LIMIT = 1000
+MIN_PRICE_PER_SQFT = 500
+MAX_PRICE_PER_SQFT = 50_000
+MAX_AREA = 100_000
+MAX_BEDROOMS = 10
+# Listings with many bedrooms crammed into too little area are data-entry errors
+MIN_AREA_PER_ROOM = 250
+CRAMMED_BEDROOMS = 3
+
+
+def price_per_sqft_bounds(path, chunksize):
+    """IQR whiskers of price_per_sqft. Pass 1 keeps one float32 column in memory."""
+    values = np.concatenate([
+        chunk['price_per_sqft'].to_numpy(dtype=np.float32)
+        for chunk in read_chunks(path, chunksize, usecols=['price_per_sqft'])
+    ])
+    q1, q3 = np.nanpercentile(values, [25, 75])
+    iqr = q3 - q1
+    return q1 - IQR_FACTOR * iqr, q3 + IQR_FACTOR * iqr
+
+
+def treat_outliers(df, bounds):
+    lower, upper = bounds
+    ppsqft = df['price_per_sqft']
+    outlier = (ppsqft < lower) | (ppsqft > upper)
+    df.loc[outlier & (df['area'] < SQ_YARD_AREA_LIMIT), 'area'] *= 9
+    df.loc[outlier, 'price_per_sqft'] = (df.loc[outlier, 'price'] * 10000000 / df.loc[outlier, 'area']).round()
+
+    df = df[df['price_per_sqft'].between(MIN_PRICE_PER_SQFT, MAX_PRICE_PER_SQFT)
+            & (df['area'] < MAX_AREA) & (df['bedRoom'] <= MAX_BEDROOMS)].copy()
+    df['area_room_ratio'] = df['area'] / df['bedRoom']
+    return df[~((df['area_room_ratio'] < MIN_AREA_PER_ROOM) & (df['bedRoom'] > CRAMMED_BEDROOMS))]
+
+
+def treat_file(path, output, chunksize):
+    bounds = price_per_sqft_bounds(path, chunksize)
+    rows_in = 0
+    with CsvSink(output) as sink:
+        for chunk in read_chunks(path, chunksize):
+            rows_in += len(chunk)
+            sink.write(treat_outliers(chunk, bounds))
+    return {'rows': sink.rows, 'dropped': rows_in - sink.rows,
+            'price_per_sqft_bounds': tuple(round(float(b)) for b in bounds)}
@@ -0,0 +1,126 @@
+import argparse
+import os
+import shutil
+import time
+
+from artifacts import APP_DIR, DATA_DIR
+
+from . import categories, clean, features, impute, outliers
+from .io import DEFAULT_CHUNKSIZE, StageCache, input_key
+
+RAW_DIR = os.path.join(APP_DIR, '..', 'Datasets')
+CACHE_DIR = os.path.join(DATA_DIR, '.etl')
+# The tracked training file the models are fitted on; only written when passed as --output explicitly
+TRAINING_DATA = os.path.join(APP_DIR, '..', 'gurgaon_properties_post_feature_selection_v2.csv')
+DEFAULT_OUTPUT = os.path.join(CACHE_DIR, 'output', 'gurgaon_properties_post_feature_selection_v2.csv')
+
+# (stage, module, output filename) in run order; the filenames are the notebooks' outputs
+STAGES = [
+    ('merge', clean, 'gurgaon_properties_cleaned_v1.csv'),
+    ('features', features, 'gurgaon_properties_cleaned_v2.csv'),
+    ('outliers', outliers, 'gurgaon_properties_outlier_treated.csv'),
+    ('impute', impute, 'gurgaon_properties_missing_value_imputation.csv'),
+    ('categories', categories, 'gurgaon_properties_post_feature_selection_v2.csv'),
+]
+STAGE_NAMES = [name for name, _, _ in STAGES]
+
+
+def run(flats=None, houses=None, apartments=None, output=DEFAULT_OUTPUT, start='merge', input_path=None,
+        chunksize=DEFAULT_CHUNKSIZE, cache_dir=CACHE_DIR, force=False, prune=False, log=print):
+    """
+    Raw flats.csv/houses.csv -> post-feature-selection v2 CSV at `output`.
+
+    Every stage streams `chunksize` rows at a time and is cached under
+    `cache_dir` by a content hash of its code, parameters and inputs, so a
+    re-run only recomputes stages downstream of what changed. With `start`
+    and `input_path`, the pipeline starts from an existing intermediate file
+    (e.g. start='outliers' with gurgaon_properties_cleaned_v2.csv).
+    Returns {stage: output path}.
+    """
+    if start == 'merge':
+        # Merging one of the two exports would silently produce a much smaller dataset
+        missing = [f"{kind} ({path or 'not given'})" for kind, path in (('flats', flats), ('houses', houses))
+                   if not path or not os.path.exists(path)]
+        if missing:
+            raise FileNotFoundError(f"the merge stage needs both raw exports; missing: {', '.join(missing)}")
+    cache = StageCache(cache_dir, force, log)
+    outputs = {}
+
+    if start == 'merge':
+        cleaned = []
+        for name, path, property_type in (('clean_flats', flats, 'flat'), ('clean_houses', houses, 'house')):
+            key, out = cache.run(
+                name, clean, lambda out, path=path, kind=property_type: clean.clean_file(path, kind, out, chunksize),
+                [input_key(path)], f"{os.path.splitext(os.path.basename(path))[0]}_cleaned.csv")
+            outputs[name] = out
+            cleaned.append((key, out))
+        upstream_keys = [key for key, _ in cleaned]
+        upstream_paths = [out for _, out in cleaned]
+    else:
+        if not input_path:
+            raise ValueError(f"starting at {start!r} needs input_path")
+        upstream_keys, upstream_paths = [input_key(input_path)], [input_path]
+
+    for name, module, filename in STAGES[STAGE_NAMES.index(start):]:
+        if name == 'merge':
+            # Rebuilt when the coordinate table changes, as its locations end up in the merged file
+            import coordinate_index
+            upstream_keys = upstream_keys + [input_key(coordinate_index.INDEX_PATH)]
+            build = lambda out, paths=upstream_paths: clean.merge_files(paths, out, chunksize)
+        elif name == 'features':
+            apartments_key = input_key(apartments)
+            upstream_keys = upstream_keys + [apartments_key]
+            build = lambda out, path=upstream_paths[0]: features.engineer_file(path, out, chunksize, apartments)
+        elif name == 'outliers':
+            build = lambda out, path=upstream_paths[0]: outliers.treat_file(path, out, chunksize)
+        elif name == 'impute':
+            build = lambda out, path=upstream_paths[0]: impute.impute_file(path, out, chunksize)
+        else:
+            build = lambda out, path=upstream_paths[0]: categories.categorize_file(path, out, chunksize)
+
+        key, out = cache.run(name, module, build, upstream_keys, filename)
+        outputs[name] = out
+        upstream_keys, upstream_paths = [key], [out]
+
+    if output:
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        tmp = f"{output}.tmp.{os.getpid()}"
+        shutil.copyfile(upstream_paths[0], tmp)
+        os.replace(tmp, output)
+    if prune:
+        cache.prune(outputs.values())
+    return outputs
+
+
+def _default(filename):
+    path = os.path.join(RAW_DIR, filename)
+    return path if os.path.exists(path) else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Chunked ETL from raw 99acres exports to gurgaon_properties_post_feature_selection_v2.csv.")
+    parser.add_argument('--flats', default=os.path.join(RAW_DIR, 'flats.csv'))
+    parser.add_argument('--houses', default=os.path.join(RAW_DIR, 'houses.csv'))
+    parser.add_argument('--apartments', default=_default('appartments.csv'),
+                        help="appartments.csv, used to fill missing amenity lists")
+    parser.add_argument('--start', choices=STAGE_NAMES, default='merge',
+                        help="Start from an intermediate file given with --input")
+    parser.add_argument('--input', help="Input of the --start stage")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT,
+                        help="Final CSV (default: under the cache dir). The tracked training file, "
+                             "../gurgaon_properties_post_feature_selection_v2.csv, is only replaced when "
+                             "given here")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--force', action='store_true', help="Ignore cached stage outputs")
+    parser.add_argument('--prune', action='store_true', help="Delete cached stages not used by this run")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        outputs = run(args.flats, args.houses, args.apartments, args.output, args.start, args.input,
+                      args.chunksize, args.cache_dir, args.force, args.prune)
+    except (FileNotFoundError, ValueError) as e:
+        parser.error(str(e))
+    print(f"{len(outputs)} stages in {time.perf_counter() - start:.1f}s -> {args.output}")
@@ -0,0 +1,139 @@
+import glob
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from artifacts import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.path.join(DATA_DIR, '.figures')
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def figure_to_bytes(fig, fmt='png'):
+    """Serialize a matplotlib Figure. Renderers should build figures with
+    matplotlib.figure.Figure (not pyplot) so they are safe off the main thread."""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt, bbox_inches='tight')
+    return buffer.getvalue()
+
+
+class FigureCache:
+    """
+    On-disk cache of rendered static figures keyed by (name, style params, data version).
+
+    Files are named <name>-<params hash>-<data version>.<fmt>. When the data
+    version changes but an older render with the same name and params exists,
+    the old bytes are served immediately and the new render happens in a
+    background thread. Total size is capped by evicting least recently used files.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, fmt='png'):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.fmt = fmt
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='figure-cache')
+        self._pending = set()
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def _params_hash(params):
+        encoded = json.dumps(params or {}, sort_keys=True, default=str).encode()
+        return hashlib.sha256(encoded).hexdigest()[:16]
+
+    def _path(self, name, params_hash, data_version):
+        return os.path.join(self.cache_dir, f'{name}-{params_hash}-{data_version}.{self.fmt}')
+
+    def _read(self, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        os.utime(path)  # mtime doubles as the LRU clock
+        return data
+
+    def _write(self, path, data):
+        tmp = f'{path}.tmp.{os.getpid()}.{threading.get_ident()}'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+        self._evict()
+
+    def _evict(self):
+        files = []
+        for path in glob.glob(os.path.join(self.cache_dir, f'*.{self.fmt}')):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def _render(self, path, render):
+        data = figure_to_bytes(render(), self.fmt)
+        self._write(path, data)
+        return data
+
+    def _render_in_background(self, path, render):
+        with self._lock:
+            if path in self._pending:
+                return
+            self._pending.add(path)
+
+        def job():
+            try:
+                self._render(path, render)
+            except Exception:
+                logger.exception("background render failed for %s", path)
+            finally:
+                with self._lock:
+                    self._pending.discard(path)
+
+        self._executor.submit(job)
+
+    def get(self, name, data_version, render, params=None):
+        """
+        Rendered bytes for `name`. `render` is a zero-argument callable returning
+        a matplotlib Figure and is only called on a cache miss.
+        """
+        params_hash = self._params_hash(params)
+        path = self._path(name, params_hash, data_version)
+        if os.path.exists(path):
+            return self._read(path)
+
+        stale = glob.glob(self._path(name, params_hash, '*'))
+        if stale:
+            try:
+                data = self._read(max(stale, key=os.path.getmtime))
+            except FileNotFoundError:
+                return self._render(path, render)  # evicted between glob and read
+            self._render_in_background(path, render)
+            return data
+
+        return self._render(path, render)
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_cache():
+    """Process-wide FigureCache under datasets/.figures."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = FigureCache()
+    return _default_cache
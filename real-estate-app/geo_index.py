@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import BallTree
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+class GeoIndex:
+    """
+    Haversine BallTree over society coordinates. Answers radius and k-nearest
+    queries from any (lat, lon) origin, singly or for many origins at once.
+    """
+
+    def __init__(self, places, coordinates=None):
+        # places: DataFrame with 'society', 'sector', 'latitude', 'longitude';
+        # coordinates: a coordinate_index.CoordinateIndex for sectors without listings
+        self.places = places.reset_index(drop=True)
+        self.coordinates = coordinates
+        coords = np.radians(self.places[['latitude', 'longitude']].to_numpy(dtype=np.float64))
+        self._tree = BallTree(coords, metric='haversine')
+        self._society = self.places['society'].to_numpy()
+        self._sector = self.places['sector'].to_numpy()
+        self._sector_coords = self.places.groupby('sector', observed=True)[['latitude', 'longitude']].mean()
+
+    @classmethod
+    def from_data_viz(cls, df, coordinates=None):
+        """
+        Build from the data_viz1.csv frame: one point per (society, sector).
+        Rows without coordinates are located through the offline coordinate
+        index (`coordinates`, default the shared one) rather than dropped.
+        """
+        missing = df['latitude'].isna() | df['longitude'].isna()
+        if missing.any():
+            if coordinates is None:
+                import coordinate_index
+                coordinates = coordinate_index.get_index()
+            located = coordinates.attach(df.loc[missing, ['society', 'sector']])
+            df = df.copy()
+            df.loc[missing, ['latitude', 'longitude']] = located[['latitude', 'longitude']].to_numpy()
+            df = df.dropna(subset=['latitude', 'longitude'])
+        places = (df.groupby(['society', 'sector'], as_index=False, observed=True)[['latitude', 'longitude']]
+                  .first())
+        return cls(places, coordinates)
+
+    @property
+    def sectors(self):
+        return self._sector_coords.index.tolist()
+
+    def sector_origin(self, sector):
+        """(lat, lon) searched from: the listings' mean, else the coordinate index's sector location."""
+        if sector in self._sector_coords.index:
+            lat, lon = self._sector_coords.loc[sector]
+            return float(lat), float(lon)
+        if self.coordinates is None:
+            import coordinate_index
+            self.coordinates = coordinate_index.get_index()
+        origin = self.coordinates.sector(sector)
+        if origin is None:
+            raise KeyError(sector)
+        return origin
+
+    @staticmethod
+    def _to_radians(origins):
+        return np.radians(np.atleast_2d(np.asarray(origins, dtype=np.float64)))
+
+    def _result_frame(self, indices, distances):
+        return pd.DataFrame({
+            'society': self._society[indices],
+            'sector': self._sector[indices],
+            'distance_km': distances * EARTH_RADIUS_KM,
+        })
+
+    def radius_many(self, origins, radius_km):
+        """One result frame per (lat, lon) origin, sorted by distance."""
+        indices, distances = self._tree.query_radius(
+            self._to_radians(origins), r=radius_km / EARTH_RADIUS_KM,
+            return_distance=True, sort_results=True)
+        return [self._result_frame(idx, dist) for idx, dist in zip(indices, distances)]
+
+    def nearest_many(self, origins, k=10):
+        """The k closest places for each (lat, lon) origin, sorted by distance."""
+        k = min(k, len(self.places))
+        distances, indices = self._tree.query(self._to_radians(origins), k=k)
+        return [self._result_frame(idx, dist) for idx, dist in zip(indices, distances)]
+
+    def radius(self, lat, lon, radius_km):
+        return self.radius_many([(lat, lon)], radius_km)[0]
+
+    def nearest(self, lat, lon, k=10):
+        return self.nearest_many([(lat, lon)], k)[0]
+
+
+def landmark_radius(distances, landmark, radius_km):
+    """
+    Places within `radius_km` of a landmark column of location_df (a
+    MappedMatrix of metres from each property to the airport, metro
+    stations, ...), in the same layout as GeoIndex.radius. Those distances
+    are precomputed, so no coordinates are needed; the sector is not known.
+    """
+    km = np.asarray(distances.column(landmark), dtype=np.float64) / 1000
+    within = np.flatnonzero(km < radius_km)
+    order = within[np.argsort(km[within], kind='stable')]
+    return pd.DataFrame({
+        'society': distances.rows[order].to_numpy(),
+        'sector': None,
+        'distance_km': km[order],
+    })
@@ -0,0 +1,167 @@
+import bisect
+import contextlib
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# REAL_ESTATE_METRICS=0 turns every span into a shared no-op context manager and observe() into a no-op
+ENABLED = os.environ.get('REAL_ESTATE_METRICS', '1') not in ('0', 'false', 'False', '')
+EXPORTER_PORT = os.environ.get('REAL_ESTATE_METRICS_PORT')
+JSON_LOG_PATH = os.environ.get('REAL_ESTATE_METRICS_LOG')
+
+# Upper bounds in seconds, Prometheus style (+Inf is implicit)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_NOOP = contextlib.nullcontext()
+
+
+class Histogram:
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+_histograms = {}
+_lock = threading.Lock()
+
+
+def observe(page, stage, seconds):
+    if not ENABLED:
+        return
+    key = (page, stage)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram()
+        histogram.observe(seconds)
+
+
+class _Span:
+    __slots__ = ('page', 'stage', 'start')
+
+    def __init__(self, page, stage):
+        self.page = page
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.page, self.stage, time.perf_counter() - self.start)
+        return False
+
+
+def span(page, stage):
+    """`with span('analysis', 'load'):` times the block into the (page, stage) histogram."""
+    if not ENABLED:
+        return _NOOP
+    return _Span(page, stage)
+
+
+def snapshot():
+    with _lock:
+        return {key: (list(h.counts), h.sum, h.count) for key, h in _histograms.items()}
+
+
+def prometheus_text():
+    """All histograms in the Prometheus text exposition format."""
+    lines = [
+        '# HELP real_estate_stage_seconds Time spent per page and stage.',
+        '# TYPE real_estate_stage_seconds histogram',
+    ]
+    for (page, stage), (counts, total, count) in sorted(snapshot().items()):
+        labels = f'page="{page}",stage="{stage}"'
+        cumulative = 0
+        for bound, bucket_count in zip(BUCKETS, counts):
+            cumulative += bucket_count
+            lines.append(f'real_estate_stage_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'real_estate_stage_seconds_bucket{{{labels},le="+Inf"}} {count}')
+        lines.append(f'real_estate_stage_seconds_sum{{{labels}}} {total}')
+        lines.append(f'real_estate_stage_seconds_count{{{labels}}} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+def json_snapshot():
+    return {
+        'timestamp': time.time(),
+        'buckets': list(BUCKETS),
+        'stages': [
+            {'page': page, 'stage': stage, 'counts': counts, 'sum': total, 'count': count}
+            for (page, stage), (counts, total, count) in sorted(snapshot().items())
+        ],
+    }
+
+
+def append_json_log(path=JSON_LOG_PATH):
+    """Append one JSON line with the current histograms to `path`."""
+    if not path:
+        return
+    with open(path, 'a') as f:
+        f.write(json.dumps(json_snapshot()) + '\n')
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path == '/metrics':
+            body, content_type = prometheus_text().encode(), 'text/plain; version=0.0.4'
+        elif self.path == '/metrics.json':
+            body, content_type = json.dumps(json_snapshot()).encode(), 'application/json'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def start_exporter(port=EXPORTER_PORT, host='127.0.0.1'):
+    """Serve /metrics (Prometheus) and /metrics.json from a daemon thread, once per process."""
+    global _exporter
+    if not ENABLED or not port:
+        return None
+    with _exporter_lock:
+        if _exporter is None:
+            try:
+                _exporter = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+            except OSError:
+                # Another replica on this host already owns the port; don't retry every rerun
+                _exporter = False
+                return None
+            _exporter.daemon_threads = True
+            threading.Thread(target=_exporter.serve_forever, name='metrics-exporter', daemon=True).start()
+    return _exporter or None
+
+
+_last_flush = [0.0]
+
+
+def page_done(interval=60.0):
+    """Call at the end of a page run: starts the exporter and appends to the JSON log at most every `interval` s."""
+    if not ENABLED:
+        return
+    start_exporter()
+    now = time.monotonic()
+    if JSON_LOG_PATH and now - _last_flush[0] >= interval:
+        _last_flush[0] = now
+        append_json_log()
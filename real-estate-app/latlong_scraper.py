@@ -1,36 +1,349 @@
-import requests
-from bs4 import BeautifulSoup
+import argparse
+import asyncio
+import http.client
+import json
+import logging
+import os
+import random
+import threading
+import time
+import urllib.parse
+
 import pandas as pd
 
-# Base URL for Google Search
-BASE_URL = "https://www.google.com/search?q="
+from artifacts import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = os.path.join(DATA_DIR, '.geocode_cache.jsonl')
+USER_AGENT = "real-estate-app-geocoder/1.0"
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RATE = 1.0  # requests per second; Nominatim's usage policy allows one
+DEFAULT_RETRIES = 4
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+NOMINATIM_URL = 'https://nominatim.openstreetmap.org'
+NOMINATIM_SUFFIX = ', Gurgaon, Haryana, India'
+
+
+class GeocodeError(Exception):
+    pass
+
+
+# --- Providers ---
+
+class Provider:
+    """Turns a query into a request URL and a response body into (lat, lon) or None."""
+
+    name = 'provider'
+
+    @property
+    def cache_namespace(self):
+        """Prefix of this provider's cache keys; answers from different endpoints must not mix."""
+        return self.name
+
+    def url(self, query):
+        raise NotImplementedError
+
+    def parse(self, body):
+        raise NotImplementedError
+
+
+class NominatimProvider(Provider):
+    """OpenStreetMap Nominatim search API (or anything speaking its JSON format, e.g. a local stub)."""
+
+    name = 'nominatim'
+
+    def __init__(self, base_url=NOMINATIM_URL, suffix=NOMINATIM_SUFFIX):
+        self.base_url = base_url.rstrip('/')
+        self.suffix = suffix
+
+    @property
+    def cache_namespace(self):
+        # The public endpoint keeps the plain name, so caches written before stay valid
+        if self.base_url == NOMINATIM_URL and self.suffix == NOMINATIM_SUFFIX:
+            return self.name
+        return f"{self.name}@{self.base_url}|{self.suffix}"
+
+    def url(self, query):
+        params = urllib.parse.urlencode({'q': query + self.suffix, 'format': 'json', 'limit': 1})
+        return f"{self.base_url}/search?{params}"
+
+    def parse(self, body):
+        results = json.loads(body)
+        if not results:
+            return None
+        return float(results[0]['lat']), float(results[0]['lon'])
+
+
+# --- Transport ---
+
+class ConnectionPool:
+    """Keep-alive http.client connections per host, shared by the worker threads."""
+
+    def __init__(self, size=DEFAULT_CONCURRENCY, timeout=10.0):
+        self.size = size
+        self.timeout = timeout
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def _acquire(self, scheme, netloc):
+        with self._lock:
+            idle = self._idle.get((scheme, netloc))
+            if idle:
+                return idle.pop()
+        cls = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+        return cls(netloc, timeout=self.timeout)
+
+    def _release(self, scheme, netloc, conn):
+        with self._lock:
+            idle = self._idle.setdefault((scheme, netloc), [])
+            if len(idle) < self.size:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def get(self, url, headers):
+        """Blocking GET returning (status, headers, body)."""
+        parts = urllib.parse.urlsplit(url)
+        path = parts.path or '/'
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        conn = self._acquire(parts.scheme, parts.netloc)
+        try:
+            conn.request('GET', path, headers=headers)
+            response = conn.getresponse()
+            body = response.read()
+        except Exception:
+            conn.close()
+            raise
+        if response.will_close:
+            conn.close()
+        else:
+            self._release(parts.scheme, parts.netloc, conn)
+        return response.status, dict(response.getheaders()), body
+
+    def close(self):
+        with self._lock:
+            for idle in self._idle.values():
+                for conn in idle:
+                    conn.close()
+            self._idle.clear()
+
+
+class RateLimiter:
+    """Token bucket shared by all tasks of one geocoder."""
+
+    def __init__(self, rate=DEFAULT_RATE, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.rate:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._updated = time.monotonic()
+                self._tokens = 1
+            self._tokens -= 1
+
+
+# --- Cache ---
+
+class GeocodeCache:
+    """
+    Append-only JSON-lines cache of resolved queries. "Not found" answers are
+    cached too, so nothing a provider has answered is ever fetched again;
+    failed lookups are not cached and are retried on the next run.
+    """
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self._entries = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries[entry['key']] = entry['coords']
+
+    @staticmethod
+    def key(provider, query):
+        return f"{provider.cache_namespace}:{' '.join(query.lower().split())}"
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        coords = self._entries.get(key)
+        return tuple(coords) if coords else None
+
+    def put(self, key, coords):
+        self._entries[key] = list(coords) if coords else None
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'a') as f:
+            f.write(json.dumps({'key': key, 'coords': self._entries[key], 'at': time.time()}) + '\n')
+
+
+# --- Geocoder ---
+
+class Geocoder:
+    """
+    Resolves queries through `provider` with at most `concurrency` requests
+    in flight, no more than `rate` requests per second, and exponential
+    backoff (honouring Retry-After) on connection errors, 429 and 5xx.
+    """
+
+    def __init__(self, provider=None, cache=None, concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE,
+                 retries=DEFAULT_RETRIES, backoff=0.5, max_backoff=30.0, pool=None):
+        self.provider = provider or NominatimProvider()
+        self.cache = cache if cache is not None else GeocodeCache()
+        self.concurrency = concurrency
+        self.rate = rate
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.pool = pool or ConnectionPool(concurrency)
+        self.requests = 0
+
+    def _delay(self, attempt, retry_after):
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_backoff)
+            except ValueError:
+                pass
+        return min(self.backoff * 2 ** attempt * (1 + random.random()), self.max_backoff)
+
+    async def _fetch(self, query, limiter):
+        url = self.provider.url(query)
+        headers = {'User-Agent': USER_AGENT, 'Accept': 'application/json'}
+        for attempt in range(self.retries + 1):
+            await limiter.acquire()
+            retry_after = None
+            self.requests += 1
+            try:
+                status, response_headers, body = await asyncio.to_thread(self.pool.get, url, headers)
+            except (OSError, http.client.HTTPException) as e:
+                error = GeocodeError(f"{query!r}: {type(e).__name__}: {e}")
+            else:
+                if status == 200:
+                    try:
+                        return self.provider.parse(body)
+                    except (ValueError, KeyError, IndexError, TypeError) as e:
+                        # e.g. an HTML error page or truncated JSON served with 200; not retried
+                        raise GeocodeError(f"{query!r}: unreadable response ({type(e).__name__}: {e})") from e
+                if status == 404:
+                    return None
+                error = GeocodeError(f"{query!r}: HTTP {status}")
+                if status not in RETRY_STATUSES:
+                    raise error
+                retry_after = response_headers.get('Retry-After')
+            if attempt < self.retries:
+                await asyncio.sleep(self._delay(attempt, retry_after))
+        raise error
+
+    async def geocode_many(self, queries, on_result=None):
+        """{query: (lat, lon) or None}; cached queries never reach the provider, failures are logged and omitted."""
+        results = {}
+        pending = []
+        for query in dict.fromkeys(queries):
+            key = self.cache.key(self.provider, query)
+            if key in self.cache:
+                results[query] = self.cache.get(key)
+            else:
+                pending.append((query, key))
+
+        limiter = RateLimiter(self.rate)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def resolve(query, key):
+            async with semaphore:
+                try:
+                    coords = await self._fetch(query, limiter)
+                except GeocodeError as e:
+                    logger.warning("geocoding failed: %s", e)
+                    return
+            self.cache.put(key, coords)
+            results[query] = coords
+            if on_result is not None:
+                on_result(query, coords)
+
+        # One query failing in an unexpected way must not abort the others
+        outcomes = await asyncio.gather(*(resolve(query, key) for query, key in pending), return_exceptions=True)
+        for (query, _), outcome in zip(pending, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error("geocoding %r failed: %s: %s", query, type(outcome).__name__, outcome)
+        return results
+
+    def geocode(self, queries, on_result=None):
+        """Blocking wrapper around geocode_many."""
+        return asyncio.run(self.geocode_many(queries, on_result))
+
+    def close(self):
+        self.pool.close()
+
+
+def format_coordinates(coords):
+    """(28.4160, 76.9914) -> '28.4160° N, 76.9914° E', the format of Datasets/latlong.csv."""
+    if coords is None:
+        return None
+    lat, lon = coords
+    return f"{abs(lat):.4f}° {'N' if lat >= 0 else 'S'}, {abs(lon):.4f}° {'E' if lon >= 0 else 'W'}"
+
+
+def sector_queries(first=1, last=115):
+    return [f"sector {n}" for n in range(first, last + 1)]
+
 
-# Headers to simulate a real browser visit
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-}
+def society_queries(csv_path):
+    """'<society>, <sector>' for every distinct society in data_viz1.csv-like files."""
+    df = pd.read_csv(csv_path, usecols=['society', 'sector']).dropna().drop_duplicates()
+    return (df['society'].str.strip() + ', ' + df['sector'].str.strip()).tolist()
 
 
-# Function to scrape latitude and longitude
-def get_coordinates(sector):
-    search_term = f"sector {sector} gurgaon longitude & latitude"
-    response = requests.get(BASE_URL + search_term, headers=HEADERS)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Geocode Gurgaon sectors (and optionally societies).")
+    parser.add_argument('--output', default='gurgaon_sectors_coordinates.csv')
+    parser.add_argument('--sectors', default='1-115', help="Sector range, e.g. 1-115")
+    parser.add_argument('--societies', help="Also geocode the societies in this CSV (e.g. data_viz1.csv)")
+    parser.add_argument('--provider-url', default=NOMINATIM_URL,
+                        help="Nominatim-compatible endpoint (cached separately from the public one)")
+    parser.add_argument('--cache', default=CACHE_PATH)
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE, help="Requests per second (0 = unlimited)")
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
 
-    if response.status_code == 200:
-        soup = BeautifulSoup(response.content, 'html.parser')
-        coordinates_div = soup.find("div", class_="Z0LcW t2b5Cf")
-        if coordinates_div:
-            return coordinates_div.text
-    return None
+    first, last = (int(n) for n in args.sectors.split('-'))
+    queries = sector_queries(first, last)
+    if args.societies:
+        queries += society_queries(args.societies)
 
+    geocoder = Geocoder(NominatimProvider(args.provider_url), GeocodeCache(args.cache),
+                        args.concurrency, args.rate, args.retries)
+    start = time.perf_counter()
+    try:
+        results = geocoder.geocode(queries, on_result=lambda q, c: logger.info("%s: %s", q, format_coordinates(c)))
+    finally:
+        geocoder.close()
 
-# Create a DataFrame
-df = pd.DataFrame(columns=["Sector", "Coordinates"])
+    names = [query for query in queries if query in results]
+    pd.DataFrame({
+        'sector': names,
+        'coordinates': [format_coordinates(results[name]) for name in names],
+    }).to_csv(args.output, index=False)
+    logger.info("%d/%d resolved (%d requests) in %.1fs -> %s", len(names), len(queries), geocoder.requests,
+                time.perf_counter() - start, args.output)
 
-# Iterate over sectors and fetch coordinates
-for sector in range(1, 116):
-    coordinates = get_coordinates(sector)
-    df = df.append({"Sector": f"Sector {sector}", "Coordinates": coordinates}, ignore_index=True)
 
-# Save DataFrame
-df.to_csv("gurgaon_sectors_coordinates.csv", index=False)
+if __name__ == '__main__':
+    main()
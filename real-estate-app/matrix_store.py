@@ -0,0 +1,116 @@
+import argparse
+import json
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+# --- On-disk layout ---
+# <name>.npy        raw matrix (float32 or float16), opened with mmap_mode='r'
+# <name>.index.json {"rows": [...], "columns": [...] | null}
+
+SIMILARITY_MATRICES = ['cosine_sim1', 'cosine_sim2', 'cosine_sim3']
+DISTANCE_MATRICES = ['location_df', 'location_distance']
+
+
+class MappedMatrix:
+    """
+    A 2-D matrix plus its row/column labels. When opened from disk the values
+    are a read-only memory map, so every process on the host shares the same
+    page-cached copy and slicing reads only the touched rows.
+    """
+
+    def __init__(self, values, rows, columns=None):
+        self.values = values
+        self.rows = pd.Index(rows)
+        self.columns = pd.Index(columns) if columns is not None else None
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def __getitem__(self, key):
+        return self.values[key]
+
+    def row(self, name):
+        return self.values[self.rows.get_loc(name)]
+
+    def column(self, name):
+        return self.values[:, self.columns.get_loc(name)]
+
+    def to_frame(self):
+        return pd.DataFrame(self.values, index=self.rows, columns=self.columns, copy=False)
+
+    @classmethod
+    def from_object(cls, obj, rows=None):
+        """Wrap an unpickled DataFrame or ndarray (rows default to 0..n-1)."""
+        if isinstance(obj, pd.DataFrame):
+            return cls(obj.to_numpy(), obj.index, obj.columns)
+        values = np.asarray(obj)
+        return cls(values, rows if rows is not None else range(values.shape[0]))
+
+
+def matrix_paths(data_dir, name):
+    return os.path.join(data_dir, f'{name}.npy'), os.path.join(data_dir, f'{name}.index.json')
+
+
+def export_matrix(matrix, data_dir, name, dtype='float32'):
+    """Write a MappedMatrix as <name>.npy plus its label sidecar."""
+    values_path, index_path = matrix_paths(data_dir, name)
+    values = np.ascontiguousarray(matrix.values, dtype=dtype)
+
+    tmp = f'{values_path}.tmp.npy'
+    np.save(tmp, values)
+    os.replace(tmp, values_path)
+
+    sidecar = {
+        'rows': [str(r) for r in matrix.rows],
+        'columns': [str(c) for c in matrix.columns] if matrix.columns is not None else None,
+        'dtype': str(values.dtype),
+    }
+    with open(index_path, 'w') as f:
+        json.dump(sidecar, f)
+    return values_path
+
+
+def open_matrix(data_dir, name):
+    """Open an exported matrix as a read-only memory map, or None if it was never exported."""
+    values_path, index_path = matrix_paths(data_dir, name)
+    if not os.path.exists(values_path):
+        return None
+    with open(index_path) as f:
+        sidecar = json.load(f)
+    return MappedMatrix(np.load(values_path, mmap_mode='r'), sidecar['rows'], sidecar['columns'])
+
+
+def export_all(data_dir, dtype='float32'):
+    """Convert the pickled similarity/distance matrices in `data_dir` to mmap-able .npy files."""
+    def load(name):
+        with open(os.path.join(data_dir, f'{name}.pkl'), 'rb') as f:
+            return pickle.load(f)
+
+    location_df = load('location_df')
+    exported = []
+    for name in SIMILARITY_MATRICES + DISTANCE_MATRICES:
+        if not os.path.exists(os.path.join(data_dir, f'{name}.pkl')):
+            continue
+        obj = location_df if name == 'location_df' else load(name)
+        # The cosine matrices are bare ndarrays aligned with location_df's index
+        matrix = MappedMatrix.from_object(obj, rows=location_df.index)
+        exported.append(export_matrix(matrix, data_dir, name, dtype))
+    return exported
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export similarity/distance pickles to memory-mapped .npy files.")
+    parser.add_argument('--data-dir', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'datasets'))
+    parser.add_argument('--dtype', choices=['float32', 'float16'], default='float32')
+    args = parser.parse_args(argv)
+
+    for path in export_all(args.data_dir, args.dtype):
+        print(f"wrote {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,254 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from artifacts import APP_DIR, file_sha256
+from batch_predict import furnishing_labels
+
+DEFAULT_DATA = os.path.join(APP_DIR, '..', 'gurgaon_properties_post_feature_selection_v2.csv')
+DEFAULT_WORK_DIR = os.path.join(APP_DIR, 'model_selection')
+N_SPLITS = 10
+RANDOM_STATE = 42
+# Part of the fold cache key; bump when load_training_data or the fold layout changes
+FOLD_FORMAT = 2
+
+COLUMNS_TO_ENCODE = ['property_type', 'sector', 'balcony', 'agePossession', 'furnishing_type',
+                     'luxury_category', 'floor_category']
+NUMERIC_COLUMNS = ['bedRoom', 'bathroom', 'built_up_area', 'servant room', 'store room']
+
+
+def make_preprocessor():
+    # Same ColumnTransformer as the final pipeline in model-selection.ipynb (unknown categories raise)
+    from sklearn.compose import ColumnTransformer
+    from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder, StandardScaler
+
+    return ColumnTransformer(
+        transformers=[
+            ('num', StandardScaler(), NUMERIC_COLUMNS),
+            ('cat', OrdinalEncoder(), COLUMNS_TO_ENCODE),
+            ('cat1', OneHotEncoder(drop='first', sparse_output=False), ['sector', 'agePossession'])
+        ],
+        remainder='passthrough'
+    )
+
+
+def _xgboost():
+    from xgboost import XGBRegressor
+    return XGBRegressor()
+
+
+def model_factories():
+    """The candidates compared in model-selection.ipynb, built lazily by name."""
+    from sklearn.ensemble import (AdaBoostRegressor, ExtraTreesRegressor, GradientBoostingRegressor,
+                                  RandomForestRegressor)
+    from sklearn.linear_model import Lasso, LinearRegression, Ridge
+    from sklearn.neural_network import MLPRegressor
+    from sklearn.svm import SVR
+    from sklearn.tree import DecisionTreeRegressor
+
+    return {
+        'linear_reg': LinearRegression,
+        'svr': SVR,
+        'ridge': Ridge,
+        'LASSO': Lasso,
+        'decision tree': DecisionTreeRegressor,
+        'random forest': RandomForestRegressor,
+        'extra trees': ExtraTreesRegressor,
+        'gradient boosting': GradientBoostingRegressor,
+        'adaboost': AdaBoostRegressor,
+        'mlp': MLPRegressor,
+        'xgboost': _xgboost,
+    }
+
+
+def load_training_data(path=DEFAULT_DATA):
+    """(X, log price) as model-selection.ipynb prepares them: furnishing_type codes become its labels."""
+    df = pd.read_csv(path)
+    X = df.drop(columns=['price'])
+    X['furnishing_type'] = furnishing_labels(X['furnishing_type'])
+    y = np.log1p(df['price'])
+    return X, y
+
+
+# --- Fold cache ---
+# Each fold's preprocessed train/test matrices are written once as .npz and
+# shared by every candidate model (and every later run on the same data).
+
+def fold_cache_key(data_path, n_splits=N_SPLITS):
+    spec = repr(make_preprocessor().get_params(deep=True)) + f'|{n_splits}|{RANDOM_STATE}|{FOLD_FORMAT}'
+    digest = hashlib.sha256((file_sha256(data_path) + spec).encode()).hexdigest()
+    return digest[:16]
+
+
+def build_fold_cache(data_path, cache_dir, n_splits=N_SPLITS):
+    """Paths of the per-fold .npz files, transforming only folds that are not cached yet."""
+    from sklearn.model_selection import KFold
+
+    key = fold_cache_key(data_path, n_splits)
+    fold_dir = os.path.join(cache_dir, 'folds', key)
+    paths = [os.path.join(fold_dir, f'fold{i}.npz') for i in range(n_splits)]
+    if all(os.path.exists(p) for p in paths):
+        return key, paths
+
+    os.makedirs(fold_dir, exist_ok=True)
+    X, y = load_training_data(data_path)
+    kfold = KFold(n_splits=n_splits, shuffle=True, random_state=RANDOM_STATE)
+    for path, (train_idx, test_idx) in zip(paths, kfold.split(X)):
+        if os.path.exists(path):
+            continue
+        preprocessor = make_preprocessor()
+        X_train = preprocessor.fit_transform(X.iloc[train_idx])
+        X_test = preprocessor.transform(X.iloc[test_idx])
+        tmp = f'{path}.tmp.npz'
+        np.savez(tmp, X_train=X_train.astype(np.float64), y_train=y.iloc[train_idx].to_numpy(),
+                 X_test=X_test.astype(np.float64), y_test=y.iloc[test_idx].to_numpy())
+        os.replace(tmp, path)
+    return key, paths
+
+
+def model_signature(model):
+    """Estimator class and constructor params: what a leaderboard entry was scored with."""
+    return {
+        'estimator': f'{type(model).__module__}.{type(model).__qualname__}',
+        'params': {k: repr(v) for k, v in sorted(model.get_params().items())},
+    }
+
+
+# --- Evaluation (runs in worker processes) ---
+
+def evaluate_model(name, fold_paths):
+    from sklearn.metrics import mean_absolute_error, r2_score
+
+    model = model_factories()[name]()
+    r2_scores, maes, fit_seconds, predict_seconds = [], [], 0.0, 0.0
+    for path in fold_paths:
+        with np.load(path) as fold:
+            X_train, y_train, X_test, y_test = fold['X_train'], fold['y_train'], fold['X_test'], fold['y_test']
+
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        y_pred = model.predict(X_test)
+        predict_seconds += time.perf_counter() - start
+
+        r2_scores.append(r2_score(y_test, y_pred))
+        maes.append(mean_absolute_error(np.expm1(y_test), np.expm1(y_pred)))
+
+    return {
+        'model': name,
+        **model_signature(model),
+        'r2': float(np.mean(r2_scores)),
+        'r2_std': float(np.std(r2_scores)),
+        'mae': float(np.mean(maes)),
+        'fit_seconds': round(fit_seconds, 3),
+        'predict_seconds': round(predict_seconds, 4),
+        'folds': len(fold_paths),
+    }
+
+
+# --- Leaderboard ---
+
+def read_leaderboard(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def append_leaderboard(path, entry):
+    with open(path, 'a') as f:
+        f.write(json.dumps(entry) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def leaderboard_frame(entries, fold_key=None):
+    """One row per model and fold set, its latest entry (--force runs append rather than rewrite)."""
+    df = pd.DataFrame([e for e in entries if fold_key is None or e.get('fold_key') == fold_key])
+    if df.empty:
+        return df
+    df = df.drop_duplicates(['model', 'fold_key'], keep='last')
+    columns = ['model', 'r2', 'mae', 'fit_seconds', 'predict_seconds']
+    return df[columns].sort_values('mae').reset_index(drop=True)
+
+
+def _resume_key(entry):
+    return entry['model'], entry.get('estimator'), json.dumps(entry.get('params'), sort_keys=True)
+
+
+def _current_key(name, factory):
+    # None (never done) when the model cannot even be built here; the worker reports why
+    try:
+        return _resume_key({'model': name, **model_signature(factory())})
+    except Exception:
+        return None
+
+
+def run(data_path=DEFAULT_DATA, models=None, work_dir=DEFAULT_WORK_DIR, workers=None, force=False,
+        n_splits=N_SPLITS, on_result=None):
+    """
+    Cross-validate `models` (default: all candidates) in a process pool.
+    Models already on the leaderboard for the same data, folds, estimator
+    and params are skipped unless `force`, so re-runs only pay for new or
+    changed candidates. Returns the leaderboard.
+    """
+    os.makedirs(work_dir, exist_ok=True)
+    leaderboard_path = os.path.join(work_dir, 'leaderboard.jsonl')
+    fold_key, fold_paths = build_fold_cache(data_path, work_dir, n_splits)
+
+    factories = model_factories()
+    names = models or list(factories)
+    done = {_resume_key(e) for e in read_leaderboard(leaderboard_path) if e.get('fold_key') == fold_key}
+    pending = [name for name in names if force or _current_key(name, factories.get(name)) not in done]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(evaluate_model, name, fold_paths): name for name in pending}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                entry = future.result()
+            except Exception as e:
+                entry = {'model': name, 'error': f'{type(e).__name__}: {e}'}
+            entry['fold_key'] = fold_key
+            if 'error' not in entry:
+                append_leaderboard(leaderboard_path, entry)
+            if on_result is not None:
+                on_result(entry)
+
+    return leaderboard_frame(read_leaderboard(leaderboard_path), fold_key)
+
+
+def _print_result(entry):
+    if 'error' in entry:
+        print(f"{entry['model']:<20} failed: {entry['error']}")
+    else:
+        print(f"{entry['model']:<20} r2={entry['r2']:.4f} mae={entry['mae']:.4f} "
+              f"fit={entry['fit_seconds']:.2f}s predict={entry['predict_seconds']:.3f}s", flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parallel, resumable model selection with cached CV folds.")
+    parser.add_argument('--data', default=DEFAULT_DATA)
+    parser.add_argument('--models', nargs='+', help="Subset of candidate names (default: all)")
+    parser.add_argument('--work-dir', default=DEFAULT_WORK_DIR, help="Fold cache and leaderboard location")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument('--folds', type=int, default=N_SPLITS)
+    parser.add_argument('--force', action='store_true', help="Re-evaluate models already on the leaderboard")
+    args = parser.parse_args(argv)
+
+    leaderboard = run(args.data, args.models, args.work_dir, args.workers, args.force, args.folds,
+                      on_result=_print_result)
+    print()
+    print(leaderboard.to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,10 @@
+import time
 import streamlit as st
-import pickle
 import pandas as pd
 import numpy as np
+from instrumentation import observe, page_done, span
+
+_page_start = time.perf_counter()
 
 # --- Page Config ---
 st.set_page_config(page_title="🏠 House Price Predictor", layout="centered")
@@ -43,28 +46,19 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# import pickle
-from huggingface_hub import hf_hub_download
-import pickle
-
-# Download the model file from Hugging Face
-model_path = hf_hub_download(repo_id="sagar4860/house-prediction", filename="pipeline.pkl")
-
-# Load the pickle model
-with open(model_path, "rb") as f:
-    pipeline = pickle.load(f)
+# --- Load Model & Data ---
+# Loaded once per process; the model resolves from the local cache before the hub
+# and swaps to a newly published version on a later rerun. When artifact_host.py
+# runs on the machine, the model and df.pkl are attached from its shared memory
+import artifacts
+import prediction_cache
+import price_intervals
+import whatif
 
-# --- Load Data ---
-import os
-import pickle
-
-# Define base and dataset paths
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATA_DIR = os.path.join(BASE_DIR, '..', 'datasets')
-
-# Load data using full path
-with open(os.path.join(DATA_DIR, 'df.pkl'), 'rb') as file:
-    df = pickle.load(file)
+with span('price_predictor', 'load'):
+    pipeline, model_version = artifacts.current_model(shared=True)
+    df = artifacts.load('df.pkl')
+    price_cache = prediction_cache.get_cache()
 
 # --- Header ---
 st.markdown("## 🏡 Real Estate Price Estimator")
@@ -102,12 +96,52 @@ if submitted:
                'agePossession', 'built_up_area', 'servant room', 'store room',
                'furnishing_type', 'luxury_category', 'floor_category']
     one_df = pd.DataFrame(data, columns=columns)
+    # Kept across reruns so the what-if explorer below survives its own widget changes
+    st.session_state['whatif_base'] = one_df.iloc[0].to_dict()
 
     try:
-        base_price = np.expm1(pipeline.predict(one_df))[0]
-        low = round(base_price - 0.22, 2)
-        high = round(base_price + 0.22, 2)
+        with span('price_predictor', 'predict'):
+            base_price = price_cache.predict(pipeline, one_df, model_version)[0]
+        # Calibrated per property type and price band; models published without intervals keep ±0.22 Cr
+        low, high = price_intervals.bounds(pipeline, [base_price], [property_type])
+        low, high = round(float(low[0]), 2), round(float(high[0]), 2)
 
         st.success(f"💰 The estimated price range is between **₹{low} Cr** and **₹{high} Cr**")
     except Exception as e:
         st.error(f"⚠️ Prediction failed: {e}")
+
+# --- What-if Explorer ---
+# Every variation of the submitted property is priced in one vectorized predict call
+WHATIF_SWEEPS = {
+    'Built-up area': ['built_up_area'],
+    'Built-up area × sector': ['sector', 'built_up_area'],
+    'Bedrooms × bathrooms': ['bedRoom', 'bathroom'],
+    'Floor category × furnishing type': ['floor_category', 'furnishing_type'],
+    'Property age': ['agePossession'],
+    'Luxury category': ['luxury_category'],
+}
+
+base = st.session_state.get('whatif_base')
+if base is not None:
+    with st.expander("🔍 What-if: how does the price change?", expanded=False):
+        choice = st.selectbox('Vary', list(WHATIF_SWEEPS))
+        features = WHATIF_SWEEPS[choice]
+        axes = {feature: whatif.axis_values(feature, base, df[feature] if feature in df else None)
+                for feature in features}
+        try:
+            with span('price_predictor', 'whatif'):
+                result = whatif.sweep(pipeline, base, axes)
+            if len(features) == 1:
+                fig = whatif.curve_figure(result, features[0], base, title=f"Estimated price by {choice.lower()}")
+            else:
+                fig = whatif.heatmap_figure(result, features[0], features[1],
+                                            title=f"Estimated price (Cr) by {choice.lower()}")
+                fig.update_layout(height=max(400, 14 * len(axes[features[0]])))
+            st.plotly_chart(fig, use_container_width=True)
+            st.caption(f"{len(result):,} variations of {base['property_type']} in {base['sector']}, "
+                       f"all other inputs as submitted")
+        except Exception as e:
+            st.error(f"⚠️ What-if sweep failed: {e}")
+
+observe('price_predictor', 'total', time.perf_counter() - _page_start)
+page_done()
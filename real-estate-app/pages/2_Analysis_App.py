@@ -1,10 +1,21 @@
+import time
+
+_page_start = time.perf_counter()
+
+import functools
+import logging
+import os
+
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import pickle
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
-import seaborn as sns
+from instrumentation import observe, page_done, span
+
+# Only Streamlit is imported above: pandas, Plotly, seaborn/matplotlib and wordcloud,
+# and the datasets, are imported/loaded by the sections below when they are opened
+_import_seconds = time.perf_counter() - _page_start
+logger = logging.getLogger(__name__)
+# Seconds from script start to the section picker; overruns are logged and recorded
+FIRST_PAINT_BUDGET = float(os.environ.get('REAL_ESTATE_FIRST_PAINT_BUDGET', '1.0'))
+
 st.set_page_config(page_title="Beautiful Real Estate Dashboard", layout="wide")
 
 # Custom CSS styling
@@ -57,26 +68,84 @@ st.markdown("<h1 style='text-align: center;'>🏡 Real Estate Data Dashboard</h1
 
 st.title('Analytics')
 
-# Load and preprocess
-import os
-import pandas as pd
-import pickle
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATA_DIR = os.path.join(BASE_DIR, '..', 'datasets')
+# --- Data (loaded on first use, then shared across reruns and sessions) ---
+
+class SectionUnavailable(Exception):
+    """Data a section needs could not be loaded; the other sections still render."""
+
+
+def aggregates():
+    # Precomputed once per data_viz1.csv version (analytics_cache)
+    import analytics_cache
+
+    with span('analysis', 'transform'):
+        try:
+            return analytics_cache.get_store()
+        except Exception as e:
+            raise SectionUnavailable(f"data_viz1.csv could not be loaded ({type(e).__name__}: {e})") from e
+
+
+def aggregate(name):
+    try:
+        return getattr(aggregates(), name)
+    except AttributeError:
+        raise SectionUnavailable(f"'{name}' could not be computed: data_viz1.csv lacks its columns") from None
+
+
+def rows(columns):
+    """Row-level frame, for the few charts that plot individual listings."""
+    import analytics_cache
+
+    with span('analysis', 'load'):
+        try:
+            df = analytics_cache.get_viz_data()
+        except Exception as e:
+            raise SectionUnavailable(f"data_viz1.csv could not be loaded ({type(e).__name__}: {e})") from e
+    missing = [col for col in columns if col not in df.columns]
+    if missing:
+        raise SectionUnavailable(f"data_viz1.csv lacks the columns {missing}")
+    return df
+
+
+def feature_text():
+    import artifacts
+
+    with span('analysis', 'load'):
+        try:
+            return artifacts.load('feature_text.pkl')
+        except Exception as e:
+            raise SectionUnavailable(f"feature_text.pkl could not be loaded ({type(e).__name__}: {e})") from e
+
+
+def figures():
+    # Word cloud, KDE histplots and heatmap are served as cached PNGs
+    import figure_cache
+
+    return figure_cache.get_cache()
 
-df = pd.read_csv(os.path.join(DATA_DIR, 'data_viz1.csv'))
 
-with open(os.path.join(DATA_DIR, 'feature_text.pkl'), 'rb') as f:
-    feature_text = pickle.load(f)
+def section(render):
+    """
+    One chart as a fragment: its widgets rerun only it, and missing data
+    shows a note in its place instead of stopping the page.
+    """
+    @functools.wraps(render)
+    def guarded():
+        try:
+            render()
+        except SectionUnavailable as e:
+            st.info(f"ℹ️ {render.__doc__} is unavailable: {e}")
+    return st.fragment(guarded)
 
 
-numeric_cols = ['price', 'price_per_sqft', 'built_up_area', 'latitude', 'longitude']
-df[numeric_cols] = df[numeric_cols].apply(pd.to_numeric, errors='coerce')
-group_df = df.groupby('sector')[numeric_cols].mean().reset_index()
+# --- Sections ---
+
+@section
+def geomap():
+    """The sector geomap"""
+    import plotly.express as px
 
-# Section: Geomap with card styling
-with st.container():
     st.markdown("""
         <div style="background-color:#ffffff;padding:20px 30px;border-radius:12px;
         box-shadow:0 4px 12px rgba(0, 0, 0, 0.1);margin-bottom:25px;">
@@ -84,7 +153,7 @@ with st.container():
     """, unsafe_allow_html=True)
 
     fig = px.scatter_mapbox(
-        group_df,
+        aggregate('sector_means'),
         lat="latitude",
         lon="longitude",
         color="price_per_sqft",
@@ -99,35 +168,45 @@ with st.container():
 
     st.markdown("</div>", unsafe_allow_html=True)
 
-# Section: Word Cloud in center
-with st.container():
+
+@section
+def word_cloud():
+    """The features word cloud"""
+    import hashlib
+
     st.markdown("""
         <div style="background-color:#ffffff;padding:20px 30px;border-radius:12px;
         box-shadow:0 4px 12px rgba(0, 0, 0, 0.1);text-align:center;">
         <h3 style="color:#ff7f0e;">☁️ Common Features Word Cloud</h3>
     """, unsafe_allow_html=True)
 
-    from wordcloud import WordCloud
-    import matplotlib.pyplot as plt
+    text = feature_text()
+    text_version = hashlib.sha256(text.encode()).hexdigest()[:16]
+    wordcloud_params = {'width': 800, 'height': 400, 'background_color': 'black', 'colormap': 'Set2'}
 
-    wordcloud = WordCloud(
-        width=800,
-        height=400,
-        background_color='black',
-        colormap='Set2'
-    ).generate(feature_text)
+    def render_wordcloud():
+        from wordcloud import WordCloud
+        from matplotlib.figure import Figure
 
-    fig_wc, ax = plt.subplots(figsize=(10, 5))
-    ax.imshow(wordcloud, interpolation='bilinear')
-    ax.axis("off")
-    st.pyplot(fig_wc)
+        wordcloud = WordCloud(**wordcloud_params).generate(text)
+        fig_wc = Figure(figsize=(10, 5))
+        ax = fig_wc.subplots()
+        ax.imshow(wordcloud, interpolation='bilinear')
+        ax.axis("off")
+        return fig_wc
+
+    with span('analysis', 'render'):
+        st.image(figures().get('wordcloud', text_version, render_wordcloud, wordcloud_params),
+                 use_container_width=True)
 
     st.markdown("</div>", unsafe_allow_html=True)
 
 
-# ✅ Pass the figure to st.pyplo
-# --- Area vs Price Section ---
-with st.container():
+@section
+def area_vs_price():
+    """The area vs price scatter plot"""
+    import plot_reduction
+
     st.markdown("""
         <div style="background-color:#f8f9fa;padding:20px 30px;border-radius:12px;
         box-shadow:0 4px 12px rgba(0, 0, 0, 0.05);margin-bottom:30px;">
@@ -136,71 +215,93 @@ with st.container():
 
     property_type = st.selectbox('Select Property Type', ['flat', 'house'])
 
-    filtered_df = df[df['property_type'] == property_type]
+    # Raw points for small data, density cells plus sampled outliers above plot_reduction.MAX_POINTS
+    area_price = aggregate('area_price').get(property_type)
+    if area_price is not None:
+        fig1 = plot_reduction.scatter_figure(
+            area_price,
+            x="built_up_area",
+            y="price",
+            color="bedRoom",
+            hover=['sector', 'society'],
+            title=f"Area vs Price for {property_type.title()}s",
+            color_continuous_scale="Viridis",
+            height=500,
+        )
+        st.plotly_chart(fig1, use_container_width=True)
+    else:
+        st.warning(f"No {property_type} listings in the data.")
 
-    fig1 = px.scatter(
-        filtered_df,
-        x="built_up_area",
-        y="price",
-        color="bedRoom",
-        title=f"Area vs Price for {property_type.title()}s",
-        color_continuous_scale="Viridis",
-        hover_data=['sector', 'society']
-    )
-    fig1.update_layout(height=500)
+    st.markdown("</div>", unsafe_allow_html=True)
 
-    st.plotly_chart(fig1, use_container_width=True)
 
-    st.markdown("</div>", unsafe_allow_html=True)
+@section
+def luxury_vs_price():
+    """The luxury score scatter plot"""
+    import plot_reduction
+
+    st.markdown("<h4 style='text-align:center;color:#117864;'>💎 Luxury Score vs Price per Sqft</h4>", unsafe_allow_html=True)
+    fig_lux = plot_reduction.scatter_figure(aggregate('luxury_scatter'), x='luxury_score', y='price_per_sqft',
+                                            color='property_type', size='built_up_area', hover=['society', 'sector'])
+    st.plotly_chart(fig_lux, use_container_width=True)
+
+
+@section
+def bhk_pie():
+    """The BHK distribution"""
+    import plotly.express as px
 
-# --- BHK Distribution Pie Chart ---
-with st.container():
     st.markdown("""
         <div style="background-color:#f1f3f5;padding:20px 30px;border-radius:12px;
         box-shadow:0 4px 10px rgba(0, 0, 0, 0.05);margin-bottom:30px;">
         <h3 style="color:#17a2b8;text-align:center;">🏘️ BHK Distribution by Sector</h3>
     """, unsafe_allow_html=True)
 
-    sector_options = df['sector'].unique().tolist()
+    sector_options = list(aggregate('sectors'))
     sector_options.insert(0, 'overall')
 
     selected_sector = st.selectbox('Select Sector', sector_options)
+    store = aggregates()
+    try:
+        bhk_counts = store.bhk_counts(selected_sector)
+    except AttributeError:
+        raise SectionUnavailable("data_viz1.csv lacks the bedRoom column") from None
 
     if selected_sector == 'overall':
-        fig2 = px.pie(
-            df,
-            names='bedRoom',
-            title='Overall BHK Distribution',
-            color_discrete_sequence=px.colors.qualitative.Set3
-        )
+        title = 'Overall BHK Distribution'
     else:
-        filtered = df[df['sector'] == selected_sector]
-        fig2 = px.pie(
-            filtered,
-            names='bedRoom',
-            title=f'BHK Distribution in Sector {selected_sector}',
-            color_discrete_sequence=px.colors.qualitative.Set3
-        )
+        title = f'BHK Distribution in Sector {selected_sector}'
+    fig2 = px.pie(
+        names=bhk_counts.index,
+        values=bhk_counts.values,
+        title=title,
+        color_discrete_sequence=px.colors.qualitative.Set3
+    )
 
     fig2.update_traces(textinfo='percent+label')
     st.plotly_chart(fig2, use_container_width=True)
 
     st.markdown("</div>", unsafe_allow_html=True)
 
-# --- Side-by-Side BHK Price Comparison ---
-with st.container():
+
+@section
+def bhk_price_box():
+    """The BHK price comparison"""
+    import plotly.express as px
+    import plot_reduction
+
     st.markdown("""
         <div style="background-color:#fff3cd;padding:20px 30px;border-radius:12px;
         box-shadow:0 4px 10px rgba(0, 0, 0, 0.05);margin-bottom:30px;">
         <h3 style="color:#856404;text-align:center;">💰 BHK Price Comparison</h3>
     """, unsafe_allow_html=True)
 
-    fig3 = px.box(
-        df[df['bedRoom'] <= 4],
+    # Drawn from precomputed quartiles and sampled outliers, not raw rows
+    fig3 = plot_reduction.box_figure(
+        aggregate('bhk_price_box'),
         x='bedRoom',
         y='price',
         title='Price Distribution across BHK Types (≤ 4 BHK)',
-        color='bedRoom',
         color_discrete_sequence=px.colors.qualitative.Set1
     )
     fig3.update_layout(xaxis_title='BHK', yaxis_title='Price')
@@ -210,76 +311,122 @@ with st.container():
     st.markdown("</div>", unsafe_allow_html=True)
 
 
-# --- Import Setup ---
-import streamlit as st
-import pandas as pd
-import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
-import plotly.express as px
-
-st.markdown("<h2 style='text-align:center;color:#6c63ff;'>📊 Real Estate Insights Dashboard</h2>", unsafe_allow_html=True)
-
-# Assuming df is already loaded and preprocessed
-# --- Distribution Plot ---
-with st.container():
+@section
+def price_distribution():
+    """The price distribution"""
     st.markdown("""
     <div style="background-color:#e9f7ef;padding:20px 30px;border-radius:12px;margin-top:25px;
     box-shadow:0 4px 12px rgba(0,0,0,0.05);">
     <h4 style="color:#2c3e50;text-align:center;">🏡 Price Distribution for Property Types</h4>
     """, unsafe_allow_html=True)
 
-    fig_dist = plt.figure(figsize=(10, 4))
-    sns.histplot(df[df['property_type'] == 'house']['price'], label='House', color='blue', kde=True)
-    sns.histplot(df[df['property_type'] == 'flat']['price'], label='Flat', color='green', kde=True)
-    plt.legend()
-    plt.xlabel("Price")
-    plt.ylabel("Frequency")
-    st.pyplot(fig_dist)
+    store = aggregates()
 
-    st.markdown("</div>", unsafe_allow_html=True)
+    def render_price_distribution():
+        # Rows are only read when the cached PNG is missing or stale
+        import seaborn as sns
+        from matplotlib.figure import Figure
 
-# --- Heatmap ---
-with st.container():
-    st.markdown("""
-    <div style="background-color:#fbeee6;padding:20px 30px;border-radius:12px;
-    box-shadow:0 4px 12px rgba(0,0,0,0.05);">
-    <h4 style="color:#d35400;text-align:center;">🔥 Correlation Heatmap</h4>
-    """, unsafe_allow_html=True)
+        df = rows(['property_type', 'price'])
+        fig_dist = Figure(figsize=(10, 4))
+        ax = fig_dist.subplots()
+        sns.histplot(df[df['property_type'] == 'house']['price'], label='House', color='blue', kde=True, ax=ax)
+        sns.histplot(df[df['property_type'] == 'flat']['price'], label='Flat', color='green', kde=True, ax=ax)
+        ax.legend()
+        ax.set_xlabel("Price")
+        ax.set_ylabel("Frequency")
+        return fig_dist
 
-    numeric_df = df.select_dtypes(include=['number'])
-    fig_corr, ax3 = plt.subplots(figsize=(12, 8))
-    sns.heatmap(numeric_df.corr(), annot=True, cmap='coolwarm', ax=ax3)
-    st.pyplot(fig_corr)
+    with span('analysis', 'render'):
+        st.image(figures().get('price_distribution', store.version, render_price_distribution),
+                 use_container_width=True)
 
     st.markdown("</div>", unsafe_allow_html=True)
 
-# --- Furnishing Type Pie Chart ---
-with st.container():
+
+@section
+def age_price_box():
+    """The property age vs price box plot"""
+    import plot_reduction
+
+    st.markdown("<h4 style='text-align:center;color:#6c3483;'>🏗️ Age of Property vs Price</h4>", unsafe_allow_html=True)
+    fig_age = plot_reduction.box_figure(aggregate('age_price_box'), x='agePossession', y='price',
+                                        color='property_type', title='Property Age vs Price Distribution')
+    st.plotly_chart(fig_age, use_container_width=True)
+
+
+@section
+def furnishing_price_box():
+    """The furnishing type vs price box plot"""
+    import plot_reduction
+
+    st.markdown("<h4 style='text-align:center;color:#a04000;'>🧾 Price by Furnishing Type</h4>", unsafe_allow_html=True)
+    fig_furn = plot_reduction.box_figure(aggregate('furnishing_price_box'), x='furnishing_type', y='price',
+                                         title="Price Variation by Furnishing Type")
+    st.plotly_chart(fig_furn, use_container_width=True)
+
+
+@section
+def furnishing_pie():
+    """The furnishing type distribution"""
+    import plotly.express as px
+
     st.markdown("""
     <div style="background-color:#eaf2f8;padding:20px 30px;border-radius:12px;
     box-shadow:0 4px 12px rgba(0,0,0,0.05);">
     <h4 style="color:#1f618d;text-align:center;">🛋️ Furnishing Type Distribution</h4>
     """, unsafe_allow_html=True)
 
-    furnishing_counts = df['furnishing_type'].value_counts()
-    fig5 = px.pie(names=furnishing_counts.index, values=furnishing_counts.values, 
+    furnishing_counts = aggregate('furnishing_counts')
+    fig5 = px.pie(names=furnishing_counts.index, values=furnishing_counts.values,
                   title="Furnishing Type Distribution",
                   color_discrete_sequence=px.colors.qualitative.Pastel)
     st.plotly_chart(fig5, use_container_width=True)
 
     st.markdown("</div>", unsafe_allow_html=True)
 
-# --- Radar Chart ---
-with st.container():
+
+@section
+def corr_heatmap():
+    """The correlation heatmap"""
+    st.markdown("""
+    <div style="background-color:#fbeee6;padding:20px 30px;border-radius:12px;
+    box-shadow:0 4px 12px rgba(0,0,0,0.05);">
+    <h4 style="color:#d35400;text-align:center;">🔥 Correlation Heatmap</h4>
+    """, unsafe_allow_html=True)
+
+    store = aggregates()
+    corr = aggregate('corr')
+
+    def render_corr_heatmap():
+        import seaborn as sns
+        from matplotlib.figure import Figure
+
+        fig_corr = Figure(figsize=(12, 8))
+        ax3 = fig_corr.subplots()
+        sns.heatmap(corr, annot=True, cmap='coolwarm', ax=ax3)
+        return fig_corr
+
+    with span('analysis', 'render'):
+        st.image(figures().get('corr_heatmap', store.version, render_corr_heatmap, {'cmap': 'coolwarm'}),
+                 use_container_width=True)
+
+    st.markdown("</div>", unsafe_allow_html=True)
+
+
+@section
+def radar():
+    """The property radar snapshot"""
+    import plotly.express as px
+
     st.markdown("""
     <div style="background-color:#f9ebea;padding:20px 30px;border-radius:12px;
     box-shadow:0 4px 12px rgba(0,0,0,0.05);">
     <h4 style="color:#c0392b;text-align:center;">📡 Property Radar Snapshot</h4>
     """, unsafe_allow_html=True)
 
-    row = df.iloc[0]
     features = ['bedRoom', 'bathroom', 'balcony', 'luxury_score']
+    row = rows(features + ['society', 'sector']).iloc[0]
     values = [row[feat] for feat in features]
 
     fig_radar = px.line_polar(r=values, theta=features, line_close=True,
@@ -289,14 +436,14 @@ with st.container():
 
     st.markdown("</div>", unsafe_allow_html=True)
 
-# --- Treemap ---
-with st.container():
-    avg_area_df = df.groupby(['sector', 'society'], as_index=False).agg({
-        'built_up_area': 'mean',
-        'price': 'mean'
-    })
+
+@section
+def treemap():
+    """The sector treemap"""
+    import plotly.express as px
+
     fig_tree = px.treemap(
-        avg_area_df,
+        aggregate('treemap'),
         path=['sector', 'society'],
         values='built_up_area',
         color='price',
@@ -305,36 +452,57 @@ with st.container():
     )
     st.plotly_chart(fig_tree, use_container_width=True)
 
-# --- Age vs Price Boxplot ---
-with st.container():
-    st.markdown("<h4 style='text-align:center;color:#6c3483;'>🏗️ Age of Property vs Price</h4>", unsafe_allow_html=True)
-    fig_age = px.box(df, x='agePossession', y='price', color='property_type',
-                     title='Property Age vs Price Distribution')
-    st.plotly_chart(fig_age, use_container_width=True)
 
-# --- Luxury Score Scatter Plot ---
-with st.container():
-    st.markdown("<h4 style='text-align:center;color:#117864;'>💎 Luxury Score vs Price per Sqft</h4>", unsafe_allow_html=True)
-    fig_lux = px.scatter(df, x='luxury_score', y='price_per_sqft', color='property_type',
-                         size='built_up_area', hover_data=['society', 'sector'])
-    st.plotly_chart(fig_lux, use_container_width=True)
-
-# --- Sector-wise Summary Table ---
-with st.container():
+@section
+def sector_summary():
+    """The sector summary table"""
     st.markdown("<h4 style='text-align:center;color:#2e4053;'>📍 Sector Summary Stats</h4>", unsafe_allow_html=True)
+    store = aggregates()
+    aggregate('sector_summaries')  # unavailable before any filter widget is drawn
     col1, col2 = st.columns(2)
-    selected_sector = col1.selectbox("Sector", df['sector'].unique())
-    selected_type = col2.selectbox("Property Type", df['property_type'].unique())
+    selected_sector = col1.selectbox("Sector", aggregate('sectors'))
+    selected_type = col2.selectbox("Property Type", aggregate('property_types'))
 
-    filtered = df[(df['sector'] == selected_sector) & (df['property_type'] == selected_type)]
-    if not filtered.empty:
-        st.dataframe(filtered.describe()[['price', 'price_per_sqft', 'built_up_area', 'luxury_score']])
+    summary = store.sector_summary(selected_sector, selected_type)
+    if summary is not None:
+        st.dataframe(summary)
     else:
         st.warning("No data available for the selected filters.")
 
-# --- Furnishing Type vs Price Boxplot ---
-with st.container():
-    st.markdown("<h4 style='text-align:center;color:#a04000;'>🧾 Price by Furnishing Type</h4>", unsafe_allow_html=True)
-    fig_furn = px.box(df, x='furnishing_type', y='price', color='furnishing_type',
-                      title="Price Variation by Furnishing Type")
-    st.plotly_chart(fig_furn, use_container_width=True)
+
+# --- Section picker ---
+# Nothing below the picker is imported, loaded or drawn until its section is opened
+SECTIONS = {
+    '📍 Geomap': [geomap],
+    '☁️ Features': [word_cloud],
+    '📈 Price vs Size': [area_vs_price, luxury_vs_price],
+    '🏘️ BHK': [bhk_pie, bhk_price_box],
+    '📊 Distributions': [price_distribution, age_price_box, furnishing_price_box, furnishing_pie],
+    '🔥 Correlations': [corr_heatmap, radar],
+    '🏙️ Sectors': [treemap, sector_summary],
+}
+
+# Sections drawn under the insights header, which comes before the first of them opened
+INSIGHTS = {price_distribution, corr_heatmap, furnishing_pie, radar, age_price_box, luxury_vs_price, sector_summary,
+            furnishing_price_box}
+
+opened = st.pills('Sections', list(SECTIONS), selection_mode='multi', default=['📍 Geomap'])
+
+first_paint = time.perf_counter() - _page_start
+observe('analysis', 'imports', _import_seconds)
+observe('analysis', 'first_paint', first_paint)
+if first_paint > FIRST_PAINT_BUDGET:
+    logger.warning("Analytics first paint took %.2fs (imports %.2fs), over the %.2fs budget",
+                   first_paint, _import_seconds, FIRST_PAINT_BUDGET)
+
+insights_header = False
+for label in opened or []:
+    for render in SECTIONS[label]:
+        if render in INSIGHTS and not insights_header:
+            st.markdown("<h2 style='text-align:center;color:#6c63ff;'>📊 Real Estate Insights Dashboard</h2>",
+                        unsafe_allow_html=True)
+            insights_header = True
+        render()
+
+observe('analysis', 'total', time.perf_counter() - _page_start)
+page_done()
@@ -1,7 +1,10 @@
+import time
 import streamlit as st
-import pickle
 import pandas as pd
 import numpy as np
+from instrumentation import observe, page_done, span
+
+_page_start = time.perf_counter()
 
 # --- Page Config ---
 st.set_page_config(page_title="🏘️ Apartment Recommender", layout="centered")
@@ -35,37 +38,61 @@ st.markdown("""
 
 # --- Load Data ---
 import os
-import pickle
+import artifacts
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATA_DIR = os.path.join(BASE_DIR, '..', 'datasets')
+DATA_DIR = artifacts.DATA_DIR
 
-with open(os.path.join(DATA_DIR, 'location_df.pkl'), 'rb') as f:
-    location_df = pickle.load(f)
 
-with open(os.path.join(DATA_DIR, 'cosine_sim1.pkl'), 'rb') as f:
-    cosine_sim1 = pickle.load(f)
+# --- Recommendation Engine ---
+import similarity_graph
+from recommender import Recommender
 
-with open(os.path.join(DATA_DIR, 'cosine_sim2.pkl'), 'rb') as f:
-    cosine_sim2 = pickle.load(f)
 
-with open(os.path.join(DATA_DIR, 'cosine_sim3.pkl'), 'rb') as f:
-    cosine_sim3 = pickle.load(f)
+@st.cache_resource
+def get_recommender():
+    # Top-k neighbor table is built once per process. Sparse graphs from
+    # similarity_graph.py are preferred; the dense cosine matrices (memory-mapped
+    # when exported with matrix_store.py, otherwise unpickled) are the fallback
+    with span('recommend', 'load'):
+        graphs = similarity_graph.load_graphs()
+        if graphs is not None:
+            names, views = graphs
+        else:
+            names = artifacts.load_matrix('location_df').rows
+            views = [artifacts.load_matrix(name).values for name in ('cosine_sim1', 'cosine_sim2', 'cosine_sim3')]
+    return Recommender(names, views)
 
 
-# --- Recommendation Function ---
 def recommend_properties_with_scores(property_name, top_n=5):
-    cosine_sim_matrix = 0.5 * cosine_sim1 + 0.8 * cosine_sim2 + 1.0 * cosine_sim3
-    sim_scores = list(enumerate(cosine_sim_matrix[location_df.index.get_loc(property_name)]))
-    sorted_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)
-    top_indices = [i[0] for i in sorted_scores[1:top_n + 1]]
-    top_scores = [i[1] for i in sorted_scores[1:top_n + 1]]
-    top_properties = location_df.index[top_indices].tolist()
-
-    return pd.DataFrame({
-        '🏢 Property Name': top_properties,
-        '🔗 Similarity Score': [round(score, 3) for score in top_scores]
-    })
+    with span('recommend', 'predict'):
+        return get_recommender().recommend_df(property_name, top_n)
+
+
+# --- Geo Index ---
+import column_store
+from geo_index import GeoIndex, landmark_radius
+
+
+@st.cache_resource
+def get_geo_index():
+    return GeoIndex.from_data_viz(column_store.load(os.path.join(DATA_DIR, 'data_viz1.csv'),
+                                                    columns=['society', 'sector', 'latitude', 'longitude']))
+
+
+@st.cache_resource
+def get_landmarks():
+    # Metres from every property to the landmarks (airport, metro stations, ...) of location_df
+    return artifacts.load_matrix('location_df')
+
+
+with span('recommend', 'transform'):
+    geo_index = get_geo_index()
+    landmarks = get_landmarks()
+    get_recommender()
+
+# Landmark origins as before the spatial index, then every sector the index can search from
+landmark_names = sorted(landmarks.columns.to_list())
+origins = landmark_names + [sector for sector in geo_index.sectors if sector not in landmarks.columns]
 
 # --- App Header ---
 st.markdown("<h2>📍 Location-Based Apartment Search</h2>", unsafe_allow_html=True)
@@ -73,18 +100,23 @@ st.markdown("<h2>📍 Location-Based Apartment Search</h2>", unsafe_allow_html=T
 with st.form("search_form"):
     col1, col2 = st.columns([2, 1])
     with col1:
-        selected_location = st.selectbox("Select a location", sorted(location_df.columns.to_list()))
+        selected_location = st.selectbox("Select a location or sector", origins)
     with col2:
         radius = st.number_input("Radius (in Kms)", min_value=1.0, max_value=50.0, value=5.0)
 
     search = st.form_submit_button("🔍 Search Nearby")
 
 if search:
-    result_ser = location_df[location_df[selected_location] < radius * 1000][selected_location].sort_values()
-    if not result_ser.empty:
+    with span('recommend', 'predict'):
+        if selected_location in landmarks.columns:
+            result_df = landmark_radius(landmarks, selected_location, radius)
+        else:
+            result_df = geo_index.radius(*geo_index.sector_origin(selected_location), radius)
+    if not result_df.empty:
         st.markdown("### 🏙️ Nearby Apartments")
-        for key, value in result_ser.items():
-            st.markdown(f"- **{key}** — _{round(value / 1000, 2)} km_")
+        for row in result_df.itertuples(index=False):
+            sector = f" ({row.sector})" if row.sector else ""
+            st.markdown(f"- **{row.society}**{sector} — _{round(row.distance_km, 2)} km_")
     else:
         st.warning("No properties found in this radius.")
 
@@ -92,10 +124,13 @@ if search:
 st.markdown("<h2>💡 Recommend Similar Apartments</h2>", unsafe_allow_html=True)
 
 with st.form("recommend_form"):
-    selected_appartment = st.selectbox("Choose an apartment", sorted(location_df.index.to_list()))
+    selected_appartment = st.selectbox("Choose an apartment", sorted(get_recommender().names.to_list()))
     recommend = st.form_submit_button("✨ Recommend")
 
 if recommend:
     st.markdown(f"### 🔮 Recommendations based on **{selected_appartment}**")
     recommendation_df = recommend_properties_with_scores(selected_appartment)
     st.dataframe(recommendation_df.style.format({'🔗 Similarity Score': "{:.3f}"}).highlight_max(axis=0))
+
+observe('recommend', 'total', time.perf_counter() - _page_start)
+page_done()
@@ -0,0 +1,189 @@
+"""
+Bounded-size plot data for the Analytics scatter and box charts.
+
+Plotly serialises every point it is given, so plotting rows directly grows
+the page payload and the browser's work with the dataset. Here:
+
+- a scatter with at most MAX_POINTS rows is kept as is; above that it becomes
+  one marker per non-empty cell of a BINS x BINS grid (per colour group),
+  sized by its row count, plus a stratified sample of the rows outside the
+  OUTLIER_QUANTILES box, which would otherwise stretch the grid;
+- a box plot is drawn from precomputed quartiles and whisker ends, plus a
+  stratified sample of the rows beyond the whiskers.
+
+Either way a chart carries at most groups * BINS**2 + MAX_OUTLIERS points.
+Reductions are vectorized pandas/NumPy and are computed once per data
+version by analytics_cache; the figure builders import Plotly lazily.
+"""
+import numpy as np
+import pandas as pd
+
+MAX_POINTS = 5000
+BINS = 60
+OUTLIER_QUANTILES = (0.005, 0.995)
+MAX_OUTLIERS = 500
+# Box whiskers reach the furthest row within this many IQRs of the quartiles (Plotly's rule)
+WHISKER_IQR = 1.5
+RANDOM_STATE = 42
+
+
+def _fair_quota(sizes, n):
+    # Largest per-group cap q with sum(min(size, q)) <= n: small groups keep every row and
+    # hand the rest of their share to the larger ones
+    remaining = n
+    sizes = np.sort(np.asarray(sizes))
+    for i, size in enumerate(sizes):
+        groups_left = len(sizes) - i
+        if size * groups_left >= remaining:
+            return remaining // groups_left
+        remaining -= size
+    return int(sizes[-1]) if len(sizes) else 0
+
+
+def stratified_sample(df, strata, n, random_state=RANDOM_STATE):
+    """At most `n` rows of `df`, shared evenly across the groups of the `strata` columns."""
+    if len(df) <= n:
+        return df
+    strata = [col for col in strata if col is not None]
+    if not strata:
+        return df.sample(n, random_state=random_state)
+    shuffled = df.sample(frac=1.0, random_state=random_state)
+    groups = shuffled.groupby(strata, observed=True, dropna=False, sort=False)
+    quota = _fair_quota(groups.size().to_numpy(), n)
+    return shuffled[groups.cumcount().to_numpy() < quota]
+
+
+# --- Scatter ---
+
+def reduce_scatter(df, x, y, group=None, mean_columns=(), hover=(), max_points=MAX_POINTS, bins=BINS,
+                   max_outliers=MAX_OUTLIERS):
+    """
+    {'mode': 'points', 'points': rows, 'rows': n} when there are at most
+    `max_points` rows with both coordinates; otherwise {'mode': 'bins',
+    'bins': one row per non-empty cell (cell centre as `x`/`y`, `group`,
+    `count` and the mean of each of `mean_columns`), 'outliers': sampled rows,
+    'rows': n}. `hover` columns are kept for individually drawn rows only.
+    """
+    columns = list(dict.fromkeys([x, y] + ([group] if group else []) + list(mean_columns) + list(hover)))
+    data = df[columns].dropna(subset=[x, y])
+    if len(data) <= max_points:
+        return {'mode': 'points', 'points': data.reset_index(drop=True), 'rows': len(data)}
+
+    xs, ys = data[x].to_numpy(dtype=np.float64), data[y].to_numpy(dtype=np.float64)
+    (x_lo, x_hi), (y_lo, y_hi) = np.quantile(xs, OUTLIER_QUANTILES), np.quantile(ys, OUTLIER_QUANTILES)
+    inside = (xs >= x_lo) & (xs <= x_hi) & (ys >= y_lo) & (ys <= y_hi)
+    x_width, y_width = (x_hi - x_lo) / bins or 1.0, (y_hi - y_lo) / bins or 1.0
+    ix = np.minimum(((xs[inside] - x_lo) / x_width).astype(np.int64), bins - 1)
+    iy = np.minimum(((ys[inside] - y_lo) / y_width).astype(np.int64), bins - 1)
+
+    if group:
+        codes, labels = pd.factorize(data[group].to_numpy()[inside], use_na_sentinel=False)
+    else:
+        codes, labels = np.zeros(len(ix), dtype=np.int64), np.array([None])
+    cells = (codes * bins + ix) * bins + iy
+    n_cells = len(labels) * bins * bins
+    counts = np.bincount(cells, minlength=n_cells)
+    occupied = np.flatnonzero(counts)
+
+    binned = {
+        x: x_lo + (occupied // bins % bins + 0.5) * x_width,
+        y: y_lo + (occupied % bins + 0.5) * y_width,
+        'count': counts[occupied],
+    }
+    if group:
+        binned[group] = labels[occupied // (bins * bins)]
+    for col in mean_columns:
+        values = data[col].to_numpy(dtype=np.float64)[inside]
+        present = ~np.isnan(values)
+        sums = np.bincount(cells[present], weights=values[present], minlength=n_cells)[occupied]
+        present_counts = np.bincount(cells[present], minlength=n_cells)[occupied]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            binned[col] = sums / present_counts
+
+    outliers = stratified_sample(data[~inside], [group], max_outliers)
+    return {'mode': 'bins', 'bins': pd.DataFrame(binned), 'outliers': outliers.reset_index(drop=True),
+            'rows': len(data)}
+
+
+def scatter_figure(reduction, x, y, color=None, size=None, hover=None, **layout):
+    """
+    Plotly scatter of a reduce_scatter result. Points mode draws the rows like
+    px.scatter(x, y, color, size, hover_data); bins mode sizes cells by row count,
+    colours them by `color` (group or per-cell mean) and overlays the outliers.
+    """
+    import plotly.express as px
+
+    if reduction['mode'] == 'points':
+        fig = px.scatter(reduction['points'], x=x, y=y, color=color, size=size, hover_data=hover,
+                         color_continuous_scale=layout.pop('color_continuous_scale', None))
+        fig.update_layout(**layout)
+        return fig
+
+    binned = reduction['bins']
+    fig = px.scatter(binned, x=x, y=y, color=color, size='count', size_max=18,
+                     hover_data={'count': True, **({size: ':.0f'} if size in binned else {})},
+                     color_continuous_scale=layout.pop('color_continuous_scale', None))
+    outliers = reduction['outliers']
+    if len(outliers):
+        for trace in px.scatter(outliers, x=x, y=y, color=color, hover_data=hover).data:
+            trace.update(marker={'size': 5, 'symbol': 'x', 'opacity': 0.6}, showlegend=False,
+                         hovertemplate=trace.hovertemplate)
+            fig.add_trace(trace)
+    fig.update_layout(**layout)
+    fig.add_annotation(text=f"{reduction['rows']:,} rows binned; outliers sampled", xref='paper', yref='paper',
+                       x=1, y=1.06, showarrow=False, font={'size': 11, 'color': 'gray'})
+    return fig
+
+
+# --- Box ---
+
+def box_stats(df, x, y, color=None, max_outliers=MAX_OUTLIERS):
+    """
+    Box-plot summary of `y` per `x` (and `color`) group: {'boxes': frame of
+    q1, median, q3, lowerfence, upperfence, count per group, 'outliers':
+    sampled rows beyond the whiskers}. Quartiles use linear interpolation
+    and whiskers end at the furthest row within WHISKER_IQR * IQR, as Plotly
+    computes them from raw rows.
+    """
+    keys = [x] if color is None or color == x else [x, color]
+    data = df[list(dict.fromkeys(keys + [y]))].dropna(subset=[y])
+    grouped = data.groupby(keys, observed=True)[y]
+    boxes = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+    boxes.columns = ['q1', 'median', 'q3']
+
+    q1 = grouped.transform('quantile', 0.25)
+    q3 = grouped.transform('quantile', 0.75)
+    reach = WHISKER_IQR * (q3 - q1)
+    within = data[y].between(q1 - reach, q3 + reach)
+    boxes['lowerfence'] = data[y].where(within).groupby([data[k] for k in keys], observed=True).min()
+    boxes['upperfence'] = data[y].where(within).groupby([data[k] for k in keys], observed=True).max()
+    boxes['count'] = grouped.size()
+
+    outliers = stratified_sample(data[~within], keys, max_outliers)
+    return {'boxes': boxes.reset_index(), 'outliers': outliers.reset_index(drop=True)}
+
+
+def box_figure(stats, x, y, color=None, title=None, color_discrete_sequence=None):
+    """Plotly box plot from box_stats, one trace per `color` group (per `x` value without one)."""
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    palette = color_discrete_sequence or px.colors.qualitative.Plotly
+    color = color or x
+    boxes, outliers = stats['boxes'], stats['outliers']
+    fig = go.Figure()
+    for i, (name, box) in enumerate(boxes.groupby(color, observed=True, sort=True)):
+        marker_color = palette[i % len(palette)]
+        fig.add_trace(go.Box(
+            x=box[x], q1=box['q1'], median=box['median'], q3=box['q3'],
+            lowerfence=box['lowerfence'], upperfence=box['upperfence'],
+            name=str(name), legendgroup=str(name), marker_color=marker_color,
+        ))
+        points = outliers[outliers[color] == name]
+        if len(points):
+            fig.add_trace(go.Scatter(x=points[x], y=points[y], mode='markers', name=str(name),
+                                     legendgroup=str(name), showlegend=False,
+                                     marker={'color': marker_color, 'size': 4, 'opacity': 0.6}))
+    fig.update_layout(title=title, boxmode='group' if color != x else 'overlay',
+                      xaxis_title=x, yaxis_title=y, legend_title=color)
+    return fig
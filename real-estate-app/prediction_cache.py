@@ -0,0 +1,140 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from batch_predict import FEATURE_COLUMNS, predict_chunk, prepare_features
+
+DEFAULT_MAXSIZE = 50_000
+DEFAULT_TTL = 24 * 60 * 60
+
+
+class PredictionCache:
+    """
+    LRU + TTL cache of predicted prices keyed by the normalized 12-feature tuple.
+
+    With `area_bucket` set, built_up_area is rounded to the nearest bucket
+    before both the lookup and the prediction, so every area in a bucket
+    shares one cached price. Entries are dropped wholesale when the model
+    version passed to `predict` differs from the one they were computed with.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL, area_bucket=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.area_bucket = area_bucket
+        self.model_version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def normalize(self, frame):
+        features = prepare_features(frame)
+        if self.area_bucket:
+            area = features['built_up_area'].to_numpy()
+            features['built_up_area'] = np.round(area / self.area_bucket) * self.area_bucket
+        return features
+
+    @staticmethod
+    def keys(features):
+        return list(features[FEATURE_COLUMNS].itertuples(index=False, name=None))
+
+    def _check_version(self, model_version):
+        if model_version != self.model_version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self.model_version = model_version
+
+    def _get(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        price, stored_at = entry
+        if self.ttl is not None and now - stored_at > self.ttl:
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return price
+
+    def _put(self, key, price, now):
+        self._entries[key] = (price, now)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def predict(self, pipeline, frame, model_version=None):
+        """Prices (in Cr) for every row of `frame`; only cache misses reach the pipeline."""
+        features = self.normalize(frame)
+        keys = self.keys(features)
+        prices = np.empty(len(keys), dtype=np.float64)
+        now = time.monotonic()
+
+        with self._lock:
+            self._check_version(model_version)
+            missing = []
+            for i, key in enumerate(keys):
+                price = self._get(key, now)
+                if price is None:
+                    missing.append(i)
+                else:
+                    prices[i] = price
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            # Duplicate keys inside one frame are predicted once
+            unique = {}
+            for i in missing:
+                unique.setdefault(keys[i], i)
+            first_rows = list(unique.values())
+            computed = predict_chunk(pipeline, features.iloc[first_rows])
+            by_key = dict(zip(unique.keys(), computed))
+            for i in missing:
+                prices[i] = by_key[keys[i]]
+
+            with self._lock:
+                if model_version == self.model_version:
+                    for key, price in by_key.items():
+                        self._put(key, float(price), now)
+
+        return prices
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'model_version': self.model_version,
+            }
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_cache():
+    """Process-wide cache shared by every Streamlit session."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = PredictionCache()
+    return _shared_cache
@@ -0,0 +1,258 @@
+import argparse
+import json
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from batch_predict import FEATURE_COLUMNS, load_pipeline, predict_chunk, prepare_features
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WAIT_MS = 5.0
+DEFAULT_MAX_BATCH = 256
+LATENCY_WINDOW = 10_000
+
+
+class ServerMetrics:
+    """Request/row counters plus a sliding window of latencies for p50/p99."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.started = time.time()
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+        self.errors = 0
+        self._latencies = deque(maxlen=window)
+        self._batch_sizes = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe_request(self, seconds, rows, error=False):
+        with self._lock:
+            self.requests += 1
+            self.rows += rows
+            self.errors += int(error)
+            self._latencies.append(seconds)
+
+    def observe_batch(self, size):
+        with self._lock:
+            self.batches += 1
+            self._batch_sizes.append(size)
+
+    def snapshot(self):
+        with self._lock:
+            latencies = np.array(self._latencies, dtype=np.float64)
+            batch_sizes = np.array(self._batch_sizes, dtype=np.float64)
+            uptime = time.time() - self.started
+            p50, p99 = (np.percentile(latencies, [50, 99]) * 1000).tolist() if len(latencies) else (None, None)
+            return {
+                'uptime_seconds': round(uptime, 1),
+                'requests': self.requests,
+                'rows': self.rows,
+                'errors': self.errors,
+                'batches': self.batches,
+                'rows_per_sec': round(self.rows / uptime, 2) if uptime > 0 else 0.0,
+                'latency_ms_p50': p50,
+                'latency_ms_p99': p99,
+                'mean_batch_size': float(batch_sizes.mean()) if len(batch_sizes) else None,
+            }
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-row requests into one vectorized predict call.
+    The first row of a batch waits at most `max_wait_ms` for company; a batch
+    is flushed early once it reaches `max_batch` rows.
+    """
+
+    def __init__(self, predict_rows, max_wait_ms=DEFAULT_MAX_WAIT_MS, max_batch=DEFAULT_MAX_BATCH,
+                 metrics=None):
+        self.predict_rows = predict_rows
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch = max_batch
+        self.metrics = metrics
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, row):
+        future = Future()
+        self._queue.put((row, future))
+        return future
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            rows = [row for row, _ in batch]
+            try:
+                prices = self.predict_rows(rows)
+            except Exception as e:
+                if len(batch) == 1:
+                    batch[0][1].set_exception(e)
+                else:
+                    # One bad row (e.g. a sector the model never saw) must not fail the
+                    # requests it was batched with: re-predict them one at a time
+                    self._run_singly(batch)
+                continue
+            if self.metrics is not None:
+                self.metrics.observe_batch(len(batch))
+            for (_, future), price in zip(batch, prices):
+                future.set_result(float(price))
+
+    def _run_singly(self, batch):
+        for row, future in batch:
+            try:
+                price = self.predict_rows([row])[0]
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                future.set_result(float(price))
+
+
+def rows_to_frame(rows):
+    for row in rows:
+        missing = [col for col in FEATURE_COLUMNS if col not in row]
+        if missing:
+            raise KeyError(f"Missing required fields: {missing}")
+    return pd.DataFrame(rows, columns=FEATURE_COLUMNS)
+
+
+class PredictionService:
+    """
+    Serves a fixed `pipeline`, or with `loader` set, whatever `loader()` returns
+    as (pipeline, version) at the start of each batch, so a newly published
+    model is picked up without restarting the server.
+    """
+
+    def __init__(self, pipeline=None, max_wait_ms=DEFAULT_MAX_WAIT_MS, max_batch=DEFAULT_MAX_BATCH, loader=None):
+        self._pipeline = pipeline
+        self.loader = loader
+        self.metrics = ServerMetrics()
+        self.batcher = MicroBatcher(self.predict_rows, max_wait_ms, max_batch, self.metrics)
+
+    def current(self):
+        if self.loader is not None:
+            return self.loader()
+        return self._pipeline, None
+
+    def predict_rows(self, rows):
+        pipeline, _ = self.current()
+        return predict_chunk(pipeline, rows_to_frame(rows))
+
+    def predict_one(self, row):
+        # Validate fields and types before queueing so bad input fails fast, on its own
+        prepare_features(rows_to_frame([row]))
+        return self.batcher.submit(row).result()
+
+
+def make_handler(service):
+
+    class PredictionHandler(BaseHTTPRequestHandler):
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._send_json(200, {'status': 'ok', 'model_version': service.current()[1]})
+            elif self.path == '/metrics':
+                self._send_json(200, service.metrics.snapshot())
+            else:
+                self._send_json(404, {'error': 'not found'})
+
+        def do_POST(self):
+            start = time.perf_counter()
+            rows = 0
+            error = False
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                payload = json.loads(self.rfile.read(length) or b'{}')
+                if self.path == '/predict':
+                    rows = 1
+                    self._send_json(200, {'price': service.predict_one(payload)})
+                elif self.path == '/predict/batch':
+                    batch = payload.get('rows', [])
+                    rows = len(batch)
+                    prices = service.predict_rows(batch) if batch else []
+                    self._send_json(200, {'prices': [float(p) for p in prices]})
+                else:
+                    error = True
+                    self._send_json(404, {'error': 'not found'})
+            except (KeyError, ValueError, TypeError, AttributeError) as e:
+                error = True
+                message = e.args[0] if isinstance(e, KeyError) and e.args else str(e)
+                self._send_json(400, {'error': message})
+            except Exception as e:
+                error = True
+                logger.exception("prediction failed")
+                self._send_json(500, {'error': str(e)})
+            finally:
+                service.metrics.observe_request(time.perf_counter() - start, rows, error)
+
+        def log_message(self, format, *args):
+            logger.debug("%s - %s", self.address_string(), format % args)
+
+    return PredictionHandler
+
+
+def serve(pipeline, host='127.0.0.1', port=8000, max_wait_ms=DEFAULT_MAX_WAIT_MS, max_batch=DEFAULT_MAX_BATCH,
+          loader=None):
+    service = PredictionService(pipeline, max_wait_ms, max_batch, loader)
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.daemon_threads = True
+    return server, service
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP price prediction service with micro-batching.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--pipeline', help="Path to pipeline.pkl (default: resolve via artifacts.load_model)")
+    parser.add_argument('--max-wait-ms', type=float, default=DEFAULT_MAX_WAIT_MS)
+    parser.add_argument('--max-batch', type=int, default=DEFAULT_MAX_BATCH)
+    args = parser.parse_args(argv)
+
+    pipeline, loader = None, None
+    if args.pipeline:
+        pipeline = load_pipeline(args.pipeline)
+    else:
+        import artifacts
+        artifacts.current_model(shared=True)  # fail at startup rather than on the first request
+        loader = lambda: artifacts.current_model(shared=True)
+
+    server, _ = serve(pipeline, args.host, args.port, args.max_wait_ms, args.max_batch, loader)
+    print(f"Serving predictions on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+"""
+Calibrated price intervals for the log-price pipeline (per-segment split
+conformal).
+
+Residuals log1p(price) - prediction are collected out of fold at training
+time and summarised per (property_type, predicted-price band) as the
+conformal lower/upper quantiles for COVERAGE. Only that table, a few
+hundred bytes, is attached to the fitted pipeline as `price_intervals_`
+(plain arrays), so it is pickled, published, compiled and hot-swapped
+together with the model it describes; the residuals are not kept. Serving
+turns predicted prices into (low, high) with one searchsorted and two array
+gathers; no extra model passes. Imports only NumPy unless calibrating.
+
+`python price_intervals.py` calibrates the current model and publishes it,
+with its intervals, as a new version.
+"""
+import argparse
+
+import numpy as np
+
+COVERAGE = 0.8
+# Quantile bands of the predicted log price; errors grow in relative terms at both ends
+PRICE_BANDS = 4
+# Segments with fewer calibration rows fall back to the property type, then to all rows
+MIN_SEGMENT_ROWS = 30
+CV_FOLDS = 5
+RANDOM_STATE = 42
+# Pipelines calibrated before intervals existed keep the page's old fixed band (in Cr)
+FALLBACK_BAND = 0.22
+ATTRIBUTE = 'price_intervals_'
+
+
+def _conformal_bounds(residuals, coverage):
+    """Lower/upper residual quantiles with the split-conformal (n + 1) finite-sample correction."""
+    n = len(residuals)
+    tail = (1 - coverage) / 2
+    lower = max(0.0, np.floor((n + 1) * tail) / n)
+    upper = min(1.0, np.ceil((n + 1) * (1 - tail)) / n)
+    return np.quantile(residuals, lower, method='lower'), np.quantile(residuals, upper, method='higher')
+
+
+def _type_rows(types, property_types):
+    # Row of each property type in the tables; unknown types use the last (pooled) row
+    values = np.asarray(property_types).astype(str)
+    positions = np.minimum(np.searchsorted(types, values), len(types) - 1)
+    return np.where(types[positions] == values, positions, len(types))
+
+
+class PriceIntervals:
+    """
+    Interval table: `lower`/`upper` are log-price offsets of shape
+    (len(types) + 1, len(edges) + 1), the last row pooling every type.
+    `rows` is the number of residuals it was calibrated on.
+    """
+
+    def __init__(self, types, edges, lower, upper, coverage=COVERAGE, rows=None):
+        self.types = np.asarray(types).astype(str)
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.lower = np.asarray(lower, dtype=np.float64)
+        self.upper = np.asarray(upper, dtype=np.float64)
+        self.coverage = float(coverage)
+        self.rows = None if rows is None else int(rows)
+
+    @classmethod
+    def calibrate(cls, property_types, predicted, residuals, coverage=COVERAGE, bands=PRICE_BANDS,
+                  min_rows=MIN_SEGMENT_ROWS):
+        """Build the table from log-scale predictions and their out-of-sample residuals."""
+        property_types = np.asarray(property_types).astype(str)
+        predicted = np.asarray(predicted, dtype=np.float64)
+        residuals = np.asarray(residuals, dtype=np.float64)
+        types = np.unique(property_types)
+        edges = np.quantile(predicted, np.linspace(0, 1, bands + 1)[1:-1])
+        band = np.searchsorted(edges, predicted, side='right')
+
+        lower = np.empty((len(types) + 1, bands))
+        upper = np.empty((len(types) + 1, bands))
+        pooled = _conformal_bounds(residuals, coverage)
+        for b in range(bands):
+            in_band = band == b
+            band_bounds = _conformal_bounds(residuals[in_band], coverage) if in_band.sum() >= min_rows else pooled
+            lower[-1, b], upper[-1, b] = band_bounds
+            for t, kind in enumerate(types):
+                of_type = property_types == kind
+                segment = in_band & of_type
+                if segment.sum() >= min_rows:
+                    bounds = _conformal_bounds(residuals[segment], coverage)
+                elif of_type.sum() >= min_rows:
+                    bounds = _conformal_bounds(residuals[of_type], coverage)
+                else:
+                    bounds = band_bounds
+                lower[t, b], upper[t, b] = bounds
+
+        return cls(types, edges, lower, upper, coverage, len(residuals))
+
+    def bounds(self, prices, property_types):
+        """(low, high) in Cr for predicted `prices` in Cr, vectorized over rows."""
+        log_price = np.log1p(np.asarray(prices, dtype=np.float64))
+        band = np.searchsorted(self.edges, log_price, side='right')
+        rows = _type_rows(self.types, property_types)
+        low = np.expm1(log_price + self.lower[rows, band])
+        high = np.expm1(log_price + self.upper[rows, band])
+        return np.maximum(low, 0.0), high
+
+    def empirical_coverage(self, actual, prices, property_types):
+        """Share of `actual` prices inside their interval."""
+        low, high = self.bounds(prices, property_types)
+        actual = np.asarray(actual, dtype=np.float64)
+        return float(np.mean((actual >= low) & (actual <= high))) if len(actual) else None
+
+    def summary(self):
+        """JSON-friendly description for publish metadata."""
+        return {
+            'coverage': self.coverage,
+            'types': self.types.tolist(),
+            'band_edges_cr': np.round(np.expm1(self.edges), 3).tolist(),
+            'lower_pct': np.round(100 * np.expm1(self.lower), 1).tolist(),
+            'upper_pct': np.round(100 * np.expm1(self.upper), 1).tolist(),
+            'calibration_rows': self.rows,
+        }
+
+    def to_arrays(self):
+        arrays = {'types': self.types, 'edges': self.edges, 'lower': self.lower, 'upper': self.upper,
+                  'coverage': np.float64(self.coverage)}
+        if self.rows is not None:
+            arrays['rows'] = np.int64(self.rows)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        # Pipelines published before the table stood alone also carry 'calibration' rows; they are ignored
+        return cls(arrays['types'], arrays['edges'], arrays['lower'], arrays['upper'], float(arrays['coverage']),
+                   arrays.get('rows'))
+
+
+# --- Pipeline attachment ---
+# Stored as a dict of plain arrays so unpickling the pipeline never needs this module
+
+def get(pipeline):
+    arrays = getattr(pipeline, ATTRIBUTE, None)
+    return None if arrays is None else PriceIntervals.from_arrays(arrays)
+
+
+def attach(pipeline, intervals):
+    setattr(pipeline, ATTRIBUTE, intervals.to_arrays())
+    return pipeline
+
+
+def bounds(pipeline, prices, property_types):
+    """(low, high) in Cr from the pipeline's intervals, or the fixed ±FALLBACK_BAND for uncalibrated models."""
+    intervals = get(pipeline)
+    if intervals is not None:
+        return intervals.bounds(prices, property_types)
+    prices = np.asarray(prices, dtype=np.float64)
+    return np.maximum(prices - FALLBACK_BAND, 0.0), prices + FALLBACK_BAND
+
+
+# --- Calibration (sklearn side) ---
+
+def out_of_fold(pipeline, rows, folds=CV_FOLDS):
+    """
+    Log-price predictions for `rows` from clones of `pipeline` that never saw
+    them, and the residuals. Rows with a category missing from their fold's
+    training part (a rare sector) cannot be encoded and stay NaN.
+    """
+    from sklearn.base import clone
+    from sklearn.model_selection import KFold
+
+    from batch_predict import FEATURE_COLUMNS
+
+    X = rows[FEATURE_COLUMNS]
+    y = np.log1p(rows['price'].to_numpy(dtype=np.float64))
+    categorical = X.select_dtypes(exclude='number').columns
+    predicted = np.full(len(rows), np.nan)
+    for train, test in KFold(n_splits=folds, shuffle=True, random_state=RANDOM_STATE).split(X):
+        model = clone(pipeline).fit(X.iloc[train], y[train])
+        seen = np.ones(len(test), dtype=bool)
+        for col in categorical:
+            seen &= X[col].iloc[test].isin(X[col].iloc[train].unique()).to_numpy()
+        predicted[test[seen]] = model.predict(X.iloc[test[seen]])
+    return predicted, y - predicted
+
+
+def fit(pipeline, rows, coverage=COVERAGE, folds=CV_FOLDS):
+    """Calibrate intervals for `pipeline`'s architecture on `rows` (costs `folds` extra fits)."""
+    predicted, residuals = out_of_fold(pipeline, rows, folds)
+    scored = ~np.isnan(predicted)
+    return PriceIntervals.calibrate(rows['property_type'].to_numpy()[scored], predicted[scored],
+                                    residuals[scored], coverage)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Calibrate prediction intervals for the price model and publish it with them.")
+    parser.add_argument('--pipeline', help="Calibrate this pipeline.pkl instead of the current version")
+    parser.add_argument('--data', help="Training rows (default: the accumulated retraining data)")
+    parser.add_argument('--coverage', type=float, default=COVERAGE)
+    parser.add_argument('--folds', type=int, default=CV_FOLDS)
+    parser.add_argument('--output', help="Write the calibrated pipeline here instead of publishing it")
+    args = parser.parse_args(argv)
+
+    import json
+    import os
+    import pickle
+    import tempfile
+
+    import artifacts
+    import retrain
+    from batch_predict import load_pipeline
+
+    if args.pipeline:
+        pipeline, base_version = load_pipeline(args.pipeline), artifacts.file_sha256(args.pipeline)
+    else:
+        pipeline, base_version = artifacts.current_model()
+    rows = retrain.read_rows([args.data]) if args.data else retrain.training_data()
+
+    intervals = fit(pipeline, rows, args.coverage, args.folds)
+    attach(pipeline, intervals)
+    print(json.dumps(intervals.summary(), indent=2))
+
+    if args.output:
+        with open(args.output, 'wb') as f:
+            pickle.dump(pipeline, f)
+        print(f"wrote {args.output}")
+        return
+    fd, tmp = tempfile.mkstemp(dir=artifacts.MODEL_CACHE_DIR if os.path.isdir(artifacts.MODEL_CACHE_DIR) else None)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(pipeline, f)
+        version = artifacts.publish_model(tmp, {'method': 'calibrate', 'base_version': base_version,
+                                                'intervals': intervals.summary()})
+    finally:
+        os.remove(tmp)
+    print(f"published {version}")
+
+
+if __name__ == '__main__':
+    main()
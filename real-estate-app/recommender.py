@@ -0,0 +1,179 @@
+import numpy as np
+import pandas as pd
+
+# --- Default view weights (facilities, price profile, location) ---
+DEFAULT_WEIGHTS = (0.5, 0.8, 1.0)
+DEFAULT_TOP_K = 20
+BLOCK_SIZE = 1024
+
+
+def weighted_rows(views, weights, start, stop):
+    """float32 weighted sum of rows [start, stop) across the similarity views."""
+    block = np.zeros((stop - start, views[0].shape[1]), dtype=np.float32)
+    for weight, view in zip(weights, views):
+        if weight:
+            block += np.float32(weight) * np.asarray(view[start:stop], dtype=np.float32)
+    return block
+
+
+def top_k_neighbors(views, weights, k, block_size=BLOCK_SIZE):
+    """
+    Per-row top-k of the weighted similarity matrix, excluding the row itself.
+    Returns (indices int32, scores float32), both shaped (n, k) and sorted by
+    descending score. Rows are combined block by block, so the full weighted
+    N x N matrix never exists in memory and memory-mapped views are only
+    paged in one block at a time.
+    """
+    n = views[0].shape[0]
+    k = max(0, min(k, n - 1))
+    indices = np.empty((n, k), dtype=np.int32)
+    scores = np.empty((n, k), dtype=np.float32)
+    if k == 0:
+        # Nothing to rank with fewer than two rows (and k = n - 1 would go negative)
+        return indices, scores
+
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        block = weighted_rows(views, weights, start, stop)
+        rows = np.arange(stop - start)
+        block[rows, rows + start] = -np.inf
+
+        part = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        part_scores = np.take_along_axis(block, part, axis=1)
+        order = np.argsort(-part_scores, axis=1, kind='stable')
+
+        indices[start:stop] = np.take_along_axis(part, order, axis=1)
+        scores[start:stop] = np.take_along_axis(part_scores, order, axis=1)
+
+    return indices, scores
+
+
+def _is_sparse(view):
+    # scipy.sparse matrices, without importing scipy for the dense path
+    return hasattr(view, 'tocsr')
+
+
+def weighted_sparse(views, weights, drop_self=True):
+    """CSR weighted sum of sparse top-k graphs; a pair missing from a view's graph counts as 0 there."""
+    fused = None
+    for weight, view in zip(weights, views):
+        if weight:
+            term = view.tocsr().astype(np.float32) * np.float32(weight)
+            fused = term if fused is None else fused + term
+    if fused is None:
+        fused = views[0].tocsr().astype(np.float32) * np.float32(0)
+    if drop_self:
+        fused.setdiag(0)
+    fused.eliminate_zeros()
+    fused.sum_duplicates()
+    return fused
+
+
+def top_k_sparse(matrix, k):
+    """
+    Per-row top-k of a CSR matrix, like top_k_neighbors. Rows are padded to
+    their longest row (at most the sum of the views' k), so the selection is
+    one argpartition over an (n, width) array; rows with fewer than `k`
+    entries end in index -1 / score -inf.
+    """
+    n = matrix.shape[0]
+    counts = np.diff(matrix.indptr)
+    width = max(int(counts.max(initial=0)), 1)
+    k = max(0, min(k, width))
+    if k == 0:
+        return np.empty((n, 0), dtype=np.int32), np.empty((n, 0), dtype=np.float32)
+    rows = np.repeat(np.arange(n), counts)
+    slots = np.arange(matrix.nnz) - matrix.indptr[rows]
+
+    padded_scores = np.full((n, width), -np.inf, dtype=np.float32)
+    padded_index = np.full((n, width), -1, dtype=np.int32)
+    padded_scores[rows, slots] = matrix.data
+    padded_index[rows, slots] = matrix.indices
+
+    part = np.argpartition(-padded_scores, k - 1, axis=1)[:, :k]
+    part_scores = np.take_along_axis(padded_scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1, kind='stable')
+    indices = np.take_along_axis(np.take_along_axis(padded_index, part, axis=1), order, axis=1)
+    return indices, np.take_along_axis(part_scores, order, axis=1)
+
+
+class Recommender:
+    """
+    Serves "similar apartments" from a precomputed top-k neighbor table built
+    from the weighted sum of the similarity views.
+
+    Views may be in-memory arrays or read-only memory maps; they are only
+    sliced, never copied whole. They may also all be sparse top-k graphs
+    from similarity_graph.py, which scale to N far beyond what dense N x N
+    views allow. A weight change rebuilds the neighbor table once instead of
+    recomputing the weighted matrix per request.
+    """
+
+    def __init__(self, names, views, weights=DEFAULT_WEIGHTS, k=DEFAULT_TOP_K):
+        if len(views) != len(weights):
+            raise ValueError("Need exactly one weight per similarity view")
+        sparse = [_is_sparse(view) for view in views]
+        if any(sparse) and not all(sparse):
+            raise ValueError("Similarity views must be all dense or all sparse")
+        self.names = pd.Index(names)
+        self.views = [view.tocsr() for view in views] if all(sparse) else list(views)
+        self.sparse = all(sparse)
+        self.k = k
+        self.weights = tuple(float(w) for w in weights)
+        self._rebuild()
+
+    def _rebuild(self):
+        if self.sparse:
+            self.neighbor_index, self.neighbor_scores = top_k_sparse(weighted_sparse(self.views, self.weights), self.k)
+        else:
+            self.neighbor_index, self.neighbor_scores = top_k_neighbors(self.views, self.weights, self.k)
+
+    def set_weights(self, weights):
+        """Update the view weights and rebuild the neighbor table once."""
+        weights = tuple(float(w) for w in weights)
+        if len(weights) != len(self.views):
+            raise ValueError("Need exactly one weight per similarity view")
+        if weights == self.weights:
+            return
+        self.weights = weights
+        self._rebuild()
+
+    def recommend(self, property_name, top_n=5, weights=None):
+        """
+        Top `top_n` most similar properties as (names, scores).
+
+        Uses the neighbor table when possible; custom weights or a `top_n`
+        larger than the table fall back to an argpartition over one row.
+        """
+        position = self.names.get_loc(property_name)
+
+        if (weights is None or tuple(weights) == self.weights) and top_n <= self.k:
+            top_indices = self.neighbor_index[position, :top_n]
+            top_scores = self.neighbor_scores[position, :top_n]
+            # Sparse graphs can leave a row with fewer than k neighbors
+            valid = top_indices >= 0
+            top_indices, top_scores = top_indices[valid], top_scores[valid]
+        elif self.sparse:
+            row = weighted_sparse([view[position] for view in self.views], weights or self.weights, drop_self=False)
+            others = row.indices != position
+            candidates, scores = row.indices[others], row.data[others]
+            order = np.argsort(-scores, kind='stable')[:top_n]
+            top_indices, top_scores = candidates[order], scores[order]
+        else:
+            row = weighted_rows(self.views, weights or self.weights, position, position + 1)[0]
+            row[position] = -np.inf
+            top_n = min(top_n, len(row) - 1)
+            if top_n <= 0:
+                return [], []
+            part = np.argpartition(-row, top_n - 1)[:top_n]
+            top_indices = part[np.argsort(-row[part], kind='stable')]
+            top_scores = row[top_indices]
+
+        return self.names[top_indices].tolist(), top_scores.tolist()
+
+    def recommend_df(self, property_name, top_n=5, weights=None):
+        top_properties, top_scores = self.recommend(property_name, top_n, weights)
+        return pd.DataFrame({
+            '🏢 Property Name': top_properties,
+            '🔗 Similarity Score': [round(score, 3) for score in top_scores]
+        })
@@ -0,0 +1,305 @@
+import argparse
+import copy
+import os
+import pickle
+import shutil
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import artifacts
+import price_intervals
+from batch_predict import FEATURE_COLUMNS, furnishing_labels, load_pipeline, predict_chunk, prepare_features
+from model_selection import COLUMNS_TO_ENCODE
+
+SCHEMA = FEATURE_COLUMNS + ['price']
+SEED_DATA = os.path.join(artifacts.APP_DIR, '..', 'gurgaon_properties_post_feature_selection_v2.csv')
+TRAINING_DATA = os.path.join(artifacts.MODEL_CACHE_DIR, 'training', 'gurgaon_properties_post_feature_selection_v2.csv')
+
+DEFAULT_NEW_TREES = 50
+HOLDOUT_FRACTION = 0.2
+MIN_HOLDOUT_ROWS = 20
+
+
+# --- Data ---
+
+def read_rows(paths):
+    """
+    Concatenate CSVs in the post-feature-selection v2 schema; extra columns
+    are ignored and furnishing_type codes become the pipeline's labels.
+    """
+    frames = []
+    for path in paths:
+        frame = pd.read_csv(path)
+        missing = [col for col in SCHEMA if col not in frame.columns]
+        if missing:
+            raise ValueError(f"{path} is missing columns: {missing}")
+        frames.append(frame[SCHEMA])
+    rows = pd.concat(frames, ignore_index=True)
+    rows['furnishing_type'] = furnishing_labels(rows['furnishing_type'])
+    return rows.dropna(subset=['price'])
+
+
+def training_data(path=TRAINING_DATA):
+    """Accumulated training rows, seeded from the repo's v2 CSV on first use."""
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.copyfile(SEED_DATA, path)
+    return read_rows([path])
+
+
+def only_new(rows, known):
+    """Rows of `rows` that are not already in `known` (exact duplicates are dropped)."""
+    rows = rows.drop_duplicates()
+    merged = rows.merge(known.drop_duplicates(), how='left', indicator=True)
+    return rows[(merged['_merge'] == 'left_only').to_numpy()].reset_index(drop=True)
+
+
+def append_rows(path, rows):
+    header = pd.read_csv(path, nrows=0).columns
+    tmp = f"{path}.tmp.{os.getpid()}"
+    shutil.copyfile(path, tmp)
+    rows.reindex(columns=header).to_csv(tmp, mode='a', header=False, index=False)
+    os.replace(tmp, path)
+
+
+def _unseen(rows, known):
+    """Mask of `rows` with a categorical value (e.g. a new sector) that no row of `known` has."""
+    mask = np.zeros(len(rows), dtype=bool)
+    for col in COLUMNS_TO_ENCODE:
+        mask |= ~rows[col].isin(known[col].unique()).to_numpy()
+    return mask
+
+
+def split_holdout(rows, known=None, fraction=HOLDOUT_FRACTION, seed=42):
+    """
+    (train, holdout, in_sample); too few rows are evaluated in-sample instead
+    of split. Holdout rows whose categories appear in neither `known` nor the
+    training part move to training, since no refit could score them.
+    """
+    if len(rows) < MIN_HOLDOUT_ROWS:
+        return rows, rows, True
+    holdout = rows.sample(frac=fraction, random_state=seed)
+    train = rows.drop(holdout.index)
+    unseen = _unseen(holdout, train if known is None else pd.concat([known, train]))
+    if unseen.all():
+        return rows, rows, True
+    return pd.concat([train, holdout[unseen]]), holdout[~unseen], False
+
+
+def unknown_categories(pipeline, rows):
+    """
+    {column: values} of `rows` that a fitted encoder of `pipeline` has no
+    category for and would reject (handle_unknown='error'). Any other problem
+    with the rows (a missing column, a wrong type) raises.
+    """
+    features = prepare_features(rows)
+    unknown = {}
+    for step in pipeline[:-1]:
+        for _, transformer, columns in getattr(step, 'transformers_', []):
+            categories = getattr(transformer, 'categories_', None)
+            if categories is None or getattr(transformer, 'handle_unknown', 'error') != 'error':
+                continue
+            for column, known in zip(columns, categories):
+                values = features[column]
+                new = set(values[~values.isin(known)])
+                if new:
+                    unknown[column] = sorted(new | set(unknown.get(column, [])))
+    return unknown
+
+
+def evaluate(pipeline, rows):
+    """Holdout metrics, or None when `pipeline` cannot encode the rows (a category it never saw)."""
+    from sklearn.metrics import mean_absolute_error, r2_score
+
+    if unknown_categories(pipeline, rows):
+        return None
+    predicted = predict_chunk(pipeline, rows)
+    actual = rows['price'].to_numpy()
+    return {
+        'r2': float(r2_score(np.log1p(actual), np.log1p(predicted))) if len(rows) > 1 else None,
+        'mae': float(mean_absolute_error(actual, predicted)),
+    }
+
+
+# --- Model update ---
+
+def _is_forest(regressor):
+    from sklearn.ensemble._forest import BaseForest
+    return isinstance(regressor, BaseForest)
+
+
+def update_pipeline(pipeline, new_rows, all_rows, new_trees=DEFAULT_NEW_TREES, max_trees=None, full=False):
+    """
+    A copy of `pipeline` updated with `new_rows`; returns (pipeline, method).
+
+    - partial_fit regressors (SGD, MLP, ...) take one pass over the new rows;
+    - warm_start ensembles grow `new_trees` more trees/stages on all rows,
+      forests then retire their oldest trees beyond `max_trees`;
+    - anything else, new categories the fitted encoders have not seen, or
+      `full=True` refits the whole pipeline on all rows.
+    The fitted preprocessor is kept on the incremental paths so the existing
+    trees/weights stay valid.
+    """
+    from sklearn.base import clone
+
+    updated = copy.deepcopy(pipeline)  # the loaded pipeline is shared with running sessions
+    preprocessor, regressor = updated[:-1], updated[-1]
+
+    if not full and unknown_categories(pipeline, new_rows):
+        full = True
+    if not full:
+        X_new = preprocessor.transform(prepare_features(new_rows))
+
+    if not full and hasattr(regressor, 'partial_fit'):
+        regressor.partial_fit(X_new, np.log1p(new_rows['price'].to_numpy()))
+        return updated, 'partial_fit'
+
+    params = regressor.get_params()
+    if not full and 'warm_start' in params and 'n_estimators' in params:
+        X_all = preprocessor.transform(prepare_features(all_rows))
+        regressor.set_params(warm_start=True, n_estimators=params['n_estimators'] + new_trees)
+        regressor.fit(X_all, np.log1p(all_rows['price'].to_numpy()))
+        regressor.set_params(warm_start=False)
+        limit = max_trees or params['n_estimators']
+        if _is_forest(regressor) and len(regressor.estimators_) > limit:
+            regressor.estimators_ = regressor.estimators_[-limit:]
+            regressor.n_estimators = limit
+        return updated, 'warm_start'
+
+    refit = clone(pipeline)
+    refit.fit(prepare_features(all_rows), np.log1p(all_rows['price'].to_numpy()))
+    return refit, 'refit'
+
+
+def recalibrate(pipeline, method, all_rows, holdout, in_sample, coverage=price_intervals.COVERAGE):
+    """
+    Attach prediction intervals to the updated `pipeline`; returns the share
+    of holdout prices they cover (None when the holdout is in-sample).
+
+    A refit, or a model that had no intervals, is calibrated out of fold on
+    all training rows at `coverage` (the base model's, as a refit is a fresh
+    clone without intervals). Incremental updates keep the base model's
+    table: only its quantiles are stored, not the residuals behind them, and
+    the holdout coverage shows when `python price_intervals.py` should
+    recalibrate from scratch.
+    """
+    intervals = price_intervals.get(pipeline)
+    if method == 'refit' or intervals is None:
+        intervals = price_intervals.fit(pipeline, all_rows, coverage)
+        price_intervals.attach(pipeline, intervals)
+    if in_sample:
+        return None
+
+    predicted = pipeline.predict(prepare_features(holdout))
+    types, actual = holdout['property_type'].to_numpy(), holdout['price'].to_numpy()
+    return intervals.empirical_coverage(actual, np.expm1(predicted), types)
+
+
+def retrain(new_paths, pipeline=None, base_version=None, new_trees=DEFAULT_NEW_TREES, max_trees=None,
+            full=False, require_improvement=False, publish=True, data_path=TRAINING_DATA):
+    """
+    Update the current model with the rows in `new_paths` and publish it as a
+    new version through artifacts.publish_model. Returns (version, metrics);
+    version is None when nothing was published.
+
+    metrics['before'] is None when the current model cannot score the holdout
+    (it has categories the model never saw); `require_improvement` then has
+    no baseline to hold the update to and does not block it. metrics['after']
+    is None when the updated model cannot score it either (an incremental
+    update keeps the encoders of a --pipeline fitted on other data); with
+    `require_improvement` that blocks publishing.
+    """
+    start = time.perf_counter()
+    if pipeline is None:
+        pipeline, base_version = artifacts.current_model()
+
+    known = training_data(data_path)
+    new_rows = only_new(read_rows(new_paths), known)
+    if new_rows.empty:
+        return None, {'rows_new': 0}
+
+    train_new, holdout, in_sample = split_holdout(new_rows, known)
+    all_rows = pd.concat([known, train_new], ignore_index=True)
+
+    base_intervals = price_intervals.get(pipeline)
+    coverage = base_intervals.coverage if base_intervals is not None else price_intervals.COVERAGE
+    before = evaluate(pipeline, holdout)
+    updated, method = update_pipeline(pipeline, train_new, all_rows, new_trees, max_trees, full)
+    after = evaluate(updated, holdout)
+    interval_coverage = recalibrate(updated, method, all_rows, holdout, in_sample, coverage)
+
+    metrics = {
+        'method': method,
+        'base_version': base_version,
+        'rows_new': len(new_rows),
+        'rows_train': len(all_rows),
+        'holdout_rows': len(holdout),
+        'holdout_in_sample': in_sample,
+        'before': before,
+        'after': after,
+        'interval_coverage': interval_coverage,
+        'seconds': round(time.perf_counter() - start, 2),
+    }
+    if not publish or (require_improvement and before is not None
+                       and (after is None or after['mae'] > before['mae'])):
+        return None, metrics
+
+    tmp = os.path.join(artifacts.MODEL_CACHE_DIR, f"{artifacts.MODEL_FILENAME}.tmp.{os.getpid()}")
+    os.makedirs(os.path.dirname(tmp), exist_ok=True)
+    try:
+        with open(tmp, 'wb') as f:
+            pickle.dump(updated, f)
+        version = artifacts.publish_model(tmp, metrics)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    # Holdout rows are ordinary training data for the next run
+    append_rows(data_path, new_rows)
+    return version, metrics
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Update the price model with new listings and publish it as a new version.")
+    parser.add_argument('new', nargs='+', help="CSV files in the post-feature-selection v2 schema")
+    parser.add_argument('--pipeline', help="Start from this pipeline.pkl instead of the current version")
+    parser.add_argument('--new-trees', type=int, default=DEFAULT_NEW_TREES,
+                        help="Trees/stages added to warm-start ensembles")
+    parser.add_argument('--max-trees', type=int, help="Forest size cap (default: the current size)")
+    parser.add_argument('--full', action='store_true', help="Refit the whole pipeline on all rows")
+    parser.add_argument('--require-improvement', action='store_true',
+                        help="Do not publish if holdout MAE gets worse (no-op when the current model "
+                             "cannot score the holdout)")
+    parser.add_argument('--dry-run', action='store_true', help="Report metrics without publishing")
+    parser.add_argument('--data', default=TRAINING_DATA, help="Accumulated training rows")
+    args = parser.parse_args(argv)
+
+    pipeline = base_version = None
+    if args.pipeline:
+        pipeline, base_version = load_pipeline(args.pipeline), artifacts.file_sha256(args.pipeline)
+
+    version, metrics = retrain(args.new, pipeline, base_version, args.new_trees, args.max_trees, args.full,
+                               args.require_improvement, not args.dry_run, args.data)
+    if not metrics['rows_new']:
+        print("No new rows.")
+        return 0
+    print(f"{metrics['method']}: {metrics['rows_new']} new rows, {metrics['rows_train']} training rows, "
+          f"{metrics['seconds']}s")
+    before, after = (f"{metrics[key]['mae']:.4f}" if metrics[key] is not None else 'n/a (unseen categories)'
+                     for key in ('before', 'after'))
+    print(f"holdout ({metrics['holdout_rows']} rows{', in-sample' if metrics['holdout_in_sample'] else ''}): "
+          f"MAE {before} -> {after} Cr")
+    if metrics['interval_coverage'] is not None:
+        print(f"price intervals cover {metrics['interval_coverage']:.0%} of holdout prices")
+    if version:
+        print(f"published {version}")
+        return 0
+    print("not published")
+    return 0 if args.dry_run else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,281 @@
+"""
+Sparse top-k similarity graphs for the recommender.
+
+Builds the three views the recommender fuses (amenities, price/area
+profile, location) from appartments.csv-style society features. Instead of
+dense N x N cosine matrices it keeps only each society's `k` most similar
+societies per view, as an N x N CSR matrix. Each view is then also scored on
+the other views' candidates, so fused scores are exact on the union (at
+most 3 * k entries per row):
+
+- facilities: TF-IDF (1-2 grams) of TopFacilities
+- price:      per-BHK area/price ranges and building types, standardized
+- location:   distances to landmarks from LocationAdvantages, standardized
+
+Rows are L2-normalised so the Euclidean kNN order is the cosine order
+(|a - b|^2 = 2 - 2 cos). Neighbors come from sklearn's brute-force
+chunked kNN, which multiplies blocks of rows against the whole matrix on
+all cores; query rows are fed in chunks so memory stays bounded by
+CHUNK_ELEMENTS and k, not N^2.
+
+`python similarity_graph.py appartments.csv` writes datasets/similarity/,
+which the Recommend page prefers over the dense cosine_sim pickles.
+"""
+import argparse
+import ast
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from artifacts import DATA_DIR
+
+VIEWS = ['facilities', 'price', 'location']
+GRAPH_DIR = os.path.join(DATA_DIR, 'similarity')
+# Neighbors kept per view; above the recommender's k so fusing views has candidates to rank
+DEFAULT_K = 50
+QUERY_CHUNK = 8192
+# Query rows per kneighbors call are capped so one chunk's distances stay under this many floats
+# (the sparse path materialises them; 2**24 float64 = 128 MB)
+CHUNK_ELEMENTS = 2 ** 24
+# Missing landmark distance, in meters (the notebook's fill value)
+FAR_DISTANCE = 54_000
+MAX_LANDMARKS = 1024
+APARTMENT_COLUMNS = ['PropertyName', 'TopFacilities', 'PriceDetails', 'LocationAdvantages']
+
+
+# --- View features ---
+
+def _literal(text, default):
+    try:
+        return ast.literal_eval(text) if isinstance(text, str) else default
+    except (ValueError, SyntaxError):
+        return default
+
+
+def facility_features(top_facilities):
+    """TF-IDF rows (L2-normalised CSR) over each society's amenity list."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    text = top_facilities.fillna('').str.findall(r"'([^']+)'").str.join(' ')
+    return TfidfVectorizer(analyzer='word', ngram_range=(1, 2), dtype=np.float32).fit_transform(text)
+
+
+def _range(text, unit_scale=None):
+    # '1,605 - 2,170 sq.ft.' -> (1605, 2170); '₹ 85 L - 1.2 Cr' -> (0.85, 1.2)
+    values = []
+    for part in text.split('-'):
+        number = pd.to_numeric(''.join(ch for ch in part if ch.isdigit() or ch == '.'), errors='coerce')
+        if unit_scale and ' L' in f'{part} ':
+            number = number / 100
+        values.append(number)
+    if len(values) == 1:
+        values = values * 2
+    return values[:2] if len(values) >= 2 else [np.nan, np.nan]
+
+
+def price_features(price_details):
+    """Per-BHK area/price low-high and building type columns, standardized (dense float32)."""
+    from sklearn.preprocessing import StandardScaler
+
+    records = []
+    for details in price_details:
+        record = {}
+        for bhk, detail in _literal(details, {}).items():
+            if not isinstance(detail, dict):
+                continue
+            record[f'building type_{bhk}'] = detail.get('building_type')
+            record[f'area low {bhk}'], record[f'area high {bhk}'] = _range(detail.get('area', ''))
+            record[f'price low {bhk}'], record[f'price high {bhk}'] = _range(
+                detail.get('price-range', '').replace('₹', ''), unit_scale=True)
+        records.append(record)
+    frame = pd.DataFrame.from_records(records)
+    types = [col for col in frame.columns if col.startswith('building type_')]
+    frame = pd.get_dummies(frame, columns=types, dtype=np.float32).fillna(0)
+    if frame.shape[1] == 0:
+        return np.zeros((len(records), 1), dtype=np.float32)
+    return StandardScaler().fit_transform(frame.to_numpy(dtype=np.float32))
+
+
+def _meters(distance):
+    # '3.2 KM' -> 3200.0, '700 Meter' -> 700.0, anything else -> NaN
+    number, _, unit = distance.strip().partition(' ')
+    number = pd.to_numeric(number, errors='coerce')
+    unit = unit.lower()
+    if unit.startswith('km'):
+        return number * 1000
+    return number if unit.startswith('meter') else np.nan
+
+
+def location_features(location_advantages, max_landmarks=MAX_LANDMARKS):
+    """Distances to the `max_landmarks` most cited landmarks (others dropped), standardized (dense float32)."""
+    from sklearn.preprocessing import StandardScaler
+
+    pairs = [(row, landmark, _meters(str(distance)))
+             for row, advantages in enumerate(location_advantages)
+             for landmark, distance in _literal(advantages, {}).items()]
+    pairs = pd.DataFrame(pairs, columns=['row', 'landmark', 'meters']).astype({'row': np.int64, 'meters': np.float64})
+    pairs = pairs.dropna()
+    landmarks = pairs['landmark'].value_counts().index[:max_landmarks]
+    pairs = pairs[pairs['landmark'].isin(landmarks)].drop_duplicates(['row', 'landmark'])
+
+    distances = np.full((len(location_advantages), max(len(landmarks), 1)), FAR_DISTANCE, dtype=np.float32)
+    distances[pairs['row'].to_numpy(), pd.Index(landmarks).get_indexer(pairs['landmark'])] = pairs['meters']
+    return StandardScaler().fit_transform(distances)
+
+
+def view_features(apartments):
+    """{view: feature matrix} for an appartments.csv frame, one row per society."""
+    return {
+        'facilities': facility_features(apartments['TopFacilities']),
+        'price': price_features(apartments['PriceDetails']),
+        'location': location_features(apartments['LocationAdvantages']),
+    }
+
+
+# --- Graph ---
+
+def top_k_graph(features, k=DEFAULT_K, chunk=QUERY_CHUNK, progress=None):
+    """
+    CSR matrix holding, for every row, the cosine similarity to its `k` most
+    similar other rows. `features` is dense or sparse, one row per item.
+    """
+    import scipy.sparse as sp
+    from sklearn.neighbors import NearestNeighbors
+    from sklearn.preprocessing import normalize
+
+    features = normalize(features)
+    n = features.shape[0]
+    k = min(k, n - 1)
+    chunk = max(1, min(chunk, CHUNK_ELEMENTS // n))
+    index = NearestNeighbors(n_neighbors=k + 1, algorithm='brute', metric='euclidean').fit(features)
+
+    indices = np.empty((n, k), dtype=np.int32)
+    scores = np.empty((n, k), dtype=np.float32)
+    for start in range(0, n, chunk):
+        stop = min(start + chunk, n)
+        distance, neighbor = index.kneighbors(features[start:stop])
+        # Drop each row itself; with exact duplicates it need not come first
+        is_self = neighbor == np.arange(start, stop)[:, None]
+        is_self[~is_self.any(axis=1), -1] = True
+        keep = ~is_self
+        indices[start:stop] = neighbor[keep].reshape(stop - start, k)
+        scores[start:stop] = 1 - distance[keep].reshape(stop - start, k) ** 2 / 2
+        if progress is not None:
+            progress(stop, n)
+
+    indptr = np.arange(0, n * k + 1, k, dtype=np.int64)
+    return sp.csr_matrix((scores.ravel(), indices.ravel(), indptr), shape=(n, n))
+
+
+def _row_dots(features, rows, cols, chunk=2 ** 16):
+    # Cosine of each (rows[i], cols[i]) pair of L2-normalised rows, a chunk of pairs at a time
+    values = np.empty(len(rows), dtype=np.float32)
+    for start in range(0, len(rows), chunk):
+        a, b = features[rows[start:start + chunk]], features[cols[start:start + chunk]]
+        dots = a.multiply(b).sum(axis=1) if hasattr(a, 'multiply') else np.einsum('ij,ij->i', a, b)
+        values[start:start + chunk] = np.asarray(dots).ravel()
+    return values
+
+
+def share_candidates(graphs, features):
+    """
+    Rescore every view on the union of all views' neighbor sets. The fused
+    score of a candidate is then exact, instead of missing the views in
+    whose own top-k it did not make it; at most len(views) * k pairs per row.
+    """
+    import scipy.sparse as sp
+    from sklearn.preprocessing import normalize
+
+    pattern = sum(abs(graph).astype(bool).astype(np.int8) for graph in graphs.values()).tocoo()
+    rows, cols = pattern.row, pattern.col
+    shared = {}
+    for view, graph in graphs.items():
+        values = _row_dots(normalize(features[view]), rows, cols)
+        shared[view] = sp.csr_matrix((values, (rows, cols)), shape=graph.shape)
+    return shared
+
+
+def build_graphs(apartments, k=DEFAULT_K, progress=None):
+    """{view: top-k CSR graph sharing the other views' candidates}, rows in `apartments` order."""
+    features = view_features(apartments)
+    graphs = {}
+    for view, matrix in features.items():
+        report = None if progress is None else (lambda done, n, view=view: progress(view, done, n))
+        graphs[view] = top_k_graph(matrix, k, progress=report)
+    return share_candidates(graphs, features)
+
+
+def read_apartments(path):
+    apartments = pd.read_csv(path, usecols=APARTMENT_COLUMNS)
+    return apartments.drop_duplicates('PropertyName').reset_index(drop=True)
+
+
+# --- Storage ---
+
+def save_graphs(graphs, names, graph_dir=GRAPH_DIR):
+    import scipy.sparse as sp
+
+    os.makedirs(graph_dir, exist_ok=True)
+    for view, graph in graphs.items():
+        path = os.path.join(graph_dir, f'{view}.npz')
+        tmp = f'{path}.tmp.npz'
+        sp.save_npz(tmp, graph)
+        os.replace(tmp, path)
+    with open(os.path.join(graph_dir, 'names.json'), 'w') as f:
+        json.dump({'names': [str(name) for name in names], 'views': list(graphs)}, f)
+    return graph_dir
+
+
+def load_graphs(graph_dir=GRAPH_DIR, hosted=True):
+    """
+    (names, [graph per view in VIEWS order]) or None when no graphs were built.
+    With `hosted`, attaches the artifact host's shared copy when it is current.
+    """
+    index_path = os.path.join(graph_dir, 'names.json')
+    if not os.path.exists(index_path):
+        return None
+    if hosted:
+        import artifacts
+
+        shared = artifacts._attach_hosted('similarity/graphs', source_path=index_path)
+        if shared is not None:
+            return shared
+    import scipy.sparse as sp
+
+    with open(index_path) as f:
+        index = json.load(f)
+    graphs = [sp.load_npz(os.path.join(graph_dir, f'{view}.npz')).tocsr() for view in index['views']]
+    return index['names'], graphs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build sparse top-k similarity graphs for the recommender.")
+    parser.add_argument('apartments', help="appartments.csv with PropertyName, TopFacilities, "
+                                           "PriceDetails and LocationAdvantages")
+    parser.add_argument('--k', type=int, default=DEFAULT_K, help="Neighbors kept per society and view")
+    parser.add_argument('--out', default=GRAPH_DIR)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    apartments = read_apartments(args.apartments)
+
+    reported = {}
+
+    def progress(view, done, n):
+        # Every 10% of rows per view
+        decile = done * 10 // n
+        if decile != reported.get(view):
+            reported[view] = decile
+            print(f"{view}: {done:,}/{n:,} rows ({time.perf_counter() - start:.1f}s)")
+
+    graphs = build_graphs(apartments, args.k, progress)
+    save_graphs(graphs, apartments['PropertyName'], args.out)
+    nnz = sum(graph.nnz for graph in graphs.values())
+    print(f"{len(apartments):,} societies, {nnz:,} edges in {time.perf_counter() - start:.1f}s -> {args.out}")
+
+
+if __name__ == '__main__':
+    main()
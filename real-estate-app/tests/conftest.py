@@ -0,0 +1,66 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# The app modules import each other as top-level modules (Streamlit runs from this directory)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_predict import FURNISHING_TYPES  # noqa: E402
+
+SECTORS = ['sector 36', 'sector 45', 'sector 89']
+
+
+def make_listings(n, seed=0, sectors=SECTORS, codes=False):
+    """
+    Synthetic rows in the training CSV's columns (gurgaon_properties_post_feature_selection_v2.csv).
+    furnishing_type holds the pipeline's labels like df.pkl, or with `codes` the CSV's 0/1/2.
+    """
+    rng = np.random.default_rng(seed)
+    area = rng.uniform(600, 3000, n).round()
+    sector = rng.choice(sectors, n)
+    df = pd.DataFrame({
+        'property_type': rng.choice(['flat', 'house'], n),
+        'sector': sector,
+        'bedRoom': rng.integers(1, 5, n).astype(float),
+        'bathroom': rng.integers(1, 5, n).astype(float),
+        'balcony': rng.choice(['1', '2', '3+'], n),
+        'agePossession': rng.choice(['New Property', 'Relatively New'], n),
+        'built_up_area': area,
+        'servant room': rng.integers(0, 2, n).astype(float),
+        'store room': rng.integers(0, 2, n).astype(float),
+        'furnishing_type': rng.integers(0, 3, n).astype(float),
+        'luxury_category': rng.choice(['Low', 'Medium', 'High'], n),
+        'floor_category': rng.choice(['Low Floor', 'Mid Floor', 'High Floor'], n),
+    })
+    sector_factor = 1 + 0.3 * np.array([sectors.index(s) for s in sector])
+    price = area / 1000 * sector_factor * rng.lognormal(0, 0.05, n)
+    df.insert(2, 'price', price.round(2))
+    if not codes:
+        df['furnishing_type'] = df['furnishing_type'].map(FURNISHING_TYPES)
+    return df
+
+
+@pytest.fixture
+def training_csv(tmp_path):
+    path = tmp_path / 'train.csv'
+    # Like the real file: furnishing_type as 0/1/2 codes
+    make_listings(120, codes=True).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture(scope='session')
+def notebook_pipeline():
+    """Fitted like model-selection.ipynb: furnishing_type is a label column of the encoders."""
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.pipeline import Pipeline
+
+    from batch_predict import FEATURE_COLUMNS
+    from model_selection import make_preprocessor
+
+    rows = make_listings(120)
+    model = Pipeline([('preprocessor', make_preprocessor()),
+                      ('regressor', RandomForestRegressor(n_estimators=10, random_state=0))])
+    return model.fit(rows[FEATURE_COLUMNS], np.log1p(rows['price']))
@@ -0,0 +1,21 @@
+import analytics_cache
+import coordinate_index
+
+
+def test_rebuilt_coordinate_index_invalidates_aggregates(tmp_path, monkeypatch):
+    csv_path = tmp_path / 'viz.csv'
+    csv_path.write_text('sector,price\nsector 36,1.0\n')
+    index_path = tmp_path / 'coordinates.npz'
+    index_path.write_bytes(b'first table')
+    monkeypatch.setattr(coordinate_index, 'INDEX_PATH', str(index_path))
+    builds = []
+    monkeypatch.setattr(analytics_cache, 'read_viz_data', lambda path: None)
+    monkeypatch.setattr(analytics_cache, 'build_aggregates', lambda df: builds.append(1) or {'n': len(builds)})
+
+    cache_dir = str(tmp_path / 'aggregates')
+    assert analytics_cache.AggregateStore.open(str(csv_path), cache_dir).n == 1
+    assert analytics_cache.AggregateStore.open(str(csv_path), cache_dir).n == 1
+
+    index_path.write_bytes(b'rebuilt table')
+    assert analytics_cache.AggregateStore.open(str(csv_path), cache_dir).n == 2
+    assert len(builds) == 2
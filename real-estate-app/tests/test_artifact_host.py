@@ -0,0 +1,78 @@
+import gc
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+import artifact_host
+
+
+@pytest.fixture
+def root(tmp_path):
+    yield str(tmp_path)
+    gc.collect()  # run the release callbacks of anything a failed test still held
+    assert not [key for key in artifact_host._attached if key[1] == str(tmp_path)]
+
+
+def publish(name, version, root):
+    return artifact_host.publish(name, {'values': np.arange(1000, dtype=np.float64) + len(version)}, version,
+                                 root=root)
+
+
+def test_referenced_segment_is_not_collected(root):
+    old = publish('matrix/a', 'v1', root)
+    attached = artifact_host.attach('matrix/a', root=root)
+    assert artifact_host.live_refs(old['segment'], root) == [os.getpid()]
+    publish('matrix/a', 'v2', root)
+
+    assert artifact_host.collect(root) == []
+    np.testing.assert_array_equal(attached['values'], np.arange(1000) + 2)
+
+    del attached
+    gc.collect()
+    assert artifact_host.live_refs(old['segment'], root) == []
+    assert artifact_host.collect(root) == [old['segment']]
+
+
+def test_segment_referenced_by_a_dead_pid_is_collected(root):
+    old = publish('matrix/a', 'v1', root)
+    publish('matrix/a', 'v2', root)
+    child = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'],
+                           capture_output=True, text=True, check=True)
+    refs = artifact_host._refs_dir(old['segment'], root)
+    os.makedirs(refs)
+    open(os.path.join(refs, child.stdout.strip()), 'w').close()
+
+    assert artifact_host.live_refs(old['segment'], root) == []
+    assert artifact_host.collect(root) == [old['segment']]
+    assert not os.path.exists(refs)
+
+
+def test_attach_retries_when_collect_wins_the_race(root, monkeypatch):
+    stale = publish('matrix/a', 'v1', root)
+    current = publish('matrix/a', 'v2', root)
+    manifests = iter([stale])
+    read_manifest = artifact_host.read_manifest
+    monkeypatch.setattr(artifact_host, 'read_manifest',
+                        lambda name, root: next(manifests, None) or read_manifest(name, root))
+    collected = []
+    add_ref = artifact_host._add_ref
+
+    def collect_then_add_ref(segment, root):
+        # The host collects after the replica read the manifest but before it registered its ref
+        if not collected:
+            collected.extend(artifact_host.collect(root))
+        add_ref(segment, root)
+
+    monkeypatch.setattr(artifact_host, '_add_ref', collect_then_add_ref)
+
+    attached = artifact_host.attach('matrix/a', root=root)
+    assert collected == [stale['segment']]
+    np.testing.assert_array_equal(attached['values'], np.arange(1000) + 2)
+    assert artifact_host.live_refs(current['segment'], root) == [os.getpid()]
+    assert (stale['segment'], root) not in artifact_host._attached
+    assert not os.path.exists(
+        os.path.join(artifact_host._refs_dir(stale['segment'], root), str(os.getpid())))
+    del attached
@@ -0,0 +1,44 @@
+import pickle
+
+import pytest
+
+import artifacts
+
+
+@pytest.fixture
+def model_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, 'MODEL_CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setattr(artifacts, 'MODEL_REFRESH_SECONDS', 5.0)
+    monkeypatch.delenv('REAL_ESTATE_MODEL_PATH', raising=False)
+    monkeypatch.setattr(artifacts, '_attach_hosted', lambda *args: None)
+    # The process-wide stores are restored afterwards so other tests see what they loaded
+    stores = (artifacts._cache, artifacts._model_versions, artifacts._model_checked)
+    saved = [dict(store) for store in stores]
+    yield tmp_path
+    for store, before in zip(stores, saved):
+        store.clear()
+        store.update(before)
+
+
+def _publish(tmp_path, model):
+    path = tmp_path / f'{model}.pkl'
+    path.write_bytes(pickle.dumps(model))
+    return artifacts.publish_model(str(path), filename='test.pkl')
+
+
+def test_shared_and_private_models_refresh_independently(model_cache, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(artifacts.time, 'monotonic', lambda: clock[0])
+    v1 = _publish(model_cache, 'v1')
+    assert artifacts.current_model('test.pkl', allow_hub=False) == ('v1', v1)
+    clock[0] += 3
+    assert artifacts.current_model('test.pkl', allow_hub=False, shared=True) == ('v1', v1)
+
+    v2 = _publish(model_cache, 'v2')
+    clock[0] += 3
+    # The private copy is due and swaps; that must not reset the shared copy's timer
+    assert artifacts.current_model('test.pkl', allow_hub=False) == ('v2', v2)
+    clock[0] += 3
+    assert artifacts.current_model('test.pkl', allow_hub=False, shared=True) == ('v2', v2)
+    assert artifacts.model_version('test.pkl') == v2
+    assert artifacts.model_version('test.pkl', shared=True) == v2
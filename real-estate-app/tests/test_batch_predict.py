@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+
+import batch_predict
+from conftest import make_listings
+
+
+def test_score_file_matches_pipeline_on_labelled_rows(notebook_pipeline, tmp_path):
+    rows = make_listings(50, seed=3)
+    assert rows['furnishing_type'].isin(batch_predict.FURNISHING_TYPES.values()).all()
+    rows.to_csv(tmp_path / 'in.csv', index=False)
+
+    summary = batch_predict.score_file(notebook_pipeline, str(tmp_path / 'in.csv'), str(tmp_path / 'out.csv'),
+                                       chunksize=20)
+
+    scored = pd.read_csv(tmp_path / 'out.csv')
+    assert summary['rows'] == 50
+    expected = np.expm1(notebook_pipeline.predict(rows[batch_predict.FEATURE_COLUMNS]))
+    np.testing.assert_allclose(scored[batch_predict.PRICE_COLUMN], expected)
+
+
+def test_training_csv_codes_score_as_their_labels(notebook_pipeline):
+    labelled = make_listings(30, seed=4)
+    coded = make_listings(30, seed=4, codes=True)
+    assert coded['furnishing_type'].dtype == float
+
+    features = batch_predict.prepare_features(coded)
+    assert features['furnishing_type'].tolist() == labelled['furnishing_type'].tolist()
+    np.testing.assert_allclose(batch_predict.predict_chunk(notebook_pipeline, coded),
+                               batch_predict.predict_chunk(notebook_pipeline, labelled))
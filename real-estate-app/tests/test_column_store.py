@@ -0,0 +1,61 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import column_store
+
+
+def _write_csv(path):
+    df = pd.DataFrame({
+        'society': ['b society', 'a society', 'c society', 'd society'],
+        'sector': ['sector 89', 'sector 36', 'sector 89', 'sector 36'],
+        'property_type': ['flat', 'house', 'flat', 'flat'],
+        'bedRoom': [3.0, 2.0, 4.0, 3.0],
+        'balcony': ['3+', '1', '2', '3+'],
+        'price': [1.25, 0.82, 2.1, 0.95],
+    })
+    df.to_csv(path, index=False)
+    return pd.read_csv(path)
+
+
+def test_load_keeps_csv_row_order_and_dtypes(tmp_path):
+    csv_path = str(tmp_path / 'viz.csv')
+    source = _write_csv(csv_path)
+    column_store.convert(csv_path)
+
+    loaded = column_store.load(csv_path)
+    assert list(loaded.columns) == list(source.columns)
+    assert loaded['society'].astype(str).tolist() == source['society'].tolist()
+    assert loaded['bedRoom'].dtype.kind == 'f'
+    assert str(loaded['bedRoom'].iloc[0]) == '3.0'
+    assert loaded['balcony'].astype(str).tolist() == source['balcony'].tolist()
+    # Displayed measures keep the CSV's float64 values (no 0.8199999928474426 in hover labels)
+    assert loaded['price'].dtype == np.float64
+    assert loaded['price'].tolist() == source['price'].tolist()
+    assert str(loaded['price'].iloc[1]) == '0.82'
+
+    subset = column_store.load(csv_path, columns=['society', 'sector'], filters=[('sector', '==', 'sector 89')])
+    assert list(subset.columns) == ['society', 'sector']
+    assert subset['society'].astype(str).tolist() == ['b society', 'c society']
+
+
+def test_is_fresh_hashes_only_when_size_or_mtime_change(tmp_path, monkeypatch):
+    csv_path = str(tmp_path / 'viz.csv')
+    _write_csv(csv_path)
+    column_store.convert(csv_path)
+
+    hashed = []
+    real_sha256 = column_store.file_sha256
+    monkeypatch.setattr(column_store, 'file_sha256', lambda path: hashed.append(path) or real_sha256(path))
+    assert column_store.is_fresh(csv_path)
+    assert hashed == []
+
+    # Same bytes, new mtime (e.g. a fresh checkout): hashed once and still fresh
+    os.utime(csv_path, ns=(0, 0))
+    assert column_store.is_fresh(csv_path)
+    assert hashed == [csv_path]
+
+    with open(csv_path, 'a') as f:
+        f.write('e society,sector 45,flat,1.0,0,0.5\n')
+    assert not column_store.is_fresh(csv_path)
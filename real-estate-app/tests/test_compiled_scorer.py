@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from batch_predict import FEATURE_COLUMNS, prepare_features
+from compiled_scorer import CompiledScorer, compile_pipeline, export_pipeline
+from conftest import make_listings
+from model_selection import make_preprocessor
+
+
+def _regressors():
+    from sklearn.ensemble import ExtraTreesRegressor, GradientBoostingRegressor, RandomForestRegressor
+    from sklearn.linear_model import Lasso, LinearRegression, Ridge
+    from sklearn.tree import DecisionTreeRegressor
+
+    return {
+        'linear_reg': LinearRegression(),
+        'ridge': Ridge(),
+        'LASSO': Lasso(alpha=0.001),
+        'decision tree': DecisionTreeRegressor(random_state=0),
+        'random forest': RandomForestRegressor(n_estimators=15, random_state=0),
+        'extra trees': ExtraTreesRegressor(n_estimators=15, random_state=0),
+        'gradient boosting': GradientBoostingRegressor(n_estimators=30, random_state=0),
+    }
+
+
+def _fit(*steps, rows=None):
+    from sklearn.pipeline import make_pipeline
+
+    rows = make_listings(150) if rows is None else rows
+    return make_pipeline(*steps).fit(prepare_features(rows), np.log1p(rows['price']))
+
+
+@pytest.mark.parametrize('pca', [False, True], ids=['columns', 'pca'])
+@pytest.mark.parametrize('name', list(_regressors()))
+def test_compiled_scorer_matches_pipeline(name, pca, tmp_path):
+    from sklearn.decomposition import PCA
+
+    # StandardScaler, OrdinalEncoder, OneHotEncoder(drop='first') and passthrough, as in the notebook
+    steps = [make_preprocessor()] + ([PCA(n_components=0.95, whiten=True)] if pca else []) + [_regressors()[name]]
+    pipeline = _fit(*steps)
+    scorer = CompiledScorer.load(export_pipeline(pipeline, str(tmp_path / 'scorer.npz')))
+
+    rows = prepare_features(make_listings(400, seed=7))
+    expected = pipeline.predict(rows)
+    if pca:
+        # The projection may sum in a different order than sklearn's: equal to the last few bits
+        np.testing.assert_allclose(scorer.predict(rows), expected, rtol=1e-12, atol=1e-12)
+    else:
+        np.testing.assert_array_equal(scorer.predict(rows), expected)
+    np.testing.assert_allclose(scorer.predict_rows(rows.to_dict('records')), np.expm1(expected), rtol=1e-12)
+
+
+def test_unknown_category_raises_like_the_encoder(tmp_path):
+    pipeline = _fit(make_preprocessor(), _regressors()['ridge'])
+    scorer = CompiledScorer.load(export_pipeline(pipeline, str(tmp_path / 'scorer.npz')))
+    rows = prepare_features(make_listings(5, seed=8, sectors=['sector 36', 'sector 999']))
+    with pytest.raises(ValueError, match='unknown categories'):
+        pipeline.predict(rows)
+    with pytest.raises(ValueError, match='unknown categories'):
+        scorer.predict(rows)
+
+
+def _unsupported():
+    from sklearn.compose import ColumnTransformer
+    from sklearn.neighbors import KNeighborsRegressor
+    from sklearn.preprocessing import FunctionTransformer, MinMaxScaler, TargetEncoder
+
+    numeric = ['bedRoom', 'bathroom', 'built_up_area']
+    return {
+        'transformer': [ColumnTransformer([('num', MinMaxScaler(), numeric)]), _regressors()['ridge']],
+        'target encoder': [ColumnTransformer([('num', 'passthrough', numeric),
+                                              ('sector', TargetEncoder(), ['sector'])]), _regressors()['ridge']],
+        'pipeline step': [make_preprocessor(), FunctionTransformer(np.tanh), _regressors()['ridge']],
+        'regressor': [make_preprocessor(), KNeighborsRegressor()],
+    }
+
+
+@pytest.mark.parametrize('what', list(_unsupported()))
+def test_unsupported_steps_raise_not_implemented(what):
+    pipeline = _fit(*_unsupported()[what])
+    with pytest.raises(NotImplementedError):
+        compile_pipeline(pipeline)
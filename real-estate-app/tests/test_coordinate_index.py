@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+from coordinate_index import SECTOR, SOCIETY, CoordinateIndex
+from geo_index import GeoIndex
+
+
+def small_index():
+    return CoordinateIndex(['sector 36', 'sector 45', 'park view'], [SECTOR, SECTOR, SOCIETY],
+                           [28.41, 28.44, 28.50], [76.99, 77.06, 77.10])
+
+
+def test_attach_prefers_society_then_sector():
+    listings = pd.DataFrame({'society': ['Park-View', 'nowhere', 'nowhere'],
+                             'sector': ['Sec 36', 'Sector  45', 'sector 999']})
+    located = small_index().attach(listings)
+    np.testing.assert_allclose(located['latitude'], [28.50, 28.44, np.nan])
+    np.testing.assert_allclose(located['longitude'], [77.10, 77.06, np.nan])
+
+
+def test_geo_index_locates_listings_without_coordinates():
+    df = pd.DataFrame({'society': ['a', 'b', 'park view'], 'sector': ['sector 36', 'sector 36', 'sector 36'],
+                       'latitude': [28.41, np.nan, np.nan], 'longitude': [76.99, np.nan, np.nan]})
+    geo = GeoIndex.from_data_viz(df, small_index())
+    assert sorted(geo.places['society']) == ['a', 'b', 'park view']
+    assert geo.nearest(28.50, 77.10, k=1)['society'].tolist() == ['park view']
+    # No listings in sector 45, but the index knows where it is
+    assert geo.sector_origin('sector 45') == (28.44, 77.06)
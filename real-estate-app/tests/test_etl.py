@@ -0,0 +1,45 @@
+import os
+
+import pandas as pd
+import pytest
+
+from artifacts import APP_DIR, file_sha256
+from etl import pipeline
+
+RAW_DIR = os.path.join(APP_DIR, '..', 'Datasets')
+HOUSES = os.path.join(RAW_DIR, 'houses.csv')
+CLEANED_V2 = os.path.join(RAW_DIR, 'gurgaon_properties_cleaned_v2 (2).csv')
+
+
+def test_merge_refuses_to_run_on_one_export(tmp_path):
+    with pytest.raises(FileNotFoundError, match='flats'):
+        pipeline.run(flats=None, houses=HOUSES, output=str(tmp_path / 'out.csv'), cache_dir=str(tmp_path / 'c'))
+    with pytest.raises(FileNotFoundError, match='flats'):
+        pipeline.run(flats=str(tmp_path / 'flats.csv'), houses=HOUSES, output=str(tmp_path / 'out.csv'),
+                     cache_dir=str(tmp_path / 'c'))
+    assert not (tmp_path / 'out.csv').exists()
+
+
+def test_cli_never_touches_training_data_by_default(tmp_path, capsys):
+    before = file_sha256(pipeline.TRAINING_DATA)
+    with pytest.raises(SystemExit) as exit_info:
+        pipeline.main(['--houses', HOUSES, '--flats', str(tmp_path / 'missing.csv'),
+                       '--cache-dir', str(tmp_path / 'c')])
+    assert exit_info.value.code == 2
+    assert 'flats' in capsys.readouterr().err
+    assert file_sha256(pipeline.TRAINING_DATA) == before
+    assert os.path.abspath(pipeline.DEFAULT_OUTPUT) != os.path.abspath(pipeline.TRAINING_DATA)
+
+
+def test_later_stages_write_the_training_layout(tmp_path):
+    source = tmp_path / 'cleaned_v2.csv'
+    pd.read_csv(CLEANED_V2).head(400).to_csv(source, index=False)
+    output = tmp_path / 'out' / 'final.csv'
+
+    outputs = pipeline.run(start='outliers', input_path=str(source), output=str(output),
+                           cache_dir=str(tmp_path / 'c'), log=lambda message: None)
+    assert list(outputs) == ['outliers', 'impute', 'categories']
+    final = pd.read_csv(output)
+    assert list(final.columns) == list(pd.read_csv(pipeline.TRAINING_DATA, nrows=0).columns)
+    assert 0 < len(final) <= 400
+    assert final['price'].notna().all()
@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+
+from geo_index import landmark_radius
+from matrix_store import MappedMatrix
+
+
+def test_landmark_radius_matches_location_df_filter():
+    rng = np.random.default_rng(0)
+    location_df = pd.DataFrame(rng.uniform(0, 20_000, (40, 3)),
+                               index=[f'property {i}' for i in range(40)],
+                               columns=['IGI Airport', 'HUDA City Centre Metro', 'Cyber Hub'])
+    matrix = MappedMatrix.from_object(location_df)
+
+    for landmark in location_df.columns:
+        # The page's search before the spatial index
+        expected = location_df[location_df[landmark] < 5 * 1000][landmark].sort_values()
+        result = landmark_radius(matrix, landmark, 5)
+        assert result['society'].tolist() == expected.index.tolist()
+        np.testing.assert_allclose(result['distance_km'], expected.to_numpy() / 1000)
+        assert result['sector'].isna().all()
@@ -0,0 +1,60 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from latlong_scraper import GeocodeCache, Geocoder, NominatimProvider
+
+ANSWERS = {
+    'sector 1': b'[{"lat": "28.41", "lon": "76.99"}]',
+    'sector 2': b'<html>rate limited</html>',
+    'sector 3': b'[]',
+}
+
+
+@pytest.fixture
+def stub_url():
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            from urllib.parse import parse_qs, urlsplit
+            query = parse_qs(urlsplit(self.path).query)['q'][0].split(',')[0]
+            body = ANSWERS[query]
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+
+
+def test_unreadable_response_fails_only_its_query(stub_url, tmp_path):
+    cache = GeocodeCache(str(tmp_path / 'cache.jsonl'))
+    geocoder = Geocoder(NominatimProvider(stub_url), cache, rate=0, retries=0)
+    try:
+        results = geocoder.geocode(list(ANSWERS))
+    finally:
+        geocoder.close()
+    assert results == {'sector 1': (28.41, 76.99), 'sector 3': None}
+
+
+def test_cache_keys_are_per_endpoint(stub_url, tmp_path):
+    path = str(tmp_path / 'cache.jsonl')
+    geocoder = Geocoder(NominatimProvider(stub_url), GeocodeCache(path), rate=0, retries=0)
+    try:
+        geocoder.geocode(['sector 1'])
+    finally:
+        geocoder.close()
+
+    cache = GeocodeCache(path)
+    assert cache.key(NominatimProvider(stub_url), 'sector 1') in cache
+    assert cache.key(NominatimProvider(), 'sector 1') not in cache
+    assert cache.key(NominatimProvider(), 'Sector  1') == 'nominatim:sector 1'
+    with open(path) as f:
+        assert [json.loads(line)['coords'] for line in f] == [[28.41, 76.99]]
@@ -0,0 +1,49 @@
+import model_selection
+
+
+def entry(model, mae, fold_key='k', **params):
+    return {'model': model, 'r2': 0.9, 'mae': mae, 'fit_seconds': 0.1, 'predict_seconds': 0.01,
+            'fold_key': fold_key, 'params': params}
+
+
+def test_leaderboard_keeps_latest_entry_per_model():
+    entries = [entry('ridge', 0.5), entry('svr', 0.4), entry('ridge', 0.3), entry('ridge', 0.1, fold_key='old')]
+    board = model_selection.leaderboard_frame(entries, 'k')
+    assert board['model'].tolist() == ['ridge', 'svr']
+    assert board['mae'].tolist() == [0.3, 0.4]
+
+
+def test_resume_skips_done_models_and_reruns_changed_params(training_csv, tmp_path, monkeypatch):
+    work_dir = str(tmp_path / 'work')
+    seen = []
+    model_selection.run(training_csv, ['ridge', 'linear_reg'], work_dir, workers=1, n_splits=2,
+                        on_result=seen.append)
+    assert sorted(e['model'] for e in seen) == ['linear_reg', 'ridge']
+
+    seen.clear()
+    model_selection.run(training_csv, ['ridge', 'linear_reg'], work_dir, workers=1, n_splits=2,
+                        on_result=seen.append)
+    assert seen == []
+
+    # Same name, different params: no longer "done"
+    from sklearn.linear_model import Ridge
+    factories = model_selection.model_factories()
+    factories['ridge'] = lambda: Ridge(alpha=10.0)
+    monkeypatch.setattr(model_selection, 'model_factories', lambda: factories)
+    board = model_selection.run(training_csv, ['ridge', 'linear_reg'], work_dir, workers=1, n_splits=2,
+                                on_result=seen.append)
+    assert [e['model'] for e in seen] == ['ridge']
+    assert seen[0]['params']['alpha'] == '10.0'
+    assert sorted(board['model']) == ['linear_reg', 'ridge']
+
+
+def test_training_data_uses_the_notebook_schema(tmp_path):
+    from conftest import make_listings
+
+    path = tmp_path / 'train.csv'
+    make_listings(30, codes=True).to_csv(path, index=False)
+    X, y = model_selection.load_training_data(str(path))
+    assert X['furnishing_type'].tolist() == make_listings(30)['furnishing_type'].tolist()
+
+    transformers = {name: transformer for name, transformer, _ in model_selection.make_preprocessor().transformers}
+    assert transformers['cat1'].handle_unknown == 'error'
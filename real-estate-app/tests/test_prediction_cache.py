@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+from batch_predict import FEATURE_COLUMNS
+from conftest import make_listings
+from prediction_cache import PredictionCache
+
+
+def page_rows(df, n):
+    """One-row frames as the Price Predictor builds them: string options from df.pkl, floats for the numbers."""
+    rng = np.random.default_rng(6)
+    rows = []
+    for _ in range(n):
+        row = {col: rng.choice(sorted(df[col].unique())) for col in FEATURE_COLUMNS}
+        row.update({col: float(row[col]) for col in ('bedRoom', 'bathroom', 'servant room', 'store room')})
+        row['built_up_area'] = float(rng.integers(500, 3000))
+        rows.append(pd.DataFrame([row], columns=FEATURE_COLUMNS))
+    return rows
+
+
+def test_cached_prices_match_pipeline_on_df_pkl_rows(notebook_pipeline):
+    # df.pkl is the training frame without price, furnishing_type as labels
+    df = make_listings(120).drop(columns=['price'])
+    assert df['furnishing_type'].dtype == object
+    cache = PredictionCache()
+
+    for one_df in page_rows(df, 10) * 2:
+        expected = np.expm1(notebook_pipeline.predict(one_df))
+        np.testing.assert_allclose(cache.predict(notebook_pipeline, one_df, 'v1'), expected)
+
+    stats = cache.stats()
+    assert stats['misses'] == 10 and stats['hits'] == 10
@@ -0,0 +1,82 @@
+import json
+import threading
+import urllib.request
+
+import numpy as np
+import pytest
+
+from batch_predict import FEATURE_COLUMNS
+from conftest import make_listings
+from prediction_server import PredictionService, serve
+
+ROW = {
+    'property_type': 'flat', 'sector': 'sector 45', 'bedRoom': 3.0, 'bathroom': 3.0, 'balcony': '3+',
+    'agePossession': 'New Property', 'built_up_area': 1500.0, 'servant room': 0.0, 'store room': 0.0,
+    'furnishing_type': 'unfurnished', 'luxury_category': 'Low', 'floor_category': 'Mid Floor',
+}
+
+
+class SectorModel:
+    """Stand-in pipeline: log price from built-up area; unseen sectors fail like the encoder does."""
+
+    def __init__(self, sectors):
+        self.sectors = set(sectors)
+        self.calls = 0
+
+    def predict(self, X):
+        self.calls += 1
+        unknown = sorted(set(X['sector']) - self.sectors)
+        if unknown:
+            raise ValueError(f"Found unknown categories {unknown}")
+        return np.log1p(X['built_up_area'].to_numpy() / 1000)
+
+
+def test_bad_row_does_not_fail_its_batch():
+    model = SectorModel(['sector 45'])
+    # A long wait so all three rows land in one batch
+    service = PredictionService(model, max_wait_ms=500)
+    good = [service.batcher.submit({**ROW, 'built_up_area': area}) for area in (1000.0, 2000.0)]
+    bad = service.batcher.submit({**ROW, 'sector': 'sector 999'})
+
+    assert [f.result(timeout=5) for f in good] == pytest.approx([1.0, 2.0])
+    with pytest.raises(ValueError, match='sector 999'):
+        bad.result(timeout=5)
+
+
+def test_predict_one_rejects_bad_types_before_queueing():
+    model = SectorModel(['sector 45'])
+    service = PredictionService(model)
+    with pytest.raises(ValueError):
+        service.predict_one({**ROW, 'bedRoom': 'three'})
+    with pytest.raises(KeyError):
+        service.predict_one({k: v for k, v in ROW.items() if k != 'sector'})
+    assert model.calls == 0
+    assert service.predict_one(ROW) == pytest.approx(1.5)
+
+
+def _post(port, path, payload):
+    request = urllib.request.Request(f'http://127.0.0.1:{port}{path}', json.dumps(payload).encode(),
+                                     {'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.loads(response.read())
+
+
+def test_http_predictions_with_labelled_furnishing_types(notebook_pipeline):
+    rows = make_listings(12, seed=5)
+    assert set(rows['furnishing_type']) <= {'unfurnished', 'semifurnished', 'furnished'}
+    expected = np.expm1(notebook_pipeline.predict(rows[FEATURE_COLUMNS]))
+    payload = rows[FEATURE_COLUMNS].to_dict('records')
+
+    server, _ = serve(notebook_pipeline, port=0, max_wait_ms=1)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        port = server.server_address[1]
+        single = [_post(port, '/predict', row)['price'] for row in payload]
+        batch = _post(port, '/predict/batch', {'rows': payload})['prices']
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    np.testing.assert_allclose(single, expected)
+    np.testing.assert_allclose(batch, expected)
@@ -0,0 +1,44 @@
+import pickle
+
+import numpy as np
+
+import price_intervals
+from batch_predict import prepare_features
+from conftest import make_listings
+
+
+def linear_pipeline(rows):
+    from sklearn.linear_model import Ridge
+    from sklearn.pipeline import make_pipeline
+
+    from model_selection import make_preprocessor
+
+    return make_pipeline(make_preprocessor(), Ridge()).fit(prepare_features(rows), np.log1p(rows['price']))
+
+
+def test_intervals_reach_their_coverage_on_new_rows():
+    rows = make_listings(600, seed=10)
+    pipeline = linear_pipeline(rows)
+    intervals = price_intervals.fit(pipeline, rows, coverage=0.8)
+    price_intervals.attach(pipeline, intervals)
+
+    fresh = make_listings(3000, seed=11)
+    prices = np.expm1(pipeline.predict(prepare_features(fresh)))
+    low, high = price_intervals.bounds(pipeline, prices, fresh['property_type'])
+    covered = np.mean((fresh['price'] >= low) & (fresh['price'] <= high))
+    assert 0.75 <= covered <= 0.9
+    assert (low <= prices).all() and (prices <= high).all()
+
+
+def test_only_the_quantile_table_is_pickled():
+    rows = make_listings(600, seed=10)
+    pipeline = linear_pipeline(rows)
+    bare = len(pickle.dumps(pipeline))
+    price_intervals.attach(pipeline, price_intervals.fit(pipeline, rows))
+
+    stored = getattr(pipeline, price_intervals.ATTRIBUTE)
+    assert set(stored) == {'types', 'edges', 'lower', 'upper', 'coverage', 'rows'}
+    assert int(stored['rows']) == 600
+    assert len(pickle.dumps(pipeline)) - bare < 2_000
+    restored = price_intervals.get(pickle.loads(pickle.dumps(pipeline)))
+    assert restored.rows == 600 and restored.coverage == price_intervals.COVERAGE
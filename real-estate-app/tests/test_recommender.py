@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from recommender import DEFAULT_WEIGHTS, Recommender
+
+
+def cosine_views(n, seed=0):
+    rng = np.random.default_rng(seed)
+    views = []
+    for dims in (6, 4, 3):
+        features = rng.random((n, dims))
+        features /= np.linalg.norm(features, axis=1, keepdims=True)
+        views.append(features @ features.T)
+    return views
+
+
+def full_sort_ranking(names, views, weights, property_name, top_n):
+    # The page's ranking before the top-k table: sort the whole weighted row, skip the property itself
+    matrix = sum(weight * view for weight, view in zip(weights, views))
+    row = matrix[names.get_loc(property_name)]
+    ranked = sorted(enumerate(row), key=lambda x: x[1], reverse=True)[1:top_n + 1]
+    return names[[i for i, _ in ranked]].tolist(), [score for _, score in ranked]
+
+
+def test_top_k_table_matches_full_sort():
+    names = pd.Index([f'property {i}' for i in range(60)])
+    views = cosine_views(len(names))
+    engine = Recommender(names, views, k=10)
+    custom = (1.0, 0.2, 0.5)
+
+    for name in names[::7]:
+        for top_n, weights in ((5, None), (10, None), (15, None), (5, custom)):
+            expected_names, expected_scores = full_sort_ranking(names, views, weights or DEFAULT_WEIGHTS, name, top_n)
+            got_names, got_scores = engine.recommend(name, top_n, weights)
+            assert got_names == expected_names
+            np.testing.assert_allclose(got_scores, expected_scores, rtol=1e-5)
+
+
+def test_tiny_tables_have_no_recommendations():
+    empty = Recommender([], [np.ones((0, 0)) for _ in DEFAULT_WEIGHTS])
+    assert empty.neighbor_index.shape == (0, 0)
+
+    views = [np.ones((1, 1)) for _ in DEFAULT_WEIGHTS]
+    engine = Recommender(['only one'], views)
+    assert engine.neighbor_index.shape == (1, 0)
+    assert engine.recommend('only one') == ([], [])
+    assert engine.recommend('only one', weights=(1.0, 1.0, 1.0)) == ([], [])
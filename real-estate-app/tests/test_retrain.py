@@ -0,0 +1,101 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import price_intervals
+import retrain
+from conftest import make_listings
+
+
+def forest_pipeline(rows):
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.pipeline import Pipeline
+
+    from model_selection import make_preprocessor
+
+    pipeline = Pipeline([('preprocessor', make_preprocessor()),
+                         ('regressor', RandomForestRegressor(n_estimators=10, random_state=42))])
+    return pipeline.fit(rows[retrain.FEATURE_COLUMNS], np.log1p(rows['price']))
+
+
+@pytest.fixture
+def known(training_csv):
+    return retrain.read_rows([training_csv])
+
+
+def new_listings_with_unseen_sector(n=60):
+    rows = make_listings(n, seed=1)
+    rows.loc[::3, 'sector'] = 'sector 999'
+    return rows
+
+
+def test_unseen_sector_in_holdout_refits_without_baseline(known, training_csv, tmp_path):
+    pipeline = forest_pipeline(known)
+    new_path = tmp_path / 'new.csv'
+    new_listings_with_unseen_sector().to_csv(new_path, index=False)
+
+    version, metrics = retrain.retrain([str(new_path)], pipeline, 'base', publish=False,
+                                       require_improvement=True, data_path=training_csv)
+    assert version is None
+    assert metrics['method'] == 'refit'
+    assert metrics['before'] is None
+    assert metrics['after']['mae'] >= 0
+
+
+def test_refit_keeps_configured_interval_coverage(known):
+    pipeline = forest_pipeline(known)
+    price_intervals.attach(pipeline, price_intervals.fit(pipeline, known, coverage=0.9, folds=3))
+    new_rows = new_listings_with_unseen_sector()
+
+    train_new, holdout, in_sample = retrain.split_holdout(new_rows, known)
+    all_rows = pd.concat([known, train_new], ignore_index=True)
+    updated, method = retrain.update_pipeline(pipeline, train_new, all_rows)
+    assert method == 'refit'
+    assert price_intervals.get(updated) is None  # clone() drops the attached table
+
+    coverage = price_intervals.get(pipeline).coverage
+    retrain.recalibrate(updated, method, all_rows, holdout, in_sample, coverage)
+    assert price_intervals.get(updated).coverage == 0.9
+
+
+def test_holdout_rows_with_categories_nobody_has_move_to_training(known):
+    rows = make_listings(40, seed=2)
+    rows.loc[rows.index[-1], 'sector'] = 'sector 1000'  # one row: only ever in one part
+    train, holdout, in_sample = retrain.split_holdout(rows, known)
+    assert not in_sample
+    assert 'sector 1000' not in set(holdout['sector'])
+    assert len(train) + len(holdout) == len(rows)
+
+
+def test_training_csv_codes_are_read_as_labels(known):
+    assert set(known['furnishing_type']) <= {'unfurnished', 'semifurnished', 'furnished'}
+
+
+def test_evaluate_only_tolerates_unknown_categories(known):
+    pipeline = forest_pipeline(known)
+    assert retrain.evaluate(pipeline, new_listings_with_unseen_sector()) is None
+    assert retrain.unknown_categories(pipeline, new_listings_with_unseen_sector()) == {'sector': ['sector 999']}
+
+    bad_type = make_listings(10, seed=3).astype({'bedRoom': object})
+    bad_type.loc[0, 'bedRoom'] = 'three'
+    with pytest.raises(ValueError):
+        retrain.evaluate(pipeline, bad_type)
+    with pytest.raises(KeyError):
+        retrain.evaluate(pipeline, make_listings(10, seed=3).drop(columns=['sector']))
+
+
+def test_update_that_cannot_score_the_holdout_is_not_published(known, training_csv, tmp_path, monkeypatch, capsys):
+    pipeline_path = tmp_path / 'pipeline.pkl'
+    pipeline_path.write_bytes(pickle.dumps(forest_pipeline(known)))
+    new_path = tmp_path / 'new.csv'
+    make_listings(60, seed=4, codes=True).to_csv(new_path, index=False)
+    scores = iter([{'r2': 0.9, 'mae': 0.1}, None])
+    monkeypatch.setattr(retrain, 'evaluate', lambda pipeline, rows: next(scores))
+    monkeypatch.setattr(retrain.artifacts, 'publish_model', lambda *args: pytest.fail("published"))
+
+    code = retrain.main([str(new_path), '--pipeline', str(pipeline_path), '--data', training_csv,
+                         '--require-improvement'])
+    assert code == 1
+    assert 'MAE 0.1000 -> n/a (unseen categories)' in capsys.readouterr().out
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+from similarity_graph import share_candidates, top_k_graph
+
+
+def brute_cosine(features):
+    dense = features.toarray() if sp.issparse(features) else np.asarray(features)
+    unit = dense / np.linalg.norm(dense, axis=1, keepdims=True)
+    return unit @ unit.T
+
+
+def brute_top_k(similarity, k):
+    similarity = similarity.copy()
+    np.fill_diagonal(similarity, -np.inf)
+    order = np.argsort(-similarity, axis=1, kind='stable')[:, :k]
+    return order, np.take_along_axis(similarity, order, axis=1)
+
+
+@pytest.mark.parametrize('sparse', [False, True], ids=['dense', 'sparse'])
+def test_top_k_edges_match_brute_force_cosine(sparse):
+    rng = np.random.default_rng(0)
+    features = rng.random((45, 8))
+    if sparse:
+        features = sp.csr_matrix(np.where(features > 0.5, features, 0) + np.eye(45, 8) * 0.1)
+    similarity = brute_cosine(features)
+    expected_index, expected_scores = brute_top_k(similarity, 6)
+
+    # A small query chunk exercises the chunked kNN path
+    graph = top_k_graph(features, k=6, chunk=7)
+    assert graph.shape == (45, 45)
+    assert (np.diff(graph.indptr) == 6).all()
+    for row in range(45):
+        start, stop = graph.indptr[row], graph.indptr[row + 1]
+        neighbors, scores = graph.indices[start:stop], graph.data[start:stop]
+        assert row not in neighbors
+        assert set(neighbors) == set(expected_index[row])
+        np.testing.assert_allclose(np.sort(scores)[::-1], expected_scores[row], atol=1e-5)
+
+
+def test_shared_candidates_are_scored_exactly_in_every_view():
+    rng = np.random.default_rng(1)
+    features = {'a': rng.random((30, 5)), 'b': rng.random((30, 3))}
+    graphs = {view: top_k_graph(matrix, k=4) for view, matrix in features.items()}
+    shared = share_candidates(graphs, features)
+
+    union = (graphs['a'] != 0).astype(int) + (graphs['b'] != 0).astype(int)
+    for view, matrix in features.items():
+        graph = shared[view].tocoo()
+        assert set(zip(graph.row, graph.col)) == set(zip(*union.nonzero()))
+        np.testing.assert_allclose(graph.data, brute_cosine(matrix)[graph.row, graph.col], atol=1e-5)
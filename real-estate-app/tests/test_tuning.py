@@ -0,0 +1,71 @@
+import json
+import os
+
+import tuning
+from conftest import make_listings
+
+
+def test_main_fails_with_error_counts_when_no_trial_finishes(tmp_path, capsys):
+    data = tmp_path / 'train.csv'
+    # Without built_up_area every preprocessor fit fails
+    make_listings(60).drop(columns=['built_up_area']).to_csv(data, index=False)
+
+    code = tuning.main(['--data', str(data), '--models', 'random forest', '--encoders', 'ordinal',
+                        '--min-budget', '1', '--configs', '2', '--folds', '2', '--workers', '1',
+                        '--work-dir', str(tmp_path / 'work'), '--no-export'])
+
+    assert code == 1
+    err = capsys.readouterr().err
+    assert 'no configuration finished on the full budget' in err
+    assert '2 of 2 trials failed' in err
+    assert 'built_up_area' in err
+
+
+def run_search(data, tmp_path, encoders):
+    search = tuning.Search(data, ['random forest'], encoders, min_budget=1, configs=4, n_folds=2,
+                           work_dir=str(tmp_path / 'work'))
+    search.run(workers=1)
+    return search
+
+
+def test_search_trains_on_furnishing_labels(training_csv):
+    X, _, categories, _ = tuning._data(training_csv, 2)
+    assert set(X['furnishing_type']) <= {'unfurnished', 'semifurnished', 'furnished'}
+    assert categories['furnishing_type'] == sorted(set(X['furnishing_type']))
+
+
+def test_publish_skips_configurations_serving_cannot_compile(training_csv, tmp_path, monkeypatch, capsys):
+    import artifacts
+    from compiled_scorer import compile_pipeline
+
+    monkeypatch.setattr(artifacts, 'MODEL_CACHE_DIR', str(tmp_path / 'cache'))
+    search = run_search(training_csv, tmp_path, ['ordinal', 'target'])
+    ranked = search.ranked()
+    assert {entry['encoder'] for entry in ranked} == {'ordinal', 'target'}
+    # Rank a TargetEncoder configuration first, as if it had won the search
+    monkeypatch.setattr(search, 'ranked', lambda: sorted(ranked, key=lambda e: e['encoder'] != 'target'))
+
+    version = tuning.export(search, intervals=False)
+    assert 'skipping' in capsys.readouterr().err
+    info = artifacts.model_info(version)
+    assert info['metrics']['config']['encoder'] == 'ordinal'
+    compile_pipeline(artifacts._load_pickle(artifacts._blob_path(version)))
+
+    # The history keeps a summary; the full trace is a file next to the blob
+    metrics = info['metrics']
+    assert 'trace' not in metrics
+    assert metrics['trials'] == len(search.trace()) and metrics['failed_trials'] == 0
+    with open(metrics['trace_path']) as f:
+        assert [json.loads(line) for line in f] == json.loads(json.dumps(search.trace()))
+
+
+def test_main_fails_when_no_configuration_can_be_served(training_csv, tmp_path, monkeypatch, capsys):
+    import artifacts
+
+    monkeypatch.setattr(artifacts, 'MODEL_CACHE_DIR', str(tmp_path / 'cache'))
+    code = tuning.main(['--data', training_csv, '--models', 'random forest', '--encoders', 'target',
+                        '--min-budget', '1', '--configs', '2', '--folds', '2', '--workers', '1',
+                        '--work-dir', str(tmp_path / 'work'), '--no-intervals'])
+    assert code == 1
+    assert 'can be compiled for serving' in capsys.readouterr().err
+    assert not os.path.exists(os.path.join(artifacts.MODEL_CACHE_DIR, 'refs'))
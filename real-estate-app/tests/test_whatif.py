@@ -0,0 +1,28 @@
+import numpy as np
+
+import whatif
+from batch_predict import FEATURE_COLUMNS, PRICE_COLUMN, predict_chunk
+from conftest import make_listings
+
+
+def test_floor_by_furnishing_sweep_uses_the_pipelines_labels(notebook_pipeline):
+    df = make_listings(200, seed=5)  # df.pkl layout: furnishing_type labels
+    base = df.iloc[0][FEATURE_COLUMNS].to_dict()
+    axes = {feature: whatif.axis_values(feature, base, df[feature])
+            for feature in ('floor_category', 'furnishing_type')}
+
+    result = whatif.sweep(notebook_pipeline, base, axes, intervals=False)
+    assert len(result) == 9
+    assert set(result['furnishing_type']) == {'unfurnished', 'semifurnished', 'furnished'}
+    for _, row in result.iterrows():
+        expected = predict_chunk(notebook_pipeline, row[FEATURE_COLUMNS].to_frame().T)[0]
+        assert np.isclose(row[PRICE_COLUMN], expected)
+    assert whatif.pivot(result, 'floor_category', 'furnishing_type').shape == (3, 3)
+
+
+def test_grid_maps_a_base_furnishing_code_to_its_label():
+    base = make_listings(1, seed=6, codes=True).iloc[0][FEATURE_COLUMNS].to_dict()
+    base['furnishing_type'] = 2.0
+    grid = whatif.feature_grid(base, {'built_up_area': whatif.axis_values('built_up_area', base)})
+    assert len(grid) == whatif.AREA_STEPS
+    assert set(grid['furnishing_type']) == {'furnished'}
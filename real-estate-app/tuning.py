@@ -0,0 +1,424 @@
+"""
+Hyperband-style hyperparameter search over (model, params, encoder).
+
+model_selection.py compares the candidate regressors at their defaults on
+full 10-fold CV. Here the budget of a trial is the share of each training
+fold it is fitted on: every bracket starts many sampled configurations on a
+small share, keeps the best 1/ETA by CV MAE and re-evaluates them on ETA times
+more rows, until the survivors run on the full folds (successive halving).
+Brackets differ in how many configurations they start with, trading
+exploration against trusting small-budget scores (Hyperband).
+
+Trials of a rung run in a process pool. Every finished trial is appended
+to model_selection/tuning/<search key>/trace.jsonl, so an interrupted search
+resumes where it stopped. At the end the best configuration the serving
+path can compile (compiled_scorer) is refitted on all rows, calibrated
+(price_intervals) and published as the serving pipeline.pkl. The version
+metadata holds a summary of the search; the full trace is stored next to the
+model blob (<blob>.trace.jsonl), as the metadata is also appended to the
+ref's history on every publish.
+
+    python tuning.py --models "random forest" "extra trees" --workers 4
+"""
+import argparse
+import functools
+import hashlib
+import json
+import math
+import os
+import pickle
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import model_selection
+from artifacts import file_sha256
+from model_selection import (COLUMNS_TO_ENCODE, DEFAULT_DATA, DEFAULT_WORK_DIR, NUMERIC_COLUMNS, RANDOM_STATE,
+                             append_leaderboard, read_leaderboard)
+
+ETA = 3
+MIN_BUDGET = 1 / 9
+N_FOLDS = 3
+ENCODERS = ['ordinal', 'onehot', 'target']
+
+# Sampled uniformly per parameter; n_jobs stays 1 because trials already run in parallel
+SEARCH_SPACE = {
+    'random forest': {
+        'n_estimators': [100, 200, 300, 500],
+        'max_depth': [None, 15, 25, 35],
+        'max_features': [1.0, 0.5, 'sqrt'],
+        'min_samples_leaf': [1, 2, 4],
+    },
+    'extra trees': {
+        'n_estimators': [100, 200, 300, 500],
+        'max_depth': [None, 15, 25, 35],
+        'max_features': [1.0, 0.5, 'sqrt'],
+        'min_samples_leaf': [1, 2, 4],
+    },
+    'gradient boosting': {
+        'n_estimators': [100, 300, 500],
+        'learning_rate': [0.03, 0.05, 0.1, 0.2],
+        'max_depth': [3, 4, 6],
+        'subsample': [0.7, 0.85, 1.0],
+    },
+    'xgboost': {
+        'n_estimators': [200, 400, 800],
+        'learning_rate': [0.03, 0.05, 0.1],
+        'max_depth': [4, 6, 8],
+        'subsample': [0.7, 0.85, 1.0],
+        'colsample_bytree': [0.6, 0.8, 1.0],
+    },
+}
+
+
+def available_models(names=None):
+    """Search-space models that can be built here (xgboost only when installed)."""
+    import importlib.util
+
+    names = names or list(SEARCH_SPACE)
+    unknown = [name for name in names if name not in SEARCH_SPACE]
+    if unknown:
+        raise KeyError(f"No search space for {unknown}; choose from {list(SEARCH_SPACE)}")
+    return [name for name in names if name != 'xgboost' or importlib.util.find_spec('xgboost') is not None]
+
+
+# --- Pipelines ---
+
+def category_lists(X):
+    """Sorted categories of every encoded column over all rows, so a subsample never meets an unknown one."""
+    return {col: sorted(X[col].dropna().unique().tolist()) for col in COLUMNS_TO_ENCODE}
+
+
+def make_preprocessor(encoder, categories):
+    """
+    'ordinal' is model_selection.make_preprocessor() with the categories fixed;
+    'onehot' one-hot encodes every categorical column; 'target' replaces each
+    category with its cross-fitted mean log price (sklearn TargetEncoder).
+    """
+    from sklearn.compose import ColumnTransformer
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler, TargetEncoder
+
+    if encoder == 'ordinal':
+        return model_selection.make_preprocessor().set_params(
+            cat__categories=[categories[col] for col in COLUMNS_TO_ENCODE],
+            cat1__categories=[categories[col] for col in ('sector', 'agePossession')])
+    if encoder == 'onehot':
+        categorical = OneHotEncoder(categories=[categories[col] for col in COLUMNS_TO_ENCODE],
+                                    sparse_output=False, handle_unknown='ignore')
+    elif encoder == 'target':
+        categorical = TargetEncoder(categories=[categories[col] for col in COLUMNS_TO_ENCODE],
+                                    target_type='continuous', random_state=RANDOM_STATE)
+    else:
+        raise ValueError(f"Unknown encoder {encoder!r}; choose from {ENCODERS}")
+    return ColumnTransformer(
+        transformers=[('num', StandardScaler(), NUMERIC_COLUMNS), ('cat', categorical, COLUMNS_TO_ENCODE)],
+        remainder='passthrough'
+    )
+
+
+def make_pipeline(config, categories):
+    from sklearn.pipeline import Pipeline
+
+    model = model_selection.model_factories()[config['model']]()
+    params = dict(config['params'])
+    if 'n_jobs' in model.get_params():
+        params['n_jobs'] = 1
+    if 'random_state' in model.get_params():
+        params['random_state'] = RANDOM_STATE
+    model.set_params(**params)
+    return Pipeline([('preprocessor', make_preprocessor(config['encoder'], categories)), ('regressor', model)])
+
+
+def sample_configs(n, models, encoders, rng):
+    """`n` configurations drawn uniformly: a model, an encoder and one value per parameter."""
+    configs = []
+    for _ in range(n):
+        model = models[rng.integers(len(models))]
+        params = {name: values[rng.integers(len(values))] for name, values in SEARCH_SPACE[model].items()}
+        configs.append({'model': model, 'encoder': encoders[rng.integers(len(encoders))], 'params': params})
+    return configs
+
+
+# --- Trials (run in worker processes) ---
+
+@functools.lru_cache(maxsize=2)
+def _data(data_path, n_folds):
+    from sklearn.model_selection import KFold
+
+    X, y = model_selection.load_training_data(data_path)
+    folds = list(KFold(n_splits=n_folds, shuffle=True, random_state=RANDOM_STATE).split(X))
+    return X, y.to_numpy(), category_lists(X), folds
+
+
+def _budget_rows(train_idx, fold, budget):
+    # The same permutation for every budget, so a larger budget's rows contain the smaller ones
+    order = np.random.default_rng([RANDOM_STATE, fold]).permutation(train_idx)
+    return order[:max(1, math.ceil(budget * len(order)))]
+
+
+def evaluate_trial(config, budget, data_path, n_folds):
+    """CV metrics of `config` fitted on `budget` (a share) of each training fold."""
+    from sklearn.metrics import mean_absolute_error, r2_score
+
+    X, y, categories, folds = _data(data_path, n_folds)
+    maes, r2s, fit_seconds = [], [], 0.0
+    for fold, (train_idx, test_idx) in enumerate(folds):
+        rows = _budget_rows(train_idx, fold, budget)
+        pipeline = make_pipeline(config, categories)
+        start = time.perf_counter()
+        pipeline.fit(X.iloc[rows], y[rows])
+        fit_seconds += time.perf_counter() - start
+        predicted = pipeline.predict(X.iloc[test_idx])
+        maes.append(mean_absolute_error(np.expm1(y[test_idx]), np.expm1(predicted)))
+        r2s.append(r2_score(y[test_idx], predicted))
+    return {'mae': float(np.mean(maes)), 'mae_std': float(np.std(maes)), 'r2': float(np.mean(r2s)),
+            'fit_seconds': round(fit_seconds, 3)}
+
+
+# --- Search ---
+
+def brackets(eta=ETA, min_budget=MIN_BUDGET, configs=None):
+    """
+    [(n_configs, [budgets of each rung])] from the most exploratory bracket
+    to plain full-budget evaluation. `configs` scales the first bracket's
+    size (default ETA ** rungs, the Hyperband choice); the rest scale with it.
+    """
+    s_max = max(0, round(math.log(1 / min_budget, eta)))
+    scale = 1.0 if configs is None else configs / eta ** s_max
+    plan = []
+    for s in range(s_max, -1, -1):
+        n = max(1, math.ceil(scale * (s_max + 1) * eta ** s / (s + 1)))
+        plan.append((n, [eta ** (i - s) for i in range(s + 1)]))
+    return plan
+
+
+def search_key(data_path, spec):
+    encoded = json.dumps(spec, sort_keys=True, default=str)
+    return hashlib.sha256((file_sha256(data_path) + encoded).encode()).hexdigest()[:16]
+
+
+def _trial_key(config_id, budget):
+    return f'{config_id}@{budget:.6f}'
+
+
+class Search:
+    """
+    One resumable search: its sampled configurations and trace live under
+    work_dir/tuning/<key>/, where key hashes the data and every search setting.
+    """
+
+    def __init__(self, data_path=DEFAULT_DATA, models=None, encoders=ENCODERS, eta=ETA, min_budget=MIN_BUDGET,
+                 configs=None, n_brackets=None, n_folds=N_FOLDS, seed=RANDOM_STATE, work_dir=DEFAULT_WORK_DIR):
+        self.data_path = os.path.abspath(data_path)
+        self.n_folds = n_folds
+        self.plan = brackets(eta, min_budget, configs)[:n_brackets]
+        self.eta = eta
+        self.spec = {'models': available_models(models), 'encoders': list(encoders), 'eta': eta,
+                     'min_budget': min_budget, 'plan': self.plan, 'folds': n_folds, 'seed': seed,
+                     'space': {name: SEARCH_SPACE[name] for name in available_models(models)}}
+        self.key = search_key(data_path, self.spec)
+        self.dir = os.path.join(work_dir, 'tuning', self.key)
+        self.trace_path = os.path.join(self.dir, 'trace.jsonl')
+
+        rng = np.random.default_rng(seed)
+        self.configs = sample_configs(sum(n for n, _ in self.plan), self.spec['models'], self.spec['encoders'], rng)
+        os.makedirs(self.dir, exist_ok=True)
+        with open(os.path.join(self.dir, 'search.json'), 'w') as f:
+            json.dump({**self.spec, 'data': self.data_path, 'configs': self.configs}, f, indent=2, default=str)
+
+    def trace(self):
+        return read_leaderboard(self.trace_path)
+
+    def run(self, workers=None, on_result=None):
+        """Run (or resume) every bracket; returns the trace."""
+        done = {_trial_key(entry['config_id'], entry['budget']): entry for entry in self.trace()}
+        first_id = 0
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for bracket, (n, budgets) in enumerate(self.plan):
+                survivors = list(range(first_id, first_id + n))
+                first_id += n
+                for rung, budget in enumerate(budgets):
+                    pending = [i for i in survivors if _trial_key(i, budget) not in done]
+                    futures = {pool.submit(evaluate_trial, self.configs[i], budget, self.data_path,
+                                           self.n_folds): i for i in pending}
+                    for future in as_completed(futures):
+                        config_id = futures[future]
+                        entry = {'config_id': config_id, 'bracket': bracket, 'rung': rung, 'budget': budget,
+                                 **self.configs[config_id]}
+                        try:
+                            entry.update(future.result())
+                        except Exception as e:
+                            # Recorded so a resume does not retry it; ranks last
+                            entry.update({'mae': None, 'error': f'{type(e).__name__}: {e}'})
+                        append_leaderboard(self.trace_path, entry)
+                        done[_trial_key(config_id, budget)] = entry
+                        if on_result is not None:
+                            on_result(entry)
+
+                    keep = max(1, len(survivors) // self.eta)
+                    scores = {i: done[_trial_key(i, budget)].get('mae') for i in survivors}
+                    survivors = sorted(survivors, key=lambda i: (scores[i] is None, scores[i] or 0.0))[:keep]
+        return self.trace()
+
+    def ranked(self):
+        """Trace entries finished on full folds, lowest CV MAE first."""
+        full = [e for e in self.trace() if e['budget'] >= 1 and e.get('mae') is not None]
+        return sorted(full, key=lambda e: e['mae'])
+
+    def best(self):
+        """Trace entry of the lowest CV MAE on full folds, or None before any finished."""
+        ranked = self.ranked()
+        return ranked[0] if ranked else None
+
+
+# --- Export ---
+
+def fit_best(search, intervals=True, servable=True):
+    """
+    The best configuration refitted on all rows, with calibrated price
+    intervals. With `servable`, the best one compiled_scorer can compile
+    (TargetEncoder and xgboost pipelines cannot); the others are skipped.
+    """
+    import price_intervals
+    from batch_predict import FEATURE_COLUMNS
+    from compiled_scorer import compile_pipeline
+
+    ranked = search.ranked()
+    if not ranked:
+        raise RuntimeError("no trial finished on the full budget")
+    X, y, categories, _ = _data(search.data_path, search.n_folds)
+    for best in ranked:
+        pipeline = make_pipeline(best, categories)
+        pipeline.fit(X[FEATURE_COLUMNS], y)
+        if servable:
+            try:
+                compile_pipeline(pipeline)
+            except NotImplementedError as e:
+                print(f"skipping #{best['config_id']} {best['model']} / {best['encoder']}: {e}", file=sys.stderr)
+                continue
+        if intervals:
+            rows = X[FEATURE_COLUMNS].assign(price=np.expm1(y))
+            price_intervals.attach(pipeline, price_intervals.fit(pipeline, rows))
+        return pipeline, best
+    raise RuntimeError(f"none of the {len(ranked)} full-budget configurations can be compiled for serving")
+
+
+def trace_summary(trace):
+    """Trial counts of a search trace, for the version metadata."""
+    return {
+        'trials': len(trace),
+        'full_budget_trials': sum(entry['budget'] >= 1 for entry in trace),
+        'failed_trials': sum(bool(entry.get('error')) for entry in trace),
+        'configs': len({entry['config_id'] for entry in trace}),
+    }
+
+
+def _trace_lines(trace):
+    return ''.join(json.dumps(entry, default=str) + '\n' for entry in trace)
+
+
+def export(search, output=None, intervals=True):
+    """
+    Publish the best servable pipeline as the serving model version (or, with
+    `output`, write pipeline.pkl and search_trace.jsonl into that directory).
+    Returns the version or the pipeline path.
+    """
+    import artifacts
+
+    pipeline, best = fit_best(search, intervals)
+    trace = search.trace()
+    metrics = {
+        'method': 'tune',
+        'search_key': search.key,
+        'config': {key: best[key] for key in ('model', 'encoder', 'params')},
+        'cv_mae': best['mae'],
+        'cv_r2': best['r2'],
+        'folds': search.n_folds,
+        **trace_summary(trace),
+    }
+    if output:
+        os.makedirs(output, exist_ok=True)
+        path = os.path.join(output, artifacts.MODEL_FILENAME)
+        with open(path, 'wb') as f:
+            pickle.dump(pipeline, f)
+        with open(os.path.join(output, 'search_trace.jsonl'), 'w') as f:
+            f.write(_trace_lines(trace))
+        return path
+
+    fd, tmp = tempfile.mkstemp(dir=artifacts.MODEL_CACHE_DIR if os.path.isdir(artifacts.MODEL_CACHE_DIR) else None)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(pipeline, f)
+        # Written before the ref flips, so a published version always has its trace
+        metrics['trace_path'] = f"{artifacts._blob_path(file_sha256(tmp))}.trace.jsonl"
+        artifacts._write_atomic(metrics['trace_path'], _trace_lines(trace))
+        return artifacts.publish_model(tmp, json.loads(json.dumps(metrics, default=str)))
+    finally:
+        os.remove(tmp)
+
+
+def _print_trial(entry):
+    config = f"{entry['model']} / {entry['encoder']} {entry['params']}"
+    if entry.get('error'):
+        print(f"[b{entry['bracket']} r{entry['rung']}] #{entry['config_id']} failed: {entry['error']}", flush=True)
+    else:
+        print(f"[b{entry['bracket']} r{entry['rung']} {entry['budget']:.0%}] #{entry['config_id']} "
+              f"mae={entry['mae']:.4f} r2={entry['r2']:.4f} fit={entry['fit_seconds']:.1f}s  {config}", flush=True)
+
+
+def _print_failures(trace):
+    errors = Counter(entry['error'] for entry in trace if entry.get('error'))
+    full = [entry for entry in trace if entry['budget'] >= 1]
+    print(f"\nno configuration finished on the full budget: {len(full)} full-budget trials, "
+          f"{sum(errors.values())} of {len(trace)} trials failed", file=sys.stderr)
+    for error, count in errors.most_common():
+        print(f"  {count:>4}x {error}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hyperband search over regressors, their parameters and "
+                                                 "categorical encoders; publishes the best pipeline.")
+    parser.add_argument('--data', default=DEFAULT_DATA)
+    parser.add_argument('--models', nargs='+', help=f"Subset of {list(SEARCH_SPACE)}")
+    parser.add_argument('--encoders', nargs='+', default=ENCODERS, choices=ENCODERS)
+    parser.add_argument('--eta', type=int, default=ETA, help="Keep 1/ETA of each rung, ETA times the budget")
+    parser.add_argument('--min-budget', type=float, default=MIN_BUDGET, help="Smallest share of training rows")
+    parser.add_argument('--configs', type=int, help="Configurations in the first bracket (default ETA ** rungs)")
+    parser.add_argument('--brackets', type=int, help="Run only the first N brackets (1: successive halving)")
+    parser.add_argument('--folds', type=int, default=N_FOLDS)
+    parser.add_argument('--seed', type=int, default=RANDOM_STATE)
+    parser.add_argument('--workers', type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument('--work-dir', default=DEFAULT_WORK_DIR, help="Search trace location")
+    parser.add_argument('--output', help="Write pipeline.pkl and search_trace.jsonl here instead of publishing")
+    parser.add_argument('--no-export', action='store_true', help="Only run the search")
+    parser.add_argument('--no-intervals', action='store_true', help="Skip price interval calibration")
+    args = parser.parse_args(argv)
+
+    search = Search(args.data, args.models, args.encoders, args.eta, args.min_budget, args.configs, args.brackets,
+                    args.folds, args.seed, args.work_dir)
+    print(f"search {search.key}: {sum(n for n, _ in search.plan)} configurations in {len(search.plan)} brackets, "
+          f"trace {search.trace_path}")
+    start = time.perf_counter()
+    search.run(args.workers, on_result=_print_trial)
+    best = search.best()
+    if best is None:
+        _print_failures(search.trace())
+        return 1
+    print(f"\nbest: {best['model']} / {best['encoder']} {best['params']} "
+          f"mae={best['mae']:.4f} r2={best['r2']:.4f} ({time.perf_counter() - start:.0f}s)")
+    if not args.no_export:
+        try:
+            result = export(search, args.output, not args.no_intervals)
+        except RuntimeError as e:
+            print(f"not exported: {e}", file=sys.stderr)
+            return 1
+        print(f"wrote {result}" if args.output else f"published {result}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+What-if price sensitivity for one property.
+
+`sweep` varies one or two features of a base property over a grid (e.g. 50
+built-up area steps x every sector, or every floor_category x
+furnishing_type) and prices the whole grid with a single vectorized predict
+call. The result is one row per grid point with its predicted price and
+calibrated low/high, ready for `curve_figure` (one feature) or
+`heatmap_figure` (two). Grids are built with NumPy index arithmetic, so a
+few thousand points cost one model pass rather than one per form submit.
+"""
+import numpy as np
+import pandas as pd
+
+from batch_predict import FEATURE_COLUMNS, HIGH_COLUMN, LOW_COLUMN, PRICE_COLUMN, predict_chunk, prepare_features
+
+AREA_STEPS = 50
+# Area sweeps run from AREA_RANGE[0] to AREA_RANGE[1] times the base built-up area
+AREA_RANGE = (0.5, 2.0)
+MAX_GRID_POINTS = 20_000
+NUMERIC_AXES = {'built_up_area'}
+
+
+def axis_values(feature, base, choices=None, steps=AREA_STEPS):
+    """
+    Values to sweep `feature` over: AREA_RANGE around the base value for
+    built-up area, otherwise the sorted distinct `choices` (the model's known
+    categories, e.g. df.pkl's column), falling back to the base value alone.
+    """
+    if feature in NUMERIC_AXES:
+        low, high = AREA_RANGE
+        return np.round(np.linspace(base[feature] * low, base[feature] * high, steps), 1)
+    if choices is None:
+        return np.asarray([base[feature]])
+    return np.asarray(sorted(pd.unique(pd.Series(choices).dropna())))
+
+
+def feature_grid(base, axes):
+    """
+    Model input frame with one row per point of the cartesian product of
+    `axes` ({feature: values}, first axis slowest); every other feature keeps
+    its value from the `base` row (a dict of FEATURE_COLUMNS). The frame is in
+    the pipeline's schema (prepare_features), so furnishing_type holds labels.
+    """
+    unknown = [feature for feature in axes if feature not in FEATURE_COLUMNS]
+    if unknown:
+        raise KeyError(f"Not model features: {unknown}")
+    values = [np.asarray(v) for v in axes.values()]
+    shape = tuple(len(v) for v in values)
+    size = int(np.prod(shape))
+    if size > MAX_GRID_POINTS:
+        raise ValueError(f"{size:,} grid points exceed MAX_GRID_POINTS ({MAX_GRID_POINTS:,})")
+
+    # Index of each row along every axis, without materialising a meshgrid per column
+    positions = np.unravel_index(np.arange(size), shape)
+    columns = {}
+    for col in FEATURE_COLUMNS:
+        if col in axes:
+            axis = list(axes).index(col)
+            columns[col] = values[axis][positions[axis]]
+        else:
+            columns[col] = np.repeat(np.asarray([base[col]], dtype=object), size)
+    return prepare_features(pd.DataFrame(columns))
+
+
+def sweep(pipeline, base, axes, intervals=True):
+    """
+    Predicted price (Cr) for every point of the `axes` grid around `base`, in
+    one predict call: the grid frame plus PRICE_COLUMN (and LOW/HIGH_COLUMN
+    from the pipeline's calibrated intervals).
+    """
+    grid = feature_grid(base, axes)
+    prices = predict_chunk(pipeline, grid)
+    result = grid.assign(**{PRICE_COLUMN: prices})
+    if intervals:
+        import price_intervals
+
+        low, high = price_intervals.bounds(pipeline, prices, grid['property_type'].to_numpy())
+        result[LOW_COLUMN], result[HIGH_COLUMN] = low, high
+    return result
+
+
+def pivot(result, rows, columns, value=PRICE_COLUMN):
+    """rows x columns table of `value` from a two-axis sweep (the heatmap's matrix)."""
+    return result.pivot_table(index=rows, columns=columns, values=value, aggfunc='first', sort=True)
+
+
+# --- Figures (Plotly imported lazily) ---
+
+def curve_figure(result, feature, base=None, title=None):
+    """Price curve with its interval band over a one-axis sweep; `base` marks the submitted value."""
+    import plotly.graph_objects as go
+
+    x = result[feature]
+    fig = go.Figure()
+    if LOW_COLUMN in result:
+        fig.add_trace(go.Scatter(x=x, y=result[HIGH_COLUMN], mode='lines', line={'width': 0},
+                                 showlegend=False, hoverinfo='skip'))
+        fig.add_trace(go.Scatter(x=x, y=result[LOW_COLUMN], mode='lines', line={'width': 0},
+                                 fill='tonexty', fillcolor='rgba(40, 167, 69, 0.2)', name='Likely range'))
+    mode = 'lines' if feature in NUMERIC_AXES else 'lines+markers'
+    fig.add_trace(go.Scatter(x=x, y=result[PRICE_COLUMN], mode=mode, name='Estimated price',
+                             line={'color': '#28a745'}))
+    if base is not None and feature in NUMERIC_AXES:
+        fig.add_vline(x=base[feature], line_dash='dash', line_color='gray')
+    fig.update_layout(title=title, xaxis_title=feature, yaxis_title='Price (Cr)')
+    return fig
+
+
+def heatmap_figure(result, rows, columns, title=None):
+    """Heatmap of the estimated price over a two-axis sweep."""
+    import plotly.express as px
+
+    table = pivot(result, rows, columns)
+    fig = px.imshow(table, aspect='auto', color_continuous_scale='Viridis', origin='lower',
+                    labels={'x': columns, 'y': rows, 'color': 'Price (Cr)'}, title=title)
+    return fig